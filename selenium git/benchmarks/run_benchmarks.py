@@ -0,0 +1,371 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from functools import lru_cache
+
+# Offline micro-benchmarks for the extraction and parsing hot paths, run
+# against saved pages (flipkart_page_source.html and fixtures/github). Every run is appended to a JSON
+# history; a benchmark that is more than --threshold slower than its baseline
+# (the median of the last --baseline-runs runs on the same machine and
+# Python) fails the run with exit code 1. Failed runs are kept in the history
+# but flagged, and flagged runs never count towards a baseline.
+#
+# The same code can be 50% faster or slower from one interpreter to the next
+# (memory layout), so each run times the suite in --processes fresh
+# processes and keeps the median.
+#
+#   python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py -k github. --threshold 0.3
+#   python benchmarks/run_benchmarks.py --no-save     # compare without recording
+#   python benchmarks/run_benchmarks.py --accept      # an intended slowdown becomes the new baseline
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import lxml.html
+import pandas as pd
+from lxml.cssselect import CSSSelector
+from selenium.webdriver.common.by import By
+
+import scrapp
+from exporters import open_row_writer
+from gitselenium import REPO_FIELD_EXTRACTORS, EnhancedGitHubScraper, RepoPage, parse_repo_list_page, parse_repo_page
+from warc_archive import load_script
+
+scrapy_plus = load_script("scrapy+.py", "scrapy_plus")
+
+DEFAULT_HISTORY = os.path.join(HERE, "history.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_BASELINE_RUNS = 5
+DEFAULT_PROCESSES = 3
+REPEAT = 7
+MIN_TIME = 0.05
+
+# Saved pages, relative to the project directory
+FLIPKART_PAGE = "flipkart_page_source.html"
+REPO_PAGE = "fixtures/github/octo-org_hello-scraper.html"
+REPO_URL = "https://github.com/octo-org/hello-scraper"
+GITHUB_FIXTURES = "fixtures/github"
+# The product cards of the Flipkart page, as picked in interactive mode
+FLIPKART_CONTAINER = {'selector': "[data-id]", 'count': 24, 'class_name': ""}
+EXPORT_ROWS = 2000
+NUMBER_TEXTS = ['1.2k', '1,234', '15', '3.4m', '', '42 stars', 'n/a', '987,654', '0.5k', '7'] * 100
+
+@lru_cache(maxsize=None)
+def fixture(name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return f.read()
+
+@lru_cache(maxsize=64)
+def _css(selector):
+    return CSSSelector(selector)
+
+class TreeElement:
+    """
+    Enough of a Selenium WebElement, over an lxml element, to run the
+    driver-based page analysis offline. Only CSS locators are supported.
+    """
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def tag_name(self):
+        return self.element.tag
+
+    @property
+    def text(self):
+        return " ".join(self.element.text_content().split())
+
+    def get_attribute(self, name):
+        return self.element.get(name)
+
+    def find_elements(self, by, selector):
+        if by != By.CSS_SELECTOR:
+            raise ValueError(f"TreeElement only understands CSS selectors, not {by}")
+        return [TreeElement(element) for element in _css(selector)(self.element)]
+
+def tree_driver(html):
+    return TreeElement(lxml.html.fromstring(html))
+
+def page_texts():
+    """Every non-empty text node of the fixtures, as classify_text sees them"""
+    texts = []
+    for name in (FLIPKART_PAGE, REPO_PAGE):
+        texts += [text.strip() for text in lxml.html.fromstring(fixture(name)).itertext() if text.strip()]
+    return texts
+
+def export_rows():
+    row = parse_repo_page(fixture(REPO_PAGE), REPO_URL)
+    return [dict(row, full_name=f"octo-org/project-{i}", stars=i) for i in range(EXPORT_ROWS)]
+
+# name -> setup function returning the zero-argument callable to time
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark("flipkart.extract_products")
+def _flipkart_extract():
+    html = fixture(FLIPKART_PAGE)
+    return lambda: scrapp.extract_products(html, 1)
+
+@benchmark("generic.find_container_patterns")
+def _find_container_patterns():
+    driver = tree_driver(fixture(FLIPKART_PAGE))
+    return lambda: scrapy_plus.find_container_patterns(driver)
+
+@benchmark("generic.analyze_container_content")
+def _analyze_container_content():
+    driver = tree_driver(fixture(FLIPKART_PAGE))
+    return lambda: scrapy_plus.analyze_container_content(driver, FLIPKART_CONTAINER)
+
+@benchmark("generic.identify_data_types")
+def _identify_data_types():
+    sample_data = scrapy_plus.analyze_container_content(tree_driver(fixture(FLIPKART_PAGE)), FLIPKART_CONTAINER)
+    return lambda: scrapy_plus.identify_data_types(sample_data)
+
+@benchmark("generic.classify_text")
+def _classify_text():
+    # The uncached function: the lru_cache would turn this into dictionary lookups
+    classify = scrapy_plus.classify_text.__wrapped__
+    texts = page_texts()
+    return lambda: [classify(text) for text in texts]
+
+@benchmark("generic.classify_series")
+def _classify_series():
+    series = pd.Series(page_texts())
+    return lambda: scrapy_plus.classify_series(series)
+
+@benchmark("github.parse_number")
+def _parse_number():
+    scraper = EnhancedGitHubScraper()
+    return lambda: [scraper._parse_number(text) for text in NUMBER_TEXTS]
+
+def _github_page(name):
+    """owner_repositories.html is a list page, owner_repo.html the page of https://github.com/owner/repo"""
+    def setup():
+        html = fixture(f"{GITHUB_FIXTURES}/{name}.html")
+        if name.endswith("_repositories"):
+            return lambda: parse_repo_list_page(html)
+        url = "https://github.com/" + name.replace("_", "/", 1)
+        return lambda: parse_repo_page(html, url)
+    return setup
+
+for _path in sorted(glob.glob(os.path.join(ROOT, GITHUB_FIXTURES, "*.html"))):
+    _name = os.path.basename(_path)[:-len(".html")]
+    BENCHMARKS[f"github.parse.{_name}"] = _github_page(_name)
+
+def _field_extractor(field):
+    def setup():
+        page = RepoPage(fixture(REPO_PAGE), REPO_URL)
+        page.tree, page.dates  # parse once; only the extractor is timed
+        extract = REPO_FIELD_EXTRACTORS[field]
+        return lambda: extract(page)
+    return setup
+
+for _field in REPO_FIELD_EXTRACTORS:
+    BENCHMARKS[f"github.field.{_field}"] = _field_extractor(_field)
+
+# Scratch space for the export benchmarks, removed at exit
+EXPORT_DIR = tempfile.TemporaryDirectory(prefix="bench_export_")
+
+def _export(extension):
+    def setup():
+        rows = export_rows()
+        path = os.path.join(EXPORT_DIR.name, f"rows{extension}")
+
+        def write():
+            with open_row_writer(path, fieldnames=list(rows[0])) as writer:
+                writer.write_many(rows)
+        write()  # fails early (e.g. no pyarrow) before timing starts
+        return write
+    return setup
+
+for _extension in (".csv", ".jsonl", ".parquet"):
+    BENCHMARKS[f"export{_extension}"] = _export(_extension)
+
+def measure(func, repeat=REPEAT, min_time=MIN_TIME):
+    """Best and median seconds per call over repeat rounds of at least min_time each"""
+    timer = timeit.Timer(func)
+    first = timer.timeit(1)
+    loops = max(1, int(min_time / max(first, 1e-7)))
+    times = [elapsed / loops for elapsed in timer.repeat(repeat, loops)]
+    return {'best': min(times), 'median': statistics.median(times), 'loops': loops}
+
+def run_benchmarks(names, repeat=REPEAT):
+    """name -> measure() result, or {'skipped': reason} when an optional dependency is missing"""
+    # extract_products logs every page; that is I/O, not the code being measured
+    logging.disable(logging.INFO)
+    results = {}
+    for name in names:
+        try:
+            func = BENCHMARKS[name]()
+        except ImportError as e:
+            results[name] = {'skipped': str(e)}
+            continue
+        results[name] = measure(func, repeat)
+    return results
+
+def run_in_processes(names, repeat=REPEAT, processes=DEFAULT_PROCESSES):
+    """run_benchmarks() in fresh interpreters; best and median are the medians across processes"""
+    runs = []
+    for index in range(processes):
+        print(f"🔁 Process {index + 1}/{processes}...")
+        worker = subprocess.run([sys.executable, os.path.abspath(__file__), "--repeat", str(repeat), "--worker", *names],
+                                capture_output=True, text=True)
+        if worker.returncode:
+            raise RuntimeError(f"Benchmark process failed:\n{worker.stderr}")
+        runs.append(json.loads(worker.stdout))
+
+    merged = {}
+    for name in names:
+        results = [run[name] for run in runs]
+        if 'skipped' in results[0]:
+            merged[name] = results[0]
+            continue
+        merged[name] = {
+            'best': statistics.median(result['best'] for result in results),
+            'median': statistics.median(result['median'] for result in results),
+            'loops': results[0]['loops'],
+            'processes': processes,
+        }
+    return merged
+
+def machine_key():
+    return f"{platform.node()} {platform.machine()} Python {platform.python_version()}"
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_history(path, history):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+def baseline_runs(history, machine, runs=DEFAULT_BASELINE_RUNS):
+    """The last runs on this machine that did not regress"""
+    # Regressed runs stay in the history but never become the baseline, or the gate would get used to them
+    return [entry for entry in history if entry.get('machine') == machine and not entry.get('regressions')][-runs:]
+
+def baselines(history, machine, runs=DEFAULT_BASELINE_RUNS):
+    """Benchmark name -> median best time over the last runs on this machine"""
+    times = {}
+    for entry in baseline_runs(history, machine, runs):
+        for name, result in entry['results'].items():
+            if 'best' in result:
+                times.setdefault(name, []).append(result['best'])
+    return {name: statistics.median(values) for name, values in times.items()}
+
+def _duration(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.2f} µs"
+
+def _report(name, result, previous, threshold):
+    """Print one result against its baseline; True when it regressed"""
+    if 'skipped' in result:
+        print(f"⏭️  {name:40} skipped: {result['skipped']}")
+        return False
+    if previous is None:
+        print(f"🆕 {name:40} {_duration(result['best'])}")
+        return False
+    change = result['best'] / previous - 1
+    if change > threshold:
+        status = "❌"
+    elif change < -threshold:
+        status = "🚀"
+    else:
+        status = "✅"
+    print(f"{status} {name:40} {_duration(result['best'])}  baseline {_duration(previous)}  {change:+7.1%}")
+    return change > threshold
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction and parsing hot paths on saved fixtures")
+    parser.add_argument("-k", dest="pattern", help="only benchmarks whose name contains this")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file (default: benchmarks/history.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fail when a benchmark is this much slower than its baseline (default: %(default)s = 25%%)")
+    parser.add_argument("--baseline-runs", type=int, default=DEFAULT_BASELINE_RUNS,
+                        help="previous runs the baseline is the median of (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timing rounds per benchmark (default: %(default)s)")
+    parser.add_argument("-p", "--processes", type=int, default=DEFAULT_PROCESSES,
+                        help="fresh interpreters to time the suite in (default: %(default)s; 1 runs in this one)")
+    parser.add_argument("--no-save", dest="save", action="store_false", help="do not add this run to the history")
+    parser.add_argument("--accept", action="store_true",
+                        help="save this run as a baseline even if it regressed (an intended slowdown)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--worker", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        # Child of run_in_processes(): results go back as JSON on stdout
+        print(json.dumps(run_benchmarks(args.worker, args.repeat)))
+        return 0
+
+    names = [name for name in BENCHMARKS if not args.pattern or args.pattern in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        print(f"❌ No benchmark matches {args.pattern!r}")
+        return 1
+
+    history = load_history(args.history)
+    machine = machine_key()
+    baseline = baselines(history, machine, args.baseline_runs)
+    previous_runs = len(baseline_runs(history, machine, args.baseline_runs))
+    print(f"⏱️  {len(names)} benchmarks on {machine}, baseline from {previous_runs} previous runs")
+
+    if args.processes > 1:
+        results = run_in_processes(names, args.repeat, args.processes)
+    else:
+        results = run_benchmarks(names, args.repeat)
+    regressions = [name for name in names if _report(name, results[name], baseline.get(name), args.threshold)]
+
+    if args.save:
+        history.append({
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'commit': git_commit(),
+            'machine': machine,
+            'results': results,
+            'regressions': [] if args.accept else regressions,
+        })
+        save_history(args.history, history)
+        if regressions and not args.accept:
+            print(f"💾 Run saved to {args.history}, flagged as regressed so it is left out of baselines")
+        else:
+            print(f"💾 Run saved to {args.history}")
+
+    if regressions and not args.accept:
+        print(f"❌ {len(regressions)} benchmarks regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import logging
+import random
+import threading
+from collections import Counter
+
+from scrape_metrics import REGISTRY
+
+# Shared block / CAPTCHA detection and proxy failover for scrapp.py and scrapy+.py
+
+BLOCK_STATUS_CODES = {403, 429, 503}
+
+BLOCK_TITLE_MARKERS = (
+    "access denied",
+    "attention required",
+    "just a moment",
+    "are you a robot",
+    "are you human",
+    "robot check",
+    "captcha",
+    "security check",
+    "request unsuccessful",
+    "too many requests",
+    "pardon our interruption",
+)
+
+# Challenge pages from the big bot-protection vendors; safe to match anywhere
+STRONG_DOM_MARKERS = (
+    "/cdn-cgi/challenge-platform/",
+    "cf-challenge",
+    "cf-browser-verification",
+    "px-captcha",
+    "captcha-delivery.com",
+    "distil_r_captcha",
+    "errors.edgesuite.net",
+    "_incapsula_resource",
+)
+
+# Also found on ordinary pages (login forms etc.), so only trusted on small pages
+WEAK_DOM_MARKERS = (
+    "g-recaptcha",
+    "h-captcha",
+    "hcaptcha.com",
+    "captcha",
+)
+WEAK_MARKER_MAX_PAGE_SIZE = 100_000
+
+class BlockedError(Exception):
+    """Raised when a fetched page is a block, CAPTCHA or rate-limit page"""
+    def __init__(self, reason, url=None):
+        super().__init__(f"Blocked ({reason})" + (f": {url}" if url else ""))
+        self.reason = reason
+        self.url = url
+
+def detect_block(status=None, title="", html=""):
+    """Return why a response looks like a block page, or None if it looks normal"""
+    if status in BLOCK_STATUS_CODES:
+        return f"HTTP {status}"
+
+    title = (title or "").lower()
+    for marker in BLOCK_TITLE_MARKERS:
+        if marker in title:
+            return f"title '{marker}'"
+
+    html = (html or "").lower()
+    for marker in STRONG_DOM_MARKERS:
+        if marker in html:
+            return f"page marker '{marker}'"
+    if len(html) < WEAK_MARKER_MAX_PAGE_SIZE:
+        for marker in WEAK_DOM_MARKERS:
+            if marker in html:
+                return f"page marker '{marker}'"
+    return None
+
+def detect_driver_block(driver):
+    """detect_block for the page currently loaded in a Selenium driver"""
+    try:
+        return detect_block(title=driver.title, html=driver.page_source)
+    except Exception as e:
+        logging.debug(f"Block check failed: {e}")
+        return None
+
+class RunMetrics:
+    """
+    Thread-safe event counters for one scraping run, mirrored into the live
+    metrics registry as scrape_<name>_total{scraper=...}
+    """
+    def __init__(self, scraper=None, registry=REGISTRY):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.scraper = scraper
+        self.registry = registry
+
+    def _labels(self, labels):
+        return {'scraper': self.scraper, **labels} if self.scraper else labels
+
+    def increment(self, name, amount=1, **labels):
+        with self.lock:
+            self.counts[name] += amount
+        if self.registry is not None:
+            self.registry.inc(f"scrape_{name}_total", amount, **self._labels(labels))
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in the scrape_<name>_seconds histogram"""
+        if self.registry is not None:
+            self.registry.observe(f"scrape_{name}_seconds", seconds, **self._labels(labels))
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def log_summary(self):
+        counts = self.snapshot()
+        if counts:
+            summary = ", ".join(f"{name}={count}" for name, count in sorted(counts.items()))
+            logging.info(f"📈 Run metrics: {summary}")
+        return counts
+
+class ProxyPool:
+    """
+    Hands out working proxies and never gives back one that was retired.
+    fetch_proxies / test_proxy are the scraper's own helpers.
+    """
+    def __init__(self, fetch_proxies, test_proxy, initial=None, max_tests=10, metrics=None):
+        self.fetch_proxies = fetch_proxies
+        self.test_proxy = test_proxy
+        self.max_tests = max_tests
+        self.metrics = metrics
+        self.retired = set()
+        self.candidates = []
+        self.proxy = initial
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    def current(self):
+        """The proxy in use, picking a fresh working one if needed (None if none work)"""
+        with self.lock:
+            if self.proxy is None and not self.exhausted:
+                self.proxy = self._find_working_proxy()
+                self.exhausted = self.proxy is None
+            return self.proxy
+
+    def retire(self, proxy):
+        """Stop using a proxy that got blocked or failed"""
+        if not proxy:
+            return
+        with self.lock:
+            self.retired.add(proxy)
+            if self.proxy == proxy:
+                self.proxy = None
+        if self.metrics:
+            self.metrics.increment("proxies_retired")
+        logging.warning(f"🚫 Retired proxy: {proxy}")
+
+    def _find_working_proxy(self):
+        for refill in range(2):
+            if not self.candidates:
+                self.candidates = [p for p in self.fetch_proxies() if p not in self.retired]
+                random.shuffle(self.candidates)
+
+            tested = 0
+            while self.candidates and tested < self.max_tests:
+                proxy = self.candidates.pop()
+                tested += 1
+                if self.test_proxy(proxy):
+                    logging.info(f"✅ Working proxy found: {proxy}")
+                    return proxy
+                self.retired.add(proxy)
+                if self.metrics:
+                    self.metrics.increment("proxy_failures")
+
+        logging.warning("⚠️ No working proxies found, continuing without proxy...")
+        return None
@@ -0,0 +1,314 @@
+import argparse
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from blocking import RunMetrics, detect_block
+from exporters import open_row_writer
+from gitselenium import GITHUB_URL, parse_repo_list_page, parse_repo_page
+from scrape_metrics import add_metrics_arguments, start_metrics
+from session_store import SessionStore
+
+# Multi-account GitHub crawl: a priority queue of (owner, repo, page) jobs
+# worked by a few threads that share one rate budget.
+#
+#   python crawl_scheduler.py torvalds octo-org -o repos.csv --workers 4
+#
+# Owners may be users or organizations. Every owner starts on the user route
+# (/<owner>?tab=repositories); an organization answers there with its
+# overview, so its list is crawled again from /orgs/<org>/repositories.
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAX_RETRIES = 3
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+# Lower runs first: list pages before repositories so the queue fills early
+LIST_PAGE_PRIORITY = 0
+REPO_PRIORITY = 1
+
+class CrawlJob:
+    """One page to fetch: a repository list page (repo is None) or a repository"""
+    def __init__(self, owner, repo=None, page=1, updated_at="", attempts=0, org=False):
+        self.owner = owner
+        self.repo = repo
+        self.page = page
+        self.updated_at = updated_at
+        self.attempts = attempts
+        self.org = org
+
+    @property
+    def url(self):
+        if self.repo:
+            return f"{GITHUB_URL}{self.owner}/{self.repo}"
+        if self.org:
+            return f"{GITHUB_URL}orgs/{self.owner}/repositories?page={self.page}"
+        return f"{GITHUB_URL}{self.owner}?tab=repositories&page={self.page}"
+
+    def priority(self):
+        """Sort key: list pages in page order, then the most recently updated repositories"""
+        if not self.repo:
+            return (LIST_PAGE_PRIORITY, self.page, 0)
+        return (REPO_PRIORITY, 0, -_timestamp(self.updated_at))
+
+    def __repr__(self):
+        return f"CrawlJob({self.owner!r}, {self.repo!r}, page={self.page}, org={self.org})"
+
+def _timestamp(iso_date):
+    try:
+        return datetime.fromisoformat(iso_date.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return 0.0
+
+def _retry_after(value):
+    """Retry-After as seconds (it may be a number or an HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RateBudget:
+    """
+    Request pacing shared by every worker.
+
+    github.com HTML pages carry no X-RateLimit-* headers, so the only signals
+    are rate-limit responses (429, 403 with Retry-After, block pages). Each
+    one doubles the interval and pauses everyone for Retry-After; each clean
+    response shrinks the interval again.
+    """
+    def __init__(self, min_interval=0.25, max_interval=60.0, backoff_factor=2.0, recovery_factor=0.9,
+                 metrics=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.metrics = metrics
+        self.interval = min_interval
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this worker may send its next request"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_slot, self.paused_until)
+            self.next_slot = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def update(self, status, headers, throttled=False):
+        """Feed back one response; returns True if it was a rate-limit response"""
+        headers = headers or {}
+        with self.lock:
+            limited = throttled or status == 429 or (status == 403 and headers.get("Retry-After") is not None)
+            if limited:
+                self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+                pause = _retry_after(headers.get("Retry-After"))
+                self.paused_until = max(self.paused_until, time.monotonic() + (pause if pause is not None else self.interval))
+            else:
+                self.interval = max(self.min_interval, self.interval * self.recovery_factor)
+
+        if limited:
+            if self.metrics:
+                self.metrics.increment("rate_limited")
+            logging.warning(f"🐢 Rate limited (HTTP {status}); interval now {self.interval:.2f}s")
+        return limited
+
+class RetryJob(Exception):
+    """Raised by a job processor to have the job queued again"""
+
+class CrawlScheduler:
+    """Works a priority queue of CrawlJobs with a pool of threads and one RateBudget"""
+    def __init__(self, process, budget=None, workers=4, max_retries=MAX_RETRIES, metrics=None):
+        self.process = process
+        self.budget = budget or RateBudget(metrics=metrics)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.metrics = metrics or RunMetrics()
+        self.heap = []
+        self.seen = set()
+        self.counter = itertools.count()
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def submit(self, job):
+        """Queue a job unless the same page was already queued"""
+        key = job.url
+        with self.condition:
+            if key in self.seen and not job.attempts:
+                return False
+            self.seen.add(key)
+            heapq.heappush(self.heap, (job.priority(), next(self.counter), job))
+            self.condition.notify()
+        return True
+
+    def _next_job(self):
+        with self.condition:
+            while not self.heap and self.in_flight:
+                self.condition.wait()
+            if not self.heap:
+                self.condition.notify_all()
+                return None
+            self.in_flight += 1
+            return heapq.heappop(self.heap)[2]
+
+    def _finish(self, follow_ups):
+        for job in follow_ups:
+            self.submit(job)
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            follow_ups = []
+            try:
+                self.budget.acquire()
+                follow_ups = self.process(job) or []
+                self.metrics.increment("jobs_done")
+            except RetryJob as e:
+                if job.attempts < self.max_retries:
+                    job.attempts += 1
+                    follow_ups = [job]
+                    self.metrics.increment("jobs_retried")
+                else:
+                    logging.error(f"❌ Giving up on {job.url}: {e}")
+                    self.metrics.increment("jobs_failed")
+            except Exception as e:
+                logging.error(f"❌ {job.url}: {e}")
+                self.metrics.increment("jobs_failed")
+            finally:
+                self._finish(follow_ups)
+
+    def run(self):
+        """Work the queue until it is empty and nothing is in flight"""
+        threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, self.workers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.metrics.log_summary()
+
+class GitHubCrawler:
+    """Crawl the repository lists and repository pages of many accounts"""
+    def __init__(self, session=None, budget=None, workers=4, sink=None, metrics=None):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        self.metrics = metrics or RunMetrics()
+        self.scheduler = CrawlScheduler(self.process, budget or RateBudget(metrics=self.metrics), workers,
+                                        metrics=self.metrics)
+        self.sink = sink
+
+    def add_owner(self, owner):
+        self.scheduler.submit(CrawlJob(owner))
+
+    def fetch(self, job):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(job.url, timeout=20)
+        except requests.RequestException as e:
+            raise RetryJob(str(e))
+        self.metrics.observe("fetch", time.perf_counter() - started, mode="http")
+
+        # 429s, abuse 403s and "too many requests" pages all count against the budget
+        title = TITLE_PATTERN.search(response.text[:5000])
+        reason = detect_block(response.status_code, title.group(1) if title else "", response.text)
+        limited = self.scheduler.budget.update(response.status_code, response.headers, throttled=bool(reason))
+        self.metrics.increment("pages_fetched", mode="http")
+        if limited:
+            raise RetryJob(reason or f"HTTP {response.status_code}")
+        if response.status_code >= 500:
+            raise RetryJob(f"HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise ValueError(f"HTTP {response.status_code}")
+        return response.text
+
+    def process(self, job):
+        html = self.fetch(job)
+        if job.repo:
+            row = parse_repo_page(html, job.url)
+            self.metrics.increment("items_extracted")
+            if self.sink:
+                self.sink(row)
+            return []
+
+        parsed = parse_repo_list_page(html)
+        if parsed['organization'] and not job.org:
+            logging.info(f"🏢 {job.owner} is an organization, listing {GITHUB_URL}orgs/{job.owner}/repositories")
+            return [CrawlJob(job.owner, page=job.page, org=True)]
+        if job.page == 1 and not parsed['entries'] and not parsed['has_next']:
+            logging.warning(f"⚠️ No repositories listed for {job.owner}")
+        follow_ups = [CrawlJob(job.owner, entry['full_name'].split('/', 1)[1], updated_at=entry['updated_at'])
+                      for entry in parsed['entries']]
+        # Page 1 knows how many pages there are; otherwise keep following next links
+        if job.page == 1 and parsed['total_pages'] > 1:
+            follow_ups += [CrawlJob(job.owner, page=page, org=job.org) for page in range(2, parsed['total_pages'] + 1)]
+        elif parsed['has_next'] and not parsed['total_pages']:
+            follow_ups.append(CrawlJob(job.owner, page=job.page + 1, org=job.org))
+        logging.info(f"📄 {job.owner} page {job.page}: {len(parsed['entries'])} repositories")
+        return follow_ups
+
+    def run(self):
+        return self.scheduler.run()
+
+def session_with_saved_cookies():
+    """requests session carrying gitselenium's saved login, if there is one"""
+    session = requests.Session()
+    saved = SessionStore().load()
+    if saved:
+        for cookie in saved['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        logging.info(f"🍪 Using saved session for {saved['username']}")
+    return session
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Crawl the repositories of many GitHub accounts")
+    parser.add_argument("owners", nargs="+", help="GitHub users and organizations to crawl")
+    parser.add_argument("-o", "--output", default="github_crawl.csv", help="output file (.csv, .jsonl, .jsonl.gz, .parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--min-interval", type=float, default=0.25, help="fastest pace between requests, in seconds")
+    parser.add_argument("--saved-session", action="store_true", help="send gitselenium's saved login cookies")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    session = session_with_saved_cookies() if args.saved_session else None
+    writer = open_row_writer(args.output)
+    writer_lock = threading.Lock()
+
+    def sink(row):
+        with writer_lock:
+            writer.write(row)
+
+    metrics = RunMetrics("github_crawl")
+    exporter = start_metrics(args.metrics_port, args.metrics_file, args.metrics_interval)
+    crawler = GitHubCrawler(session, RateBudget(min_interval=args.min_interval, metrics=metrics), args.workers,
+                            sink, metrics)
+    for owner in args.owners:
+        crawler.add_owner(owner)
+    try:
+        crawler.run()
+    finally:
+        writer.close()
+        if exporter:
+            exporter.close()
+    logging.info(f"💾 {writer.stats.rows} repositories written to {args.output}")
+
+if __name__ == "__main__":
+    main()
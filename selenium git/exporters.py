@@ -0,0 +1,259 @@
+import csv
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+
+# Streaming row writers shared by the scrapers. The format follows the file
+# extension: .csv, .jsonl, .jsonl.gz or .parquet
+
+MISSING_VALUES = {'', 'N/A'}
+PARQUET_ROW_GROUP_SIZE = 5000
+CLASSIFY_BATCH_SIZE = 1000
+
+class ColumnStats:
+    """
+    Per-column counts kept up to date as rows are written. classifier maps a
+    list of values to their types; values are handed to it in batches of
+    batch_size per column.
+    """
+    def __init__(self, classifier=None, preview_rows=3, batch_size=CLASSIFY_BATCH_SIZE):
+        self.classifier = classifier
+        self.preview_rows = preview_rows
+        self.batch_size = batch_size
+        self.rows = 0
+        self.columns = []
+        self.missing = Counter()
+        self.types = {}
+        self.pending = {}
+        self.preview = []
+
+    def add(self, row):
+        self.rows += 1
+        if len(self.preview) < self.preview_rows:
+            self.preview.append(dict(row))
+
+        for column, value in row.items():
+            if column not in self.types:
+                self.columns.append(column)
+                self.types[column] = Counter()
+                self.pending[column] = []
+                # Rows written before this column first appeared did not have it
+                self.missing[column] += self.rows - 1
+            if value is None or (isinstance(value, str) and value in MISSING_VALUES):
+                self.missing[column] += 1
+            elif self.classifier and isinstance(value, str):
+                self.pending[column].append(value)
+                if len(self.pending[column]) >= self.batch_size:
+                    self._classify(column)
+
+        for column in self.columns:
+            if column not in row:
+                self.missing[column] += 1
+
+    def _classify(self, column):
+        if self.pending[column]:
+            self.types[column].update(self.classifier(self.pending[column]))
+            self.pending[column] = []
+
+    def total_missing(self):
+        return sum(self.missing.values())
+
+    def column_types(self):
+        """Most common classifier result per column ('empty' if nothing to classify)"""
+        for column in self.columns:
+            self._classify(column)
+        return {column: (counts.most_common(1)[0][0] if counts else 'empty')
+                for column, counts in self.types.items()}
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'columns': list(self.columns),
+            'missing': {column: self.missing[column] for column in self.columns},
+            'types': self.column_types() if self.classifier else {},
+        }
+
+class RowWriter:
+    """Base class: write rows one at a time, keep ColumnStats, close at the end"""
+    supports_append = False
+
+    def __init__(self, filename, fieldnames=None, classifier=None):
+        self.filename = filename
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.stats = ColumnStats(classifier)
+
+    def write(self, row):
+        self.stats.add(row)
+        self._write(row)
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class CsvRowWriter(RowWriter):
+    supports_append = True
+
+    def __init__(self, filename, fieldnames=None, classifier=None, append=False):
+        super().__init__(filename, fieldnames, classifier)
+        # Appending to a file that already has rows keeps its header
+        self.has_header = False
+        if append and os.path.exists(filename) and os.path.getsize(filename):
+            with open(filename, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+            if header:
+                self.fieldnames = header
+                self.has_header = True
+        self.file = open(filename, 'a' if append else 'w', newline='', encoding='utf-8')
+        self.writer = None
+        self.warned_extra = False
+
+    def _write(self, row):
+        if self.writer is None:
+            self.fieldnames = self.fieldnames or list(row.keys())
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
+            if not self.has_header:
+                self.writer.writeheader()
+        if not self.warned_extra and set(row) - set(self.fieldnames):
+            logging.warning(f"⚠️ {self.filename}: columns {sorted(set(row) - set(self.fieldnames))} "
+                            f"not in the CSV header are dropped")
+            self.warned_extra = True
+        self.writer.writerow(row)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            if self.writer is None and self.fieldnames and not self.has_header:
+                csv.DictWriter(self.file, fieldnames=self.fieldnames).writeheader()
+            self.file.close()
+
+class JsonlRowWriter(RowWriter):
+    supports_append = True
+
+    def __init__(self, filename, fieldnames=None, classifier=None, append=False):
+        super().__init__(filename, fieldnames, classifier)
+        mode = 'a' if append else 'w'
+        if filename.endswith('.gz'):
+            # Appending adds a gzip member; gzip readers handle multi-member files
+            self.file = gzip.open(filename, mode + 't', encoding='utf-8')
+        else:
+            self.file = open(filename, mode, encoding='utf-8')
+
+    def _write(self, row):
+        if self.fieldnames:
+            row = {field: row.get(field) for field in self.fieldnames}
+        self.file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class ParquetRowWriter(RowWriter):
+    """Buffers rows and writes them out one Parquet row group at a time"""
+    def __init__(self, filename, fieldnames=None, classifier=None, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        super().__init__(filename, fieldnames, classifier)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.pq = pq
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.writer = None
+        self.schema = None
+        self.warned_extra = False
+
+    def _write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.row_group_size:
+            self._write_row_group()
+
+    def flush(self):
+        # A row group per flush would leave many tiny groups; rows wait for row_group_size or close()
+        pass
+
+    def _write_row_group(self):
+        if not self.buffer:
+            return
+        self.fieldnames = self.fieldnames or list(self.buffer[0].keys())
+        if not self.warned_extra:
+            extra = set().union(*self.buffer) - set(self.fieldnames)
+            if extra:
+                logging.warning(f"⚠️ {self.filename}: columns {sorted(extra)} "
+                                f"not in the Parquet schema are dropped")
+                self.warned_extra = True
+        if self.schema is None:
+            table = self.pa.Table.from_pylist(
+                [{field: row.get(field) for field in self.fieldnames} for row in self.buffer])
+            # Columns that were empty in the first group default to strings
+            self.schema = self.pa.schema([
+                field.with_type(self.pa.string()) if self.pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            table = table.cast(self.schema)
+            self.writer = self.pq.ParquetWriter(self.filename, self.schema)
+        else:
+            table = self.pa.Table.from_pylist(self.buffer, schema=self.schema)
+        self.writer.write_table(table)
+        self.buffer = []
+
+    def close(self):
+        self._write_row_group()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class ListRowWriter(RowWriter):
+    """Keeps rows in memory, for callers that want a plain list back"""
+    def __init__(self, fieldnames=None, classifier=None):
+        super().__init__(None, fieldnames, classifier)
+        self.rows = []
+
+    def _write(self, row):
+        self.rows.append(row)
+
+WRITERS = {
+    '.csv': CsvRowWriter,
+    '.jsonl': JsonlRowWriter,
+    '.jsonl.gz': JsonlRowWriter,
+    '.parquet': ParquetRowWriter,
+}
+
+def open_row_writer(filename, fieldnames=None, classifier=None, append=False):
+    """Open the streaming writer matching the filename's extension (append: CSV and JSONL only)"""
+    lowered = filename.lower()
+    for extension, writer_class in sorted(WRITERS.items(), key=lambda item: -len(item[0])):
+        if lowered.endswith(extension):
+            if append:
+                if not writer_class.supports_append:
+                    raise ValueError(f"Cannot append to {filename}: use .csv or .jsonl")
+                return writer_class(filename, fieldnames=fieldnames, classifier=classifier, append=True)
+            return writer_class(filename, fieldnames=fieldnames, classifier=classifier)
+    raise ValueError(f"Unsupported export format for {filename} (use {', '.join(WRITERS)})")
+
+def is_supported_export(filename):
+    return any(filename.lower().endswith(extension) for extension in WRITERS)
@@ -0,0 +1,271 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from urllib.parse import urldefrag
+
+import requests
+
+# Record/replay for page fetches. In record mode every page a scraper reads
+# (URL, status, headers, final URL and the HTML it parsed) is written to a
+# local store; in replay mode the same pages are served from the store with
+# no browser or network, so selector and parser changes can be re-run
+# against a fixed set of pages.
+#
+# Store layout: bodies are gzipped and named by the SHA-256 of their content,
+# so identical pages are kept once; each URL has a small JSON record
+# pointing at its body.
+#
+#   <root>/objects/ab/ab12....html.gz
+#   <root>/urls/<sha256 of url>.json
+#
+#   python fetch_store.py list recordings/
+#   python fetch_store.py show recordings/ https://github.com/octo-org/hello-scraper > page.html
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+
+class ReplayMiss(LookupError):
+    """A replay asked for a URL that was never recorded"""
+    def __init__(self, url):
+        super().__init__(f"{url} is not in the recording")
+        self.url = url
+
+class FetchRecord:
+    """One fetched page as a scraper saw it"""
+    def __init__(self, url, html, status=200, headers=None, final_url=None, fetched_at=None, digest=None):
+        self.url = url
+        self.html = html
+        self.status = status
+        self.headers = dict(headers or {})
+        self.final_url = final_url or url
+        self.fetched_at = fetched_at or datetime.now().isoformat(timespec="seconds")
+        self.digest = digest
+
+    @property
+    def content_type(self):
+        for name, value in self.headers.items():
+            if name.lower() == "content-type":
+                return value
+        return "text/html"
+
+    def __repr__(self):
+        return f"FetchRecord({self.url!r}, status={self.status})"
+
+def _url_key(url):
+    return urldefrag(url)[0]
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class FetchStore:
+    """Content-addressed store of FetchRecords keyed by URL (fragments ignored)"""
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "urls"), exist_ok=True)
+
+    def _record_path(self, url):
+        name = hashlib.sha256(_url_key(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "urls", f"{name}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def save(self, url, html, status=200, headers=None, final_url=None):
+        """Store one page; returns its FetchRecord"""
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        record = FetchRecord(_url_key(url), html, status, headers, final_url, digest=digest)
+        object_path = self._object_path(digest)
+        with self.lock:
+            if not os.path.exists(object_path):
+                # mtime=0 keeps identical pages byte-identical on disk
+                _write_atomic(object_path, gzip.compress(body, mtime=0))
+            meta = {
+                'url': record.url,
+                'final_url': record.final_url,
+                'status': record.status,
+                'headers': record.headers,
+                'fetched_at': record.fetched_at,
+                'digest': digest,
+            }
+            _write_atomic(self._record_path(url), json.dumps(meta, indent=2).encode("utf-8"))
+        return record
+
+    def _read(self, record_path):
+        with open(record_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with gzip.open(self._object_path(meta['digest']), "rb") as f:
+            html = f.read().decode("utf-8")
+        return FetchRecord(meta['url'], html, meta['status'], meta['headers'], meta['final_url'],
+                           meta['fetched_at'], meta['digest'])
+
+    def get(self, url):
+        """The recorded page for url, or None"""
+        path = self._record_path(url)
+        if not os.path.exists(path):
+            return None
+        return self._read(path)
+
+    def __contains__(self, url):
+        return os.path.exists(self._record_path(url))
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(os.path.join(self.root, "urls")) if name.endswith(".json"))
+
+    def records(self):
+        """Every recorded page, in URL order"""
+        urls_dir = os.path.join(self.root, "urls")
+        records = [self._read(os.path.join(urls_dir, name)) for name in os.listdir(urls_dir) if name.endswith(".json")]
+        return sorted(records, key=lambda record: record.url)
+
+    def urls(self):
+        return [record.url for record in self.records()]
+
+def _decoded_text(response):
+    # requests assumes ISO-8859-1 for text/html without a charset; sniff instead
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = response.apparent_encoding
+    return response.text
+
+class Fetcher:
+    """
+    Where scrapers get their pages from.
+
+    live: fetch over HTTP / read the browser, nothing is kept.
+    record: same as live, and every page is saved to the store.
+    replay: pages come from the store only; a missing URL raises ReplayMiss.
+
+    With an archive (e.g. a WarcArchive) every page fetched live is also
+    appended to it.
+    """
+    def __init__(self, mode=LIVE, store=None, archive=None):
+        self.configure(mode, store, archive)
+
+    def configure(self, mode=LIVE, store=None, archive=None):
+        if mode not in (LIVE, RECORD, REPLAY):
+            raise ValueError(f"Unknown fetch mode {mode!r}")
+        if mode != LIVE and store is None:
+            raise ValueError(f"{mode} mode needs a FetchStore")
+        self.mode = mode
+        self.store = store
+        self.archive = archive
+        return self
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def _replay(self, url):
+        record = self.store.get(url)
+        if record is None:
+            raise ReplayMiss(url)
+        return record
+
+    def fetch(self, url, session=None, **kwargs):
+        """GET url over HTTP (kwargs go to session.get) and return a FetchRecord"""
+        if self.replaying:
+            return self._replay(url)
+        response = (session or requests).get(url, **kwargs)
+        return self._keep(url, _decoded_text(response), response.status_code, response.headers, response.url)
+
+    def _keep(self, url, html, status=200, headers=None, final_url=None):
+        """Save a live page wherever this fetcher keeps pages"""
+        if self.archive is not None:
+            self.archive.save(url, html, status, headers, final_url)
+        if self.mode == RECORD:
+            return self.store.save(url, html, status, headers, final_url)
+        return FetchRecord(url, html, status, headers, final_url)
+
+    def page_source(self, url, driver=None):
+        """
+        HTML of url as rendered in the browser, which must already be showing
+        it; in replay mode it comes from the store and driver is not touched.
+        """
+        if self.replaying:
+            return self._replay(url).html
+        html = driver.page_source
+        if self.keeping:
+            self._keep(url, html, final_url=driver.current_url)
+        return html
+
+    def source(self, transport):
+        """Where pages come from, for metric labels: transport ('http', 'browser') or 'replay'"""
+        return REPLAY if self.replaying else transport
+
+    @property
+    def keeping(self):
+        """True when page_source() has something to save"""
+        return self.mode == RECORD or self.archive is not None
+
+def open_recording(path):
+    """FetchStore or WARC archive at path, for replaying"""
+    if os.path.isdir(os.path.join(path, "urls")):
+        return FetchStore(path)
+    if glob.glob(os.path.join(path, "*.warc.gz")):
+        from warc_archive import WarcArchive
+        return WarcArchive(path)
+    raise ValueError(f"{path} is not a recording")
+
+def fetcher_from_args(record=None, replay=None, archive=None):
+    """
+    Fetcher for --record DIR / --replay DIR / --archive DIR style options
+    (live when none is given). Replay reads a recording or a WARC archive.
+    """
+    if record and replay:
+        raise ValueError("--record and --replay cannot be used together")
+    warc = None
+    if archive:
+        if replay:
+            raise ValueError("--archive and --replay cannot be used together")
+        from warc_archive import WarcArchive
+        warc = WarcArchive(archive)
+        logging.info(f"🗄️ Archiving fetched pages as WARC in {archive}")
+    if record:
+        logging.info(f"⏺️ Recording fetched pages to {record}")
+        return Fetcher(RECORD, FetchStore(record), warc)
+    if replay:
+        logging.info(f"⏯️ Replaying pages from {replay}")
+        return Fetcher(REPLAY, open_recording(replay))
+    return Fetcher(archive=warc)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a recording made with --record")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="list recorded URLs")
+    list_parser.add_argument("store")
+    show_parser = subparsers.add_parser("show", help="print the recorded HTML of a URL (e.g. to make a fixture)")
+    show_parser.add_argument("store")
+    show_parser.add_argument("url")
+    args = parser.parse_args(argv)
+
+    store = FetchStore(args.store)
+    if args.command == "list":
+        for record in store.records():
+            print(f"{record.status}  {record.fetched_at}  {record.digest[:12]}  {record.url}")
+        return 0
+
+    record = store.get(args.url)
+    if record is None:
+        print(f"❌ {args.url} is not in {args.store}", file=sys.stderr)
+        return 1
+    sys.stdout.write(record.html)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
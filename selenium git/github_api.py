@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import requests
+
+# GitHub GraphQL data source for gitselenium.py: every repository of the
+# signed-in account in pages of 100, mapped to the export_to_csv schema.
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+DEFAULT_CACHE_FILE = "github_api_cache.json"
+PAGE_SIZE = 100
+
+REPOSITORIES_QUERY = """
+query($first: Int!, $after: String) {
+  viewer {
+    login
+    repositories(first: $first, after: $after, ownerAffiliations: OWNER,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        owner { login }
+        description
+        url
+        isFork
+        isPrivate
+        isArchived
+        createdAt
+        updatedAt
+        pushedAt
+        diskUsage
+        stargazerCount
+        forkCount
+        watchers { totalCount }
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        primaryLanguage { name }
+        languages(first: 20, orderBy: {field: SIZE, direction: DESC}) { nodes { name } }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        licenseInfo { name }
+        refs(refPrefix: "refs/heads/") { totalCount }
+        releases { totalCount }
+        defaultBranchRef { target { ... on Commit { history { totalCount } } } }
+        object(expression: "HEAD:") { ... on Tree { entries { name } } }
+      }
+    }
+  }
+}
+"""
+
+class GitHubApiError(Exception):
+    """HTTP or GraphQL error returned by the API"""
+
+def format_disk_usage(kilobytes: Optional[int]) -> str:
+    """diskUsage is in KB; show it the way the repository page does"""
+    if kilobytes is None:
+        return ""
+    if kilobytes >= 1024 * 1024:
+        return f"{kilobytes / (1024 * 1024):.1f} GB"
+    if kilobytes >= 1024:
+        return f"{kilobytes / 1024:.1f} MB"
+    return f"{kilobytes} KB"
+
+def _total(node: Dict, key: str) -> int:
+    return ((node.get(key) or {}).get('totalCount')) or 0
+
+def map_repository(node: Dict) -> Dict:
+    """One GraphQL repository node -> one export_to_csv row"""
+    entries = ((node.get('object') or {}).get('entries')) or []
+    history = (((node.get('defaultBranchRef') or {}).get('target') or {}).get('history')) or {}
+    return {
+        'url': node['url'],
+        'repository_name': node['name'],
+        'owner': node['owner']['login'],
+        'full_name': node['nameWithOwner'],
+        'description': node.get('description') or "",
+        'is_fork': bool(node.get('isFork')),
+        'is_private': bool(node.get('isPrivate')),
+        'is_archived': bool(node.get('isArchived')),
+        'stars': node.get('stargazerCount') or 0,
+        'forks': node.get('forkCount') or 0,
+        'watchers': _total(node, 'watchers'),
+        'open_issues': _total(node, 'issues'),
+        'open_pull_requests': _total(node, 'pullRequests'),
+        'primary_language': (node.get('primaryLanguage') or {}).get('name') or "",
+        'languages': ", ".join(language['name'] for language in (node.get('languages') or {}).get('nodes') or []),
+        'topics': ", ".join(item['topic']['name'] for item in (node.get('repositoryTopics') or {}).get('nodes') or []),
+        'license': (node.get('licenseInfo') or {}).get('name') or "",
+        'created_at': node.get('createdAt') or "",
+        'updated_at': node.get('pushedAt') or node.get('updatedAt') or "",
+        'has_readme': any(entry['name'].lower().startswith('readme') for entry in entries),
+        'files_count': len(entries),
+        'commits_count': history.get('totalCount') or 0,
+        'branches_count': _total(node, 'refs'),
+        'releases_count': _total(node, 'releases'),
+        'size': format_disk_usage(node.get('diskUsage')),
+    }
+
+class ResponseCache:
+    """Request -> (ETag, response data), kept in a JSON file between runs"""
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def key(url: str, payload: Dict) -> str:
+        return hashlib.sha256((url + json.dumps(payload, sort_keys=True)).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, etag: str, data: Dict):
+        with self.lock:
+            self.entries[key] = {'etag': etag, 'data': data}
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+
+class GitHubApiSource:
+    """
+    Repository data from the GraphQL API instead of rendered pages.
+    Responses carrying an ETag are cached and revalidated with If-None-Match.
+    """
+    def __init__(self, token: str = None, endpoint: str = None, cache_file: Optional[str] = DEFAULT_CACHE_FILE,
+                 page_size: int = PAGE_SIZE, timeout: float = 30):
+        self.token = token or os.environ.get("GITHUB_TOKEN")
+        if not self.token:
+            raise GitHubApiError("The API data source needs a token (set GITHUB_TOKEN)")
+        self.endpoint = endpoint or os.environ.get("GITHUB_GRAPHQL_URL") or GITHUB_GRAPHQL_URL
+        self.page_size = page_size
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_file)
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f"bearer {self.token}",
+            'Accept': 'application/json',
+            'User-Agent': 'gitselenium',
+        })
+        self.requests_made = 0
+        self.cache_hits = 0
+        self.login = None
+
+    def query(self, query: str, variables: Dict) -> Dict:
+        """Run one GraphQL query, revalidating a cached response when possible"""
+        payload = {'query': query, 'variables': variables}
+        key = ResponseCache.key(self.endpoint, payload)
+        cached = self.cache.get(key)
+        headers = {'If-None-Match': cached['etag']} if cached else {}
+
+        response = self.session.post(self.endpoint, json=payload, headers=headers, timeout=self.timeout)
+        self.requests_made += 1
+        if response.status_code == 304 and cached:
+            self.cache_hits += 1
+            return cached['data']
+        if response.status_code != 200:
+            raise GitHubApiError(f"HTTP {response.status_code} from {self.endpoint}: {response.text[:200]}")
+
+        body = response.json()
+        if body.get('errors'):
+            raise GitHubApiError("; ".join(error.get('message', str(error)) for error in body['errors']))
+        if response.headers.get('ETag'):
+            self.cache.put(key, response.headers['ETag'], body['data'])
+        return body['data']
+
+    def fetch_repositories(self) -> List[Dict]:
+        """Every repository owned by the token's user, as export rows"""
+        repositories = []
+        cursor = None
+        try:
+            while True:
+                data = self.query(REPOSITORIES_QUERY, {'first': self.page_size, 'after': cursor})
+                viewer = data['viewer']
+                self.login = viewer['login']
+                connection = viewer['repositories']
+                repositories.extend(map_repository(node) for node in connection['nodes'])
+                print(f"📡 {len(repositories)}/{connection['totalCount']} repositories from the API")
+                if not connection['pageInfo']['hasNextPage']:
+                    break
+                cursor = connection['pageInfo']['endCursor']
+        finally:
+            self.cache.save()
+        print(f"📡 {self.requests_made} API requests, {self.cache_hits} answered from cache")
+        return repositories
@@ -1,4 +1,6 @@
+import argparse
 import csv
+import json
 import time
 import re
 from datetime import datetime
@@ -10,13 +12,403 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 import os
 import sys
+import queue
+import math
+import requests
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+import lxml.html
+from selector_registry import SelectorRegistry
+from session_store import SessionStore
+from repo_state import DEFAULT_STATE_FILE, SOURCE_API, SOURCE_BROWSER, RepoStateDB
+from github_api import GitHubApiError, GitHubApiSource
+from repo_analytics import summarize, to_frame
+from scrape_metrics import add_metrics_arguments, start_metrics
+from scrape_profile import add_profile_arguments, profiling_from_args
+from blocking import RunMetrics
+from fetch_store import Fetcher, ReplayMiss, fetcher_from_args
+from scrape_events import (EventBus, StreamingExport, REPO_DISCOVERED, REPO_FAILED, REPO_FETCHED,
+                           SCRAPE_FINISHED)
+
+def _stat_selectors(stat_type: str, alt_name: str) -> List[str]:
+    """Fallback selectors for a star/fork/watcher counter"""
+    return [
+        f"a[href*='/{stat_type}'] strong",
+        f"a[href*='/{stat_type}'] .Counter",
+        f"#{stat_type}-repo-tab-count",
+        f"[data-tab-item='{stat_type}'] strong",
+        f"[data-tab-item='{stat_type}'] .Counter",
+        f"a[href*='/{alt_name}'] strong",
+        f"a[href*='/{alt_name}'] .Counter",
+    ]
+
+# Fallback selectors per field, tried against one page_source snapshot.
+# The registry validates them once and tries the one that hits most often first.
+REPO_PAGE_SELECTORS = {
+    'description': [
+        "[data-pjax='#repo-content-pjax-container'] p",
+        ".f4.my-3",
+        ".repository-description p",
+    ],
+    # Not .octicon-repo-forked or [title*='fork']: the Fork button and the fork
+    # counter carry them on every repository page, forks or not
+    'is_fork': [
+        "span:contains('forked from')",
+        ".fork-flag",
+    ],
+    'is_private': [
+        "#repository-container-header .Label:contains('Private')",
+        ".Label:contains('Private')",
+    ],
+    'is_archived': [
+        ".flash-warn",
+        ".archived",
+    ],
+    'stars': _stat_selectors('stargazers', 'star'),
+    'forks': _stat_selectors('forks', 'fork'),
+    'watchers': _stat_selectors('watchers', 'watch'),
+    'open_issues': [
+        "a[href*='/issues'] .Counter",
+    ],
+    'open_pull_requests': [
+        "a[href*='/pulls'] .Counter",
+    ],
+    'primary_language': [
+        "[itemprop='programmingLanguage']",
+        ".BorderGrid-cell li .color-fg-default.text-bold",
+    ],
+    'languages': [
+        ".BorderGrid-row .BorderGrid-cell .Progress-item",
+    ],
+    'topics': [
+        ".topic-tag, .topic-tag-link",
+    ],
+    'license': [
+        ".octicon-law + span",
+        "a[href*='/blob/'] .octicon-law + span",
+        ".license .Link--primary",
+    ],
+    'license_icon': [
+        ".octicon-law",
+    ],
+    'dates': [
+        "relative-time",
+    ],
+    'has_readme': [
+        "[data-testid='readme']",
+        "#readme",
+        ".Box-header h2:contains('README')",
+    ],
+    'files': [
+        "[role='rowgroup'] [role='row'], .js-navigation-item",
+    ],
+    'commits_count': [
+        "a[href*='/commits'] strong",
+        ".octicon-history ~ strong",
+        "[data-tab-item='commits'] strong",
+    ],
+    'branches_count': [
+        "a[href*='/branches'] strong",
+    ],
+    'releases_count': [
+        "a[href*='/releases'] strong",
+        "a[href*='/releases'] .Counter",
+    ],
+    'size': [
+        ".file-navigation .text-small",
+        ".Box-header .text-small",
+    ],
+}
+
+# Repository list pages (https://github.com/<user>?tab=repositories)
+REPO_LIST_SELECTORS = {
+    'repo_items': [
+        "li[itemprop='owns']",
+        ".Box-row",
+    ],
+    'repo_link': [
+        "h3 a",
+        "a[itemprop~='codeRepository']",
+        ".f4 a",
+    ],
+    'repo_updated': [
+        "relative-time",
+    ],
+    'next_page': [
+        "a[rel='next']:not([disabled])",
+    ],
+    'repo_count': [
+        "a[data-tab-item='repositories'] .Counter",
+        "a[href*='tab=repositories'] .Counter",
+    ],
+    'total_pages': [
+        "[data-total-pages]",
+    ],
+    # Organization lists (/orgs/<org>/repositories) are rendered client-side
+    # from this JSON instead of the <li> items above
+    'embedded_data': [
+        "script[data-target='react-app.embeddedData']",
+    ],
+    'org_marker': [
+        "meta[name='hovercard-subject-tag'][content^='organization:']",
+    ],
+}
+
+SIZE_UNITS = ("MB", "KB", "GB", "bytes")
+
+# Column order of export_to_csv
+EXPORT_FIELDS = [
+    'repository_name', 'full_name', 'owner', 'description', 'url',
+    'primary_language', 'languages', 'stars', 'forks', 'watchers',
+    'commits_count', 'branches_count', 'releases_count', 'files_count',
+    'is_fork', 'is_private', 'is_archived', 'has_readme',
+    'created_at', 'updated_at', 'size', 'topics', 'license',
+    'open_issues', 'open_pull_requests'
+]
+# The repository list already has these; asking only for them skips every detail page
+LISTING_FIELDS = {'url', 'repository_name', 'owner', 'full_name', 'updated_at'}
+# These walk large parts of the page, so leave them out of narrow queries
+EXPENSIVE_FIELDS = {'languages', 'files_count', 'size'}
+GITHUB_URL = "https://github.com/"
+LISTING_WORKERS = 8
+RECORDED_LIST_PATTERN = re.compile(re.escape(GITHUB_URL) + r"([^/?]+)\?tab=repositories&page=1$")
+
+REPO_PAGE_REGISTRY = SelectorRegistry(REPO_PAGE_SELECTORS)
+REPO_LIST_REGISTRY = SelectorRegistry(REPO_LIST_SELECTORS)
+
+def _first(tree, field: str, predicate=None):
+    return REPO_PAGE_REGISTRY.first(tree, field, predicate)
+
+def _all(tree, field: str) -> list:
+    return REPO_PAGE_REGISTRY.all(tree, field)
+
+def _text(element) -> str:
+    return " ".join(element.text_content().split()) if element is not None else ""
+
+def parse_number(text: str) -> int:
+    """Parse number from text like '1.2k' or '1,234'"""
+    try:
+        if not text:
+            return 0
+        
+        # Remove commas
+        text = text.replace(',', '').strip()
+        
+        # Handle k, m suffixes
+        if text.lower().endswith('k'):
+            return int(float(text[:-1]) * 1000)
+        elif text.lower().endswith('m'):
+            return int(float(text[:-1]) * 1000000)
+        else:
+            # Extract numbers only
+            numbers = re.findall(r'\d+\.?\d*', text)
+            if numbers:
+                return int(float(numbers[0]))
+            return 0
+    except:
+        return 0
+
+def _count(tree, field: str) -> int:
+    return parse_number(_text(_first(tree, field)))
+
+def _languages(tree) -> str:
+    languages = []
+    for element in _all(tree, 'languages'):
+        label = element.get('aria-label')
+        if label:
+            # "Jupyter Notebook 80.5" -> "Jupyter Notebook"
+            parts = label.split()
+            name = " ".join(parts[:-1]) if len(parts) > 1 and re.match(r'^[\d.]+%?$', parts[-1]) else label
+            if name not in languages:
+                languages.append(name)
+    return ", ".join(languages)
+
+def _license(tree) -> str:
+    license_text = _text(_first(tree, 'license'))
+    if not license_text:
+        # Current layout: the law icon sits inside the link next to the license name
+        icon = _first(tree, 'license_icon')
+        if icon is not None and icon.getparent() is not None:
+            license_text = _text(icon.getparent())
+    return license_text
+
+def _size(tree) -> str:
+    return _text(_first(tree, 'size', lambda element: any(unit in _text(element) for unit in SIZE_UNITS)))
+
+def _embedded_repo_list(tree) -> Dict:
+    """The repository list payload of a React-rendered list page, or None"""
+    for script in REPO_LIST_REGISTRY.all(tree, 'embedded_data'):
+        try:
+            payload = json.loads(script.text or "").get('payload') or {}
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(payload.get('repositories'), list):
+            return payload
+    return None
+
+def parse_repo_list_page(html: str) -> Dict:
+    """
+    Repositories, total repository count and page count from one repository
+    list page: a user's ?tab=repositories or an organization's /orgs/<org>/repositories
+    """
+    tree = lxml.html.fromstring(html)
+    # True on any page of an organization, even one that lists no repositories
+    organization = REPO_LIST_REGISTRY.first(tree, 'org_marker') is not None
+    items = REPO_LIST_REGISTRY.all(tree, 'repo_items')
+    if not items:
+        payload = _embedded_repo_list(tree)
+        if payload is not None:
+            entries = []
+            for repository in payload['repositories']:
+                full_name = f"{repository['owner']}/{repository['name']}"
+                entries.append({
+                    'url': f"{GITHUB_URL}{full_name}",
+                    'full_name': full_name,
+                    'updated_at': (repository.get('lastUpdated') or {}).get('timestamp') or "",
+                })
+            page_count = payload.get('pageCount') or 0
+            return {
+                'entries': entries,
+                'total_count': payload.get('repositoryCount') or len(entries),
+                'total_pages': page_count,
+                'has_next': (payload.get('currentPage') or 1) < page_count,
+                'organization': organization,
+            }
+    
+    entries = {}
+    for item in items:
+        link = REPO_LIST_REGISTRY.first(item, 'repo_link')
+        href = link.get('href') if link is not None else None
+        if not href:
+            continue
+        repo_url = urljoin(GITHUB_URL, href)
+        updated = REPO_LIST_REGISTRY.first(item, 'repo_updated')
+        entries.setdefault(repo_url, {
+            'url': repo_url,
+            'full_name': full_name_from_url(repo_url),
+            'updated_at': (updated.get('datetime') if updated is not None else "") or "",
+        })
+    
+    # The counter text is abbreviated ("1.2k"), its title is exact
+    counter = REPO_LIST_REGISTRY.first(tree, 'repo_count')
+    total_count = parse_number(counter.get('title') or _text(counter)) if counter is not None else 0
+    pagination = REPO_LIST_REGISTRY.first(tree, 'total_pages')
+    
+    return {
+        'entries': list(entries.values()),
+        'total_count': total_count,
+        'total_pages': parse_number(pagination.get('data-total-pages')) if pagination is not None else 0,
+        'has_next': REPO_LIST_REGISTRY.first(tree, 'next_page') is not None,
+        'organization': organization,
+    }
+
+def full_name_from_url(repo_url: str) -> str:
+    """https://github.com/owner/repo -> owner/repo"""
+    owner, repository_name = repo_url.rstrip('/').split('/')[-2:]
+    return f"{owner}/{repository_name}"
+
+def recorded_login(store) -> str:
+    """Username whose repository list is in a recording ('' if there is none)"""
+    for url in store.urls():
+        match = RECORDED_LIST_PATTERN.match(url)
+        if match:
+            return match.group(1)
+    return ""
+
+def current_login(driver) -> str:
+    """Signed-in username from GitHub's user-login meta tag ('' when signed out)"""
+    for meta in driver.find_elements(By.CSS_SELECTOR, "meta[name='user-login']"):
+        return meta.get_attribute('content') or ""
+    return ""
+
+class RepoPage:
+    """One repository page snapshot; the tree and shared lookups are built on first use"""
+    def __init__(self, html: str, repo_url: str):
+        self.html = html
+        self.url = repo_url
+        self.full_name = full_name_from_url(repo_url)
+    
+    @cached_property
+    def tree(self):
+        return lxml.html.fromstring(self.html)
+    
+    @cached_property
+    def dates(self) -> List[str]:
+        return [element.get('datetime') or "" for element in _all(self.tree, 'dates')]
+
+def _topics(tree) -> str:
+    return ", ".join(topic for topic in (_text(element) for element in _all(tree, 'topics')) if topic)
+
+def _files_count(tree) -> int:
+    # Subtract 1 for header row if present
+    return max(0, len(_all(tree, 'files')) - 1)
+
+# How each export field is computed; a field's extractor only runs when it is asked for
+REPO_FIELD_EXTRACTORS = {
+    'url': lambda page: page.url,
+    'repository_name': lambda page: page.full_name.split('/')[1],
+    'owner': lambda page: page.full_name.split('/')[0],
+    'full_name': lambda page: page.full_name,
+    'description': lambda page: _text(_first(page.tree, 'description')),
+    'is_fork': lambda page: _first(page.tree, 'is_fork') is not None,
+    'is_private': lambda page: _first(page.tree, 'is_private') is not None,
+    'is_archived': lambda page: _first(page.tree, 'is_archived') is not None,
+    'stars': lambda page: _count(page.tree, 'stars'),
+    'forks': lambda page: _count(page.tree, 'forks'),
+    'watchers': lambda page: _count(page.tree, 'watchers'),
+    'open_issues': lambda page: _count(page.tree, 'open_issues'),
+    'open_pull_requests': lambda page: _count(page.tree, 'open_pull_requests'),
+    'primary_language': lambda page: _text(_first(page.tree, 'primary_language')),
+    'languages': lambda page: _languages(page.tree),
+    'topics': lambda page: _topics(page.tree),
+    'license': lambda page: _license(page.tree),
+    'created_at': lambda page: page.dates[0] if page.dates else "",
+    'updated_at': lambda page: page.dates[-1] if page.dates else "",
+    'has_readme': lambda page: _first(page.tree, 'has_readme') is not None,
+    'files_count': lambda page: _files_count(page.tree),
+    'commits_count': lambda page: _count(page.tree, 'commits_count'),
+    'branches_count': lambda page: _count(page.tree, 'branches_count'),
+    'releases_count': lambda page: _count(page.tree, 'releases_count'),
+    'size': lambda page: _size(page.tree),
+}
+
+def select_fields(fields=None) -> List[str]:
+    """Requested fields in export order (all of them for None); unknown names are an error"""
+    if not fields:
+        return list(EXPORT_FIELDS)
+    unknown = set(fields) - set(EXPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in EXPORT_FIELDS if field in fields]
+
+def project(row: Dict, fields: List[str]) -> Dict:
+    """Keep only the requested fields of a row"""
+    return {field: row[field] for field in fields if field in row}
+
+def listing_row(entry: Dict, fields: List[str]) -> Dict:
+    """Row for a repository list entry, for queries that need no detail page"""
+    owner, repository_name = entry['full_name'].split('/')
+    row = dict(entry, owner=owner, repository_name=repository_name)
+    return project(row, fields)
+
+def parse_repo_page(html: str, repo_url: str, fields=None) -> Dict:
+    """Fill the requested export_to_csv fields (all by default) from one snapshot of a repository page"""
+    page = RepoPage(html, repo_url)
+    return {field: REPO_FIELD_EXTRACTORS[field](page) for field in select_fields(fields)}
 
 class EnhancedGitHubScraper:
-    def __init__(self, driver_path: str = None, browser_path: str = None):
-        """Initialize the enhanced GitHub scraper"""
+    def __init__(self, driver_path: str = None, browser_path: str = None, session_store: SessionStore = None,
+                 data_source: GitHubApiSource = None, fetcher: Fetcher = None):
+        """Initialize the enhanced GitHub scraper
+        
+        With a data_source (e.g. GitHubApiSource) repositories come from the
+        API and no browser or login is needed. A recording or replaying
+        fetcher saves every page read, or serves them back without a browser.
+        """
         # Auto-detect paths if not provided
         self.driver_path = driver_path or self._detect_chromedriver_path()
         self.browser_path = browser_path or self._detect_browser_path()
@@ -24,6 +416,11 @@ class EnhancedGitHubScraper:
         self.is_logged_in = False
         self.username = None
         self.progress_callback = None
+        self.session_store = session_store or SessionStore()
+        self.data_source = data_source
+        self.fetcher = fetcher or Fetcher()
+        self.events = EventBus()
+        self.metrics = RunMetrics('github')
         
     def _detect_chromedriver_path(self):
         """Auto-detect ChromeDriver path"""
@@ -60,37 +457,42 @@ class EnhancedGitHubScraper:
         # Fallback to original path
         return r"C:\Users\nihal\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe"
         
+    def _create_driver(self, verbose: bool = True):
+        """Create a Chrome WebDriver with the scraper's options"""
+        options = Options()
+        
+        # Use Chrome if Brave is not available
+        if os.path.exists(self.browser_path):
+            options.binary_location = self.browser_path
+            if verbose:
+                print(f"📍 Using browser: {self.browser_path}")
+        elif verbose:
+            print("📍 Using default Chrome browser")
+        
+        # Enhanced options for better stability
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-plugins')
+        options.add_argument('--disable-images')  # Speed up loading
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        
+        # Add window size for better element detection
+        options.add_argument('--window-size=1920,1080')
+        
+        service = Service(executable_path=self.driver_path)
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+    
     def setup_driver(self):
         """Setup Chrome WebDriver with enhanced options"""
         try:
             print("🔧 Setting up WebDriver...")
-            
-            options = Options()
-            
-            # Use Chrome if Brave is not available
-            if os.path.exists(self.browser_path):
-                options.binary_location = self.browser_path
-                print(f"📍 Using browser: {self.browser_path}")
-            else:
-                print("📍 Using default Chrome browser")
-            
-            # Enhanced options for better stability
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-extensions')
-            options.add_argument('--disable-plugins')
-            options.add_argument('--disable-images')  # Speed up loading
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-            options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            # Add window size for better element detection
-            options.add_argument('--window-size=1920,1080')
-            
-            service = Service(executable_path=self.driver_path)
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            self.driver = self._create_driver()
             
             print("✅ WebDriver setup successful")
             print(f"📍 ChromeDriver: {self.driver_path}")
@@ -101,12 +503,68 @@ class EnhancedGitHubScraper:
             print("💡 Please check your ChromeDriver and browser paths")
             return False
     
+    def _add_cookies(self, cookies: List[Dict]):
+        """Load cookies into the browser (they can only be set for the open domain)"""
+        self.driver.get("https://github.com/")
+        for cookie in cookies:
+            cookie = dict(cookie)
+            cookie.pop('sameSite', None)
+            try:
+                self.driver.add_cookie(cookie)
+            except Exception:
+                continue
+    
+    def _wait_for_login(self, timeout: float = 10) -> str:
+        """Username GitHub reports for the open page, or '' when signed out"""
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "meta[name='user-login']")))
+        except TimeoutException:
+            return ""
+        return current_login(self.driver)
+    
+    def restore_session(self) -> bool:
+        """Reuse the saved, encrypted cookie jar if GitHub still accepts it"""
+        try:
+            session = self.session_store.load()
+        except ImportError as e:
+            print(f"⚠️  {e}")
+            return False
+        if not session:
+            return False
+        
+        print(f"🍪 Restoring saved session for {session['username']}...")
+        self._add_cookies(session['cookies'])
+        self.driver.get("https://github.com/")
+        
+        if self._wait_for_login() == session['username']:
+            print("✅ Saved session is still valid")
+            self.is_logged_in = True
+            self.username = session['username']
+            return True
+        
+        print("⚠️  Saved session was rejected, logging in again")
+        self.session_store.clear()
+        self.driver.delete_all_cookies()
+        return False
+    
+    def save_session(self):
+        """Encrypt and store the current cookie jar for the next run"""
+        try:
+            self.session_store.save(self.username, self.driver.get_cookies())
+            print(f"🔐 Session saved to {self.session_store.path}")
+        except Exception as e:
+            print(f"⚠️  Could not save session: {e}")
+    
     def login_to_github(self):
-        """Enhanced login with better error handling"""
+        """Log in, reusing a saved session when GitHub still accepts it"""
         if not self.driver:
             if not self.setup_driver():
                 return False
         
+        if self.restore_session():
+            return True
+        
         print("\n🔐 GitHub Login")
         print("-" * 30)
         
@@ -144,30 +602,27 @@ class EnhancedGitHubScraper:
             login_button.click()
             
             print("⏳ Logging in...")
-            time.sleep(3)
+            # Signed in, sent to 2FA, or back on the form with an error
+            try:
+                wait.until(lambda driver: current_login(driver)
+                           or "two-factor" in driver.current_url
+                           or driver.find_elements(By.CSS_SELECTOR, ".flash-error, #js-flash-container .flash"))
+            except TimeoutException:
+                pass
             
             # Check for 2FA
-            current_url = self.driver.current_url
-            if "sessions/two-factor" in current_url:
+            if "two-factor" in self.driver.current_url:
                 print("🔐 Two-factor authentication detected")
                 print("📱 Please complete 2FA in the browser window")
                 input("✅ Press Enter after completing 2FA...")
-                time.sleep(2)
             
             # Verify login success
-            time.sleep(2)
-            current_url = self.driver.current_url
-            
-            if "github.com" in current_url and "login" not in current_url:
+            login = self._wait_for_login()
+            if login:
                 print("✅ Successfully logged into GitHub!")
                 self.is_logged_in = True
-                self.username = username
-                
-                # Navigate to user's repository page
-                print(f"🏠 Navigating to {username}'s repositories...")
-                self.driver.get(f"https://github.com/{username}?tab=repositories")
-                time.sleep(2)
-                
+                self.username = login
+                self.save_session()
                 return True
             else:
                 print("❌ Login failed. Please check your credentials.")
@@ -177,36 +632,109 @@ class EnhancedGitHubScraper:
             print(f"❌ Error during login: {e}")
             return False
     
-    def scrape_my_repositories(self) -> List[Dict]:
-        """Enhanced repository scraping with better navigation"""
-        if not self.driver or not self.is_logged_in:
-            print("❌ Not logged in")
-            return []
+    def _spawn_worker(self) -> 'EnhancedGitHubScraper':
+        """Create a scraper with its own browser sharing this session's login cookies"""
+        worker = EnhancedGitHubScraper(self.driver_path, self.browser_path, fetcher=self.fetcher)
+        worker.driver = worker._create_driver(verbose=False)
+        worker._add_cookies(self.driver.get_cookies())
         
-        repositories = []
+        worker.username = self.username
+        worker.is_logged_in = True
+        return worker
+    
+    def _emit(self, kind: str, **data):
+        """Publish a progress event to subscribers and the legacy progress_callback"""
+        event = self.events.emit(kind, **data)
+        if self.progress_callback:
+            try:
+                self.progress_callback(event)
+            except Exception as e:
+                print(f"⚠️  progress_callback failed: {e}")
+    
+    def _fetch_repo(self, worker: 'EnhancedGitHubScraper', repo_url: str, fields: List[str] = None,
+                    output_fields: List[str] = None) -> Dict:
+        """Fetch one repository with the given scraper and report it as an event"""
+        start = time.perf_counter()
+        error = "no data extracted"
+        try:
+            repo_data = worker._get_comprehensive_repo_info(repo_url, fields)
+        except Exception as e:
+            repo_data, error = {}, str(e)
+        seconds = time.perf_counter() - start
+        mode = self.fetcher.source('browser')
+        self.metrics.increment('pages_fetched', mode=mode)
+        self.metrics.observe('fetch', seconds, mode=mode)
         
-        print("\n📦 Starting repository scraping...")
-        print("-" * 40)
+        if repo_data:
+            self.metrics.increment('items_extracted')
+            self._emit(REPO_FETCHED, url=repo_url, data=project(repo_data, output_fields or list(repo_data)),
+                       seconds=seconds, cached=False)
+        else:
+            self.metrics.increment('fetch_failures')
+            self._emit(REPO_FAILED, url=repo_url, error=error, seconds=seconds)
+        return repo_data
+    
+    def _scrape_repositories_parallel(self, repo_urls: List[str], workers: int, delay: float,
+                                      fields: List[str] = None, output_fields: List[str] = None) -> List[Dict]:
+        """Fetch repository details with a bounded pool of logged-in worker browsers"""
+        print(f"⚡ Starting {workers} worker browsers...")
+        idle_workers = queue.Queue()
+        all_workers = []
+        for _ in range(workers):
+            try:
+                worker = self._spawn_worker()
+            except Exception as e:
+                print(f"⚠️  Could not start a worker browser: {e}")
+                continue
+            all_workers.append(worker)
+            idle_workers.put(worker)
         
-        # Get all repository URLs first
-        repo_urls = self._get_all_repository_urls()
+        if not all_workers:
+            print("⚠️  No worker browsers available, falling back to the main browser")
+            idle_workers.put(self)
         
-        if not repo_urls:
-            print("❌ No repositories found")
-            return []
+        results = [None] * len(repo_urls)
+        completed = []
         
-        print(f"🎯 Found {len(repo_urls)} repositories")
-        print("📊 Collecting detailed information for each repository...")
-        print("-" * 40)
+        def fetch(index: int, repo_url: str):
+            worker = idle_workers.get()
+            try:
+                results[index] = self._fetch_repo(worker, repo_url, fields, output_fields)
+            finally:
+                if delay:
+                    time.sleep(delay)
+                idle_workers.put(worker)
+            
+            completed.append(index)
+            repo_name = repo_url.split('/')[-1]
+            status = "Completed" if results[index] else "Failed"
+            print(f"{'✅' if results[index] else '⚠️ '} [{len(completed)}/{len(repo_urls)}] {status}: {repo_name}")
         
-        # Process each repository
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(all_workers))) as executor:
+                for index, repo_url in enumerate(repo_urls):
+                    executor.submit(fetch, index, repo_url)
+        finally:
+            for worker in all_workers:
+                try:
+                    worker.driver.quit()
+                except Exception:
+                    pass
+        
+        # Results keep the discovery order regardless of completion order
+        return [repo_data for repo_data in results if repo_data]
+    
+    def _scrape_repositories_sequential(self, repo_urls: List[str], delay: float,
+                                        fields: List[str] = None, output_fields: List[str] = None) -> List[Dict]:
+        """Fetch repository details one at a time in the main browser"""
+        repositories = []
         for i, repo_url in enumerate(repo_urls, 1):
             try:
                 repo_name = repo_url.split('/')[-1]
                 print(f"📋 [{i}/{len(repo_urls)}] Processing: {repo_name}")
                 
                 # Get detailed information
-                repo_data = self._get_comprehensive_repo_info(repo_url)
+                repo_data = self._fetch_repo(self, repo_url, fields, output_fields)
                 
                 if repo_data:
                     repositories.append(repo_data)
@@ -215,468 +743,251 @@ class EnhancedGitHubScraper:
                     print(f"⚠️  [{i}/{len(repo_urls)}] Failed: {repo_name}")
                 
                 # Add delay between requests
-                if i < len(repo_urls):  # Don't wait after the last repo
-                    time.sleep(2)
+                if i < len(repo_urls) and delay:  # Don't wait after the last repo
+                    time.sleep(delay)
                     
             except Exception as e:
                 print(f"❌ [{i}/{len(repo_urls)}] Error processing {repo_url}: {e}")
                 continue
-        
-        print(f"\n🎉 Successfully scraped {len(repositories)} out of {len(repo_urls)} repositories")
         return repositories
     
-    def _get_all_repository_urls(self) -> List[str]:
-        """Get all repository URLs with pagination support"""
-        repo_urls = []
-        page = 1
+    def scrape_my_repositories(self, workers: int = 1, delay: float = 2, state: RepoStateDB = None,
+                               full: bool = False, fields: List[str] = None) -> List[Dict]:
+        """Enhanced repository scraping with better navigation
         
-        print("🔍 Discovering all repositories...")
-        
-        while True:
-            try:
-                url = f"https://github.com/{self.username}?tab=repositories&page={page}"
-                print(f"📄 Checking page {page}...")
-                
-                self.driver.get(url)
-                time.sleep(2)
-                
-                wait = WebDriverWait(self.driver, 10)
-                
-                try:
-                    # Wait for the repository list to load
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li[itemprop='owns'], .Box-row")))
-                except TimeoutException:
-                    print(f"⏰ Timeout waiting for page {page} to load")
-                    break
-                
-                # Find repository items
-                repo_items = self.driver.find_elements(By.CSS_SELECTOR, "li[itemprop='owns'], .Box-row")
-                
-                if not repo_items:
-                    print(f"📭 No repositories found on page {page}")
-                    break
-                
-                page_repos = 0
-                for item in repo_items:
-                    try:
-                        # Try different selectors for repository links
-                        name_link = None
-                        selectors = ["h3 a", "a[href*='/" + self.username + "/']", ".f4 a"]
-                        
-                        for selector in selectors:
-                            try:
-                                name_link = item.find_element(By.CSS_SELECTOR, selector)
-                                break
-                            except NoSuchElementException:
-                                continue
-                        
-                        if name_link:
-                            repo_url = name_link.get_attribute('href')
-                            if repo_url and repo_url not in repo_urls:
-                                repo_urls.append(repo_url)
-                                page_repos += 1
-                                
-                    except NoSuchElementException:
-                        continue
-                
-                print(f"📋 Found {page_repos} repositories on page {page}")
-                
-                # Check for next page
-                try:
-                    next_button = self.driver.find_element(By.CSS_SELECTOR, "a[rel='next']:not([disabled])")
-                    if not next_button:
-                        break
-                except NoSuchElementException:
-                    break
-                
-                page += 1
-                
-                # Safety check to prevent infinite loops
-                if page > 50:  # Adjust as needed
-                    print("⚠️  Reached maximum page limit")
-                    break
-                
-            except Exception as e:
-                print(f"❌ Error getting repositories from page {page}: {e}")
-                break
-        
-        print(f"🎯 Total repositories discovered: {len(repo_urls)}")
-        return repo_urls
-    
-    def _get_comprehensive_repo_info(self, repo_url: str) -> Dict:
-        """Get comprehensive repository information with proper navigation"""
-        try:
-            # Navigate to repository
-            self.driver.get(repo_url)
-            time.sleep(3)  # Allow page to fully load
-            
-            wait = WebDriverWait(self.driver, 15)
-            repo_data = {}
-            
-            # Basic repository information
-            repo_data['url'] = repo_url
-            repo_data['repository_name'] = repo_url.split('/')[-1]
-            repo_data['owner'] = repo_url.split('/')[-2]
-            repo_data['full_name'] = f"{repo_data['owner']}/{repo_data['repository_name']}"
-            
-            # Wait for main content to load
-            try:
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#repository-container-header, .pagehead")))
-            except TimeoutException:
-                print(f"⚠️  Page load timeout for {repo_data['repository_name']}")
-            
-            # Get all information
-            repo_data.update(self._extract_basic_info())
-            repo_data.update(self._extract_statistics())
-            repo_data.update(self._extract_metadata())
-            repo_data.update(self._extract_content_info())
-            
-            return repo_data
-            
-        except Exception as e:
-            print(f"⚠️  Error getting info for {repo_url}: {e}")
-            return {}
-    
-    def _extract_basic_info(self) -> Dict:
-        """Extract basic repository information"""
-        info = {}
+        With workers > 1 the repository pages are fetched in parallel by
+        extra browsers that reuse this session's cookies. With a state
+        database only new or changed repositories are opened (all of them
+        with full=True); the rest come from the previous run. fields limits
+        the columns computed; listing-only fields need no detail pages.
+        """
+        fields = select_fields(fields)
+        if self.data_source:
+            rows = []
+            for repo in self._scrape_from_data_source(state):
+                rows.append(project(repo, fields))
+                self.metrics.increment('items_extracted')
+                self._emit(REPO_DISCOVERED, url=repo['url'], full_name=repo['full_name'], updated_at=repo['updated_at'])
+                self._emit(REPO_FETCHED, url=repo['url'], data=rows[-1], seconds=0.0, cached=False)
+            self._emit(SCRAPE_FINISHED, repositories=len(rows), fetched=len(rows), cached=0, failed=0)
+            return rows
         
-        # Description
-        try:
-            desc_selectors = [
-                "[data-pjax='#repo-content-pjax-container'] p",
-                ".f4.my-3",
-                ".repository-description p"
-            ]
-            for selector in desc_selectors:
-                try:
-                    desc_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    info['description'] = desc_element.text.strip()
-                    break
-                except NoSuchElementException:
-                    continue
-            else:
-                info['description'] = ""
-        except:
-            info['description'] = ""
+        if self.fetcher.replaying:
+            # Every page comes from the recording: no browser, no login, no pacing
+            workers, delay = 1, 0
+        elif not self.driver or not self.is_logged_in:
+            print("❌ Not logged in")
+            return []
         
-        # Repository type flags
-        info['is_fork'] = self._check_fork_status()
-        info['is_private'] = self._check_private_status()
-        info['is_archived'] = self._check_archived_status()
+        print("\n📦 Starting repository scraping...")
+        print("-" * 40)
         
-        return info
-    
-    def _extract_statistics(self) -> Dict:
-        """Extract repository statistics"""
-        stats = {}
+        # Get the repository list first; it is cheap compared to the detail pages
+        listing = self._get_repository_listing()
         
-        # Stars, Forks, Watchers
-        stats['stars'] = self._get_stat_count('stargazers', 'star')
-        stats['forks'] = self._get_stat_count('forks', 'fork')
-        stats['watchers'] = self._get_stat_count('watchers', 'watch')
+        if not listing:
+            print("❌ No repositories found")
+            return []
         
-        # Issues and Pull Requests
-        stats['open_issues'] = self._get_issues_count()
-        stats['open_pull_requests'] = self._get_pull_requests_count()
+        print(f"🎯 Found {len(listing)} repositories")
+        for entry in listing:
+            self._emit(REPO_DISCOVERED, **entry)
         
-        return stats
-    
-    def _extract_metadata(self) -> Dict:
-        """Extract repository metadata"""
-        metadata = {}
+        if LISTING_FIELDS.issuperset(fields):
+            print("📋 Every requested field is on the repository list, skipping detail pages")
+            rows = [listing_row(entry, fields) for entry in listing]
+            for entry, row in zip(listing, rows):
+                self._emit(REPO_FETCHED, url=entry['url'], data=row, seconds=0.0, cached=False)
+            self._emit(SCRAPE_FINISHED, repositories=len(rows), fetched=0, cached=0, failed=0)
+            return rows
         
-        # Language information
-        metadata['primary_language'] = self._get_primary_language()
-        metadata['languages'] = self._get_languages_info()
+        # full_name is always extracted: the state database is keyed by it
+        fetch_fields = select_fields(set(fields) | {'full_name'})
+        to_fetch = state.stale(self.username, SOURCE_BROWSER, listing, fetch_fields) if state and not full else listing
+        if state and not full:
+            print(f"🔄 {len(to_fetch)} new or changed, {len(listing) - len(to_fetch)} unchanged since the last sync")
         
-        # Topics
-        metadata['topics'] = self._get_topics()
+        repositories = []
+        if to_fetch:
+            print("📊 Collecting detailed information for each repository...")
+            print("-" * 40)
+            repo_urls = [entry['url'] for entry in to_fetch]
+            if workers > 1:
+                repositories = self._scrape_repositories_parallel(repo_urls, workers, delay, fetch_fields, fields)
+            else:
+                repositories = self._scrape_repositories_sequential(repo_urls, delay, fetch_fields, fields)
+            print(f"\n🎉 Successfully scraped {len(repositories)} out of {len(repo_urls)} repositories")
         
-        # License
-        metadata['license'] = self._get_license()
+        failed = len(to_fetch) - len(repositories)
+        if not state:
+            self._emit(SCRAPE_FINISHED, repositories=len(repositories), fetched=len(repositories), cached=0, failed=failed)
+            return [project(repo_data, fields) for repo_data in repositories]
         
-        # Dates
-        metadata['created_at'] = self._get_creation_date()
-        metadata['updated_at'] = self._get_last_update()
+        # Remember the listed updated_at, not the page's, so the next comparison is like for like
+        fresh = {repo_data['full_name']: repo_data for repo_data in repositories}
+        state.save_many(self.username, SOURCE_BROWSER, [
+            {'full_name': entry['full_name'], 'updated_at': entry['updated_at'], 'data': fresh[entry['full_name']]}
+            for entry in to_fetch if entry['full_name'] in fresh
+        ])
+        removed = state.prune(self.username, SOURCE_BROWSER, (entry['full_name'] for entry in listing))
+        if removed:
+            print(f"🧹 Dropped {removed} repositories that are no longer listed")
         
-        return metadata
+        # Export every listed repository in listing order, fresh rows first choice
+        cached = state.get_many(self.username, SOURCE_BROWSER,
+                                (entry['full_name'] for entry in listing if entry['full_name'] not in fresh))
+        merged = []
+        for entry in listing:
+            if entry['full_name'] in fresh:
+                merged.append(project(fresh[entry['full_name']], fields))
+            elif entry['full_name'] in cached:
+                merged.append(project(cached[entry['full_name']]['data'], fields))
+                # Unchanged repositories still reach streaming exports, marked as cached
+                self._emit(REPO_FETCHED, url=entry['url'], data=merged[-1], seconds=0.0, cached=True)
+        self._emit(SCRAPE_FINISHED, repositories=len(merged), fetched=len(fresh), cached=len(merged) - len(fresh),
+                   failed=failed)
+        print(f"📚 {len(merged)} repositories in total ({len(fresh)} fetched, {len(merged) - len(fresh)} from cache)")
+        return merged
     
-    def _extract_content_info(self) -> Dict:
-        """Extract repository content information"""
-        content = {}
-        
-        # README
-        content['has_readme'] = self._has_readme()
-        
-        # File count (approximate)
-        content['files_count'] = self._get_files_count()
-        
-        # Commits, branches, releases
-        content['commits_count'] = self._get_commits_count()
-        content['branches_count'] = self._get_branches_count()
-        content['releases_count'] = self._get_releases_count()
+    def _scrape_from_data_source(self, state: RepoStateDB = None) -> List[Dict]:
+        """Every repository from the data source in a few batched requests"""
+        print("\n📡 Fetching repositories from the API...")
+        repositories = self.data_source.fetch_repositories()
+        self.username = self.username or self.data_source.login
         
-        # Size
-        content['size'] = self._get_repository_size()
+        if state:
+            state.save_many(self.username, SOURCE_API,
+                            [{'full_name': repo['full_name'], 'updated_at': repo['updated_at'], 'data': repo}
+                             for repo in repositories])
+            state.prune(self.username, SOURCE_API, (repo['full_name'] for repo in repositories))
         
-        return content
+        print(f"🎉 Collected {len(repositories)} repositories")
+        return repositories
     
-    def _get_stat_count(self, stat_type: str, alt_name: str = None) -> int:
-        """Get statistics count with multiple selector attempts"""
-        selectors = [
-            f"a[href*='/{stat_type}'] strong",
-            f"a[href*='/{stat_type}'] .Counter",
-            f"#{stat_type}-repo-tab-count",
-            f"[data-tab-item='{stat_type}'] strong",
-            f"[data-tab-item='{stat_type}'] .Counter"
-        ]
-        
-        if alt_name:
-            selectors.extend([
-                f"a[href*='/{alt_name}'] strong",
-                f"a[href*='/{alt_name}'] .Counter"
-            ])
-        
-        for selector in selectors:
-            try:
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                return self._parse_number(element.text.strip())
-            except NoSuchElementException:
-                continue
-        
-        return 0
+    def _get_all_repository_urls(self) -> List[str]:
+        """Get all repository URLs with pagination support"""
+        return [entry['url'] for entry in self._get_repository_listing()]
     
-    def _check_fork_status(self) -> bool:
-        """Check if repository is a fork"""
-        fork_indicators = [
-            ".octicon-repo-forked",
-            "[title*='fork']",
-            "span:contains('forked from')"
-        ]
-        
-        for indicator in fork_indicators:
-            try:
-                self.driver.find_element(By.CSS_SELECTOR, indicator)
-                return True
-            except NoSuchElementException:
-                continue
-        return False
+    def _http_session(self) -> requests.Session:
+        """requests session carrying the browser's GitHub cookies and user agent"""
+        session = requests.Session()
+        session.headers['User-Agent'] = self.driver.execute_script("return navigator.userAgent")
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        return session
     
-    def _check_private_status(self) -> bool:
-        """Check if repository is private"""
-        try:
-            private_indicators = self.driver.find_elements(By.CSS_SELECTOR, ".Label--secondary, .Label:contains('Private')")
-            return len(private_indicators) > 0
-        except:
-            return False
+    def _repository_list_url(self, page: int) -> str:
+        return f"{GITHUB_URL}{self.username}?tab=repositories&page={page}"
     
-    def _check_archived_status(self) -> bool:
-        """Check if repository is archived"""
-        try:
-            self.driver.find_element(By.CSS_SELECTOR, ".flash-warn, .archived")
-            return True
-        except NoSuchElementException:
-            return False
+    def _load_list_page_in_browser(self, page: int) -> Dict:
+        """Load one list page in the browser and parse its page_source"""
+        url = self._repository_list_url(page)
+        start = time.perf_counter()
+        if not self.fetcher.replaying:
+            self.driver.get(url)
+            try:
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "li[itemprop='owns'], .Box-row")))
+            except TimeoutException:
+                print(f"⏰ Timeout waiting for page {page} to load")
+        self.metrics.increment('pages_fetched', mode=self.fetcher.source('browser'))
+        self.metrics.observe('fetch', time.perf_counter() - start, mode=self.fetcher.source('browser'))
+        return parse_repo_list_page(self.fetcher.page_source(url, self.driver))
     
-    def _get_primary_language(self) -> str:
-        """Get primary programming language"""
+    def _fetch_list_page(self, session: requests.Session, page: int) -> Dict:
+        """Fetch one list page over HTTP; None if GitHub did not serve a signed-in list"""
+        start = time.perf_counter()
         try:
-            lang_element = self.driver.find_element(By.CSS_SELECTOR, "[itemprop='programmingLanguage']")
-            return lang_element.text.strip()
-        except NoSuchElementException:
-            return ""
+            response = self.fetcher.fetch(self._repository_list_url(page), session, timeout=20)
+        except (requests.RequestException, ReplayMiss) as e:
+            print(f"⚠️  Page {page} request failed: {e}")
+            return None
+        self.metrics.increment('pages_fetched', mode=self.fetcher.source('http'))
+        self.metrics.observe('fetch', time.perf_counter() - start, mode=self.fetcher.source('http'))
+        if response.status != 200 or "/login" in response.final_url:
+            print(f"⚠️  Page {page} returned HTTP {response.status}")
+            return None
+        return parse_repo_list_page(response.html)
     
-    def _get_languages_info(self) -> str:
-        """Get language information"""
+    def _get_repository_listing(self, workers: int = LISTING_WORKERS) -> List[Dict]:
+        """Get url, full_name and listed updated_at of every repository
+        
+        Page 1 is loaded in the browser to learn the repository and page
+        counts; the remaining pages are fetched concurrently over HTTP with
+        the browser's cookies. Pages that fail are retried in the browser.
+        """
+        print("🔍 Discovering all repositories...")
         try:
-            # Try to find language bar
-            lang_elements = self.driver.find_elements(By.CSS_SELECTOR, ".BorderGrid-row .BorderGrid-cell .Progress-item")
-            languages = []
-            
-            for element in lang_elements:
-                try:
-                    lang_name = element.get_attribute('aria-label')
-                    if lang_name:
-                        lang_name = lang_name.split()[0]  # Get just the language name
-                        if lang_name not in languages:
-                            languages.append(lang_name)
-                except:
+            first = self._load_list_page_in_browser(1)
+        except Exception as e:
+            print(f"❌ Error getting repositories from page 1: {e}")
+            return []
+        
+        per_page = len(first['entries'])
+        if not per_page:
+            print("📭 No repositories found on page 1")
+            return []
+        
+        total_pages = first['total_pages']
+        if not total_pages and first['total_count']:
+            total_pages = math.ceil(first['total_count'] / per_page)
+        print(f"📄 {first['total_count'] or '?'} repositories across {total_pages or '?'} pages")
+        
+        pages = {1: first}
+        if total_pages > 1:
+            session = None if self.fetcher.replaying else self._http_session()
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                futures = {page: executor.submit(self._fetch_list_page, session, page)
+                           for page in range(2, total_pages + 1)}
+                for page, future in futures.items():
+                    pages[page] = future.result()
+            for page in sorted(page for page, parsed in pages.items() if parsed is None):
+                if self.fetcher.replaying and self._repository_list_url(page) not in self.fetcher.store:
                     continue
-            
-            return ", ".join(languages) if languages else ""
-        except:
-            return ""
-    
-    def _get_topics(self) -> str:
-        """Get repository topics"""
-        try:
-            topic_elements = self.driver.find_elements(By.CSS_SELECTOR, ".topic-tag, .topic-tag-link")
-            topics = [topic.text.strip() for topic in topic_elements if topic.text.strip()]
-            return ", ".join(topics)
-        except:
-            return ""
+                pages[page] = self._load_list_page_in_browser(page)
+        elif not total_pages and first['has_next']:
+            # No count on the page: follow the next links until they run out
+            page = 1
+            while pages[page]['has_next'] and pages[page]['entries']:
+                page += 1
+                pages[page] = self._load_list_page_in_browser(page)
+        
+        # Page order, then listing order within a page; dict keys keep the first sighting
+        listing = {}
+        for page in sorted(page for page, parsed in pages.items() if parsed):
+            for entry in pages[page]['entries']:
+                listing.setdefault(entry['url'], entry)
+        
+        print(f"🎯 Total repositories discovered: {len(listing)}")
+        return list(listing.values())
     
-    def _get_license(self) -> str:
-        """Get repository license"""
+    def _get_comprehensive_repo_info(self, repo_url: str, fields: List[str] = None) -> Dict:
+        """Get comprehensive repository information with proper navigation"""
         try:
-            license_selectors = [
-                ".octicon-law + span",
-                "a[href*='/blob/'] .octicon-law + span",
-                ".license .Link--primary"
-            ]
-            
-            for selector in license_selectors:
+            if not self.fetcher.replaying:
+                # Navigate to repository; the explicit wait below covers page load
+                self.driver.get(repo_url)
+                
+                wait = WebDriverWait(self.driver, 15)
+                
+                # Wait for main content to load
                 try:
-                    license_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    return license_element.text.strip()
-                except NoSuchElementException:
-                    continue
-            return ""
-        except:
-            return ""
-    
-    def _get_creation_date(self) -> str:
-        """Get repository creation date"""
-        try:
-            date_element = self.driver.find_element(By.CSS_SELECTOR, "relative-time")
-            return date_element.get_attribute('datetime')
-        except NoSuchElementException:
-            return ""
-    
-    def _get_last_update(self) -> str:
-        """Get last update date"""
-        try:
-            update_elements = self.driver.find_elements(By.CSS_SELECTOR, "relative-time")
-            if len(update_elements) > 1:
-                return update_elements[-1].get_attribute('datetime')
-            elif update_elements:
-                return update_elements[0].get_attribute('datetime')
-            return ""
-        except:
-            return ""
-    
-    def _has_readme(self) -> bool:
-        """Check if repository has README"""
-        try:
-            readme_selectors = [
-                "[data-testid='readme']",
-                "#readme",
-                ".Box-header h2:contains('README')"
-            ]
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#repository-container-header, .pagehead")))
+                except TimeoutException:
+                    print(f"⚠️  Page load timeout for {repo_url.split('/')[-1]}")
             
-            for selector in readme_selectors:
-                try:
-                    self.driver.find_element(By.CSS_SELECTOR, selector)
-                    return True
-                except NoSuchElementException:
-                    continue
-            return False
-        except:
-            return False
-    
-    def _get_files_count(self) -> int:
-        """Get files count from directory listing"""
-        try:
-            file_rows = self.driver.find_elements(By.CSS_SELECTOR, "[role='rowgroup'] [role='row'], .js-navigation-item")
-            # Subtract 1 for header row if present
-            count = len(file_rows)
-            return max(0, count - 1) if count > 0 else 0
-        except:
-            return 0
-    
-    def _get_commits_count(self) -> int:
-        """Get commits count"""
-        selectors = [
-            "a[href*='/commits'] strong",
-            ".octicon-history ~ strong",
-            "[data-tab-item='commits'] strong"
-        ]
-        
-        for selector in selectors:
-            try:
-                element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                return self._parse_number(element.text.strip())
-            except NoSuchElementException:
-                continue
-        return 0
-    
-    def _get_branches_count(self) -> int:
-        """Get branches count"""
-        try:
-            branches_element = self.driver.find_element(By.CSS_SELECTOR, "a[href*='/branches'] strong")
-            return self._parse_number(branches_element.text.strip())
-        except NoSuchElementException:
-            return 0
-    
-    def _get_releases_count(self) -> int:
-        """Get releases count"""
-        try:
-            releases_element = self.driver.find_element(By.CSS_SELECTOR, "a[href*='/releases'] strong")
-            return self._parse_number(releases_element.text.strip())
-        except NoSuchElementException:
-            return 0
-    
-    def _get_issues_count(self) -> int:
-        """Get open issues count"""
-        try:
-            issues_element = self.driver.find_element(By.CSS_SELECTOR, "a[href*='/issues'] .Counter")
-            return self._parse_number(issues_element.text.strip())
-        except NoSuchElementException:
-            return 0
-    
-    def _get_pull_requests_count(self) -> int:
-        """Get open pull requests count"""
-        try:
-            pr_element = self.driver.find_element(By.CSS_SELECTOR, "a[href*='/pulls'] .Counter")
-            return self._parse_number(pr_element.text.strip())
-        except NoSuchElementException:
-            return 0
-    
-    def _get_repository_size(self) -> str:
-        """Get repository size"""
-        try:
-            size_selectors = [
-                ".file-navigation .text-small",
-                ".Box-header .text-small"
-            ]
+            # One snapshot, only the requested fields extracted in-process
+            return parse_repo_page(self.fetcher.page_source(repo_url, self.driver), repo_url, fields)
             
-            for selector in size_selectors:
-                try:
-                    size_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    size_text = size_element.text
-                    if any(unit in size_text for unit in ["MB", "KB", "GB", "bytes"]):
-                        return size_text.strip()
-                except NoSuchElementException:
-                    continue
-            return ""
-        except:
-            return ""
+        except Exception as e:
+            print(f"⚠️  Error getting info for {repo_url}: {e}")
+            return {}
     
     def _parse_number(self, text: str) -> int:
         """Parse number from text like '1.2k' or '1,234'"""
-        try:
-            if not text:
-                return 0
-            
-            # Remove commas
-            text = text.replace(',', '').strip()
-            
-            # Handle k, m suffixes
-            if text.lower().endswith('k'):
-                return int(float(text[:-1]) * 1000)
-            elif text.lower().endswith('m'):
-                return int(float(text[:-1]) * 1000000)
-            else:
-                # Extract numbers only
-                numbers = re.findall(r'\d+\.?\d*', text)
-                if numbers:
-                    return int(float(numbers[0]))
-                return 0
-        except:
-            return 0
+        return parse_number(text)
     
-    def export_to_csv(self, repos_data: List[Dict], filename: str = None):
+    def export_to_csv(self, repos_data: List[Dict], filename: str = None, fields: List[str] = None):
         """Export repository data to CSV with enhanced formatting"""
         if not repos_data:
             print("❌ No data to export")
@@ -687,14 +998,7 @@ class EnhancedGitHubScraper:
             filename = f"github_repositories_{self.username}_{timestamp}.csv"
         
         try:
-            fieldnames = [
-                'repository_name', 'full_name', 'owner', 'description', 'url',
-                'primary_language', 'languages', 'stars', 'forks', 'watchers',
-                'commits_count', 'branches_count', 'releases_count', 'files_count',
-                'is_fork', 'is_private', 'is_archived', 'has_readme',
-                'created_at', 'updated_at', 'size', 'topics', 'license',
-                'open_issues', 'open_pull_requests'
-            ]
+            fieldnames = select_fields(fields)
             
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -728,52 +1032,59 @@ class EnhancedGitHubScraper:
         print("📊 SCRAPING SUMMARY")
         print("="*60)
         
-        # Basic counts
-        total_repos = len(repos_data)
-        public_repos = len([r for r in repos_data if not r.get('is_private', False)])
-        private_repos = len([r for r in repos_data if r.get('is_private', False)])
-        forked_repos = len([r for r in repos_data if r.get('is_fork', False)])
-        archived_repos = len([r for r in repos_data if r.get('is_archived', False)])
+        summary = summarize(to_frame(repos_data))
+        counts = summary['counts']
+        totals = summary['totals']
         
+        # Lines for fields that were not scraped (--fields) are left out rather than shown as zeros
         print(f"👤 User: {self.username}")
-        print(f"📦 Total repositories: {total_repos}")
-        print(f"🌍 Public repositories: {public_repos}")
-        print(f"🔒 Private repositories: {private_repos}")
-        print(f"🍴 Forked repositories: {forked_repos}")
-        print(f"📦 Archived repositories: {archived_repos}")
-        
-        # Statistics
-        total_stars = sum(r.get('stars', 0) for r in repos_data)
-        total_forks = sum(r.get('forks', 0) for r in repos_data)
-        total_watchers = sum(r.get('watchers', 0) for r in repos_data)
-        
-        print(f"\n⭐ Total stars: {total_stars:,}")
-        print(f"🍴 Total forks: {total_forks:,}")
-        print(f"👀 Total watchers: {total_watchers:,}")
-        
-        # Language analysis
-        languages = {}
-        for repo in repos_data:
-            lang = repo.get('primary_language', '').strip()
-            if lang and lang.lower() != 'none':
-                languages[lang] = languages.get(lang, 0) + 1
-        
-        if languages:
+        print(f"📦 Total repositories: {counts['total']}")
+        if 'public' in counts:
+            print(f"🌍 Public repositories: {counts['public']}")
+            print(f"🔒 Private repositories: {counts['private']}")
+        if 'forks' in counts:
+            print(f"🍴 Forked repositories: {counts['forks']}")
+        if 'archived' in counts:
+            print(f"📦 Archived repositories: {counts['archived']}")
+        
+        if totals:
+            print()
+        if 'stars' in totals:
+            print(f"⭐ Total stars: {totals['stars']:,}")
+        if 'forks' in totals:
+            print(f"🍴 Total forks: {totals['forks']:,}")
+        if 'watchers' in totals:
+            print(f"👀 Total watchers: {totals['watchers']:,}")
+        
+        if summary['languages']:
             print(f"\n🔤 Programming Languages:")
-            sorted_langs = sorted(languages.items(), key=lambda x: x[1], reverse=True)
-            for lang, count in sorted_langs[:10]:  # Top 10
-                print(f"   {lang}: {count} repositories")
+            for language in summary['languages'][:10]:  # Top 10
+                print(f"   {language['language']}: {language['repositories']} repositories")
         
-        # Repository with most stars
-        if total_stars > 0:
-            most_starred = max(repos_data, key=lambda x: x.get('stars', 0))
+        most_starred = summary['most_starred']
+        name = most_starred and (most_starred.get('repository_name') or most_starred.get('full_name'))
+        if totals.get('stars', 0) > 0 and name:
             print(f"\n🌟 Most starred repository:")
-            print(f"   {most_starred['repository_name']} ({most_starred.get('stars', 0)} stars)")
+            print(f"   {name} ({most_starred['stars']} stars)")
         
         print("="*60)
     
+    def print_selector_stats(self):
+        """Show which fallback selector each field ended up using"""
+        stats = {**REPO_LIST_REGISTRY.stats(), **REPO_PAGE_REGISTRY.stats()}
+        if not stats:
+            return
+        
+        print("\n🎯 Selector hit rates:")
+        for field, field_stats in stats.items():
+            lookups = field_stats['lookups']
+            best, best_hits = max(field_stats['hits'].items(), key=lambda item: item[1], default=("-", 0))
+            miss_note = f", {field_stats['misses']} misses" if field_stats['misses'] else ""
+            print(f"   {field}: {best_hits}/{lookups} via {best}{miss_note}")
+    
     def close(self):
-        """Close the WebDriver safely"""
+        """Close the WebDriver safely and end any event streams"""
+        self.events.close()
         if self.driver:
             try:
                 self.driver.quit()
@@ -781,8 +1092,59 @@ class EnhancedGitHubScraper:
             except:
                 print("🔒 Browser session ended")
 
-def main():
+def main(argv=None):
     """Enhanced main function with better user experience"""
+    parser = argparse.ArgumentParser(description="Scrape your GitHub repositories")
+    parser.add_argument("-w", "--workers", type=int, help="parallel browser workers for repository details")
+    parser.add_argument("--logout", action="store_true", help="forget the saved session and exit")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE, help="sync state database (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="re-fetch every repository, ignoring the sync state")
+    parser.add_argument("--api", action="store_true",
+                        help="use the GraphQL API (token from GITHUB_TOKEN) instead of the browser")
+    parser.add_argument("--api-url", help="GraphQL endpoint, e.g. a mock_github_api.py server")
+    parser.add_argument("--fields", help=f"comma-separated columns to collect (default: all of {', '.join(EXPORT_FIELDS)})")
+    parser.add_argument("--skip-expensive", action="store_true",
+                        help=f"leave out {', '.join(sorted(EXPENSIVE_FIELDS))} unless listed in --fields")
+    parser.add_argument("--stream", metavar="FILE",
+                        help="also append each repository to FILE (.csv, .jsonl or .jsonl.gz) as soon as it is fetched")
+    parser.add_argument("--record", metavar="DIR", help="save every page read to a recording in DIR")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="re-run extraction on a recording or WARC archive, with no browser or network")
+    parser.add_argument("--archive", metavar="DIR", help="also append every page read to WARC files in DIR")
+    parser.add_argument("--user", help="whose recorded repositories to replay (default: detected from the recording)")
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser, "gitselenium_profile")
+    args = parser.parse_args(argv)
+    
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()] if args.fields else None
+    if args.skip_expensive and not fields:
+        fields = [field for field in EXPORT_FIELDS if field not in EXPENSIVE_FIELDS]
+    try:
+        fields = select_fields(fields)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.stream and not args.stream.lower().endswith(('.csv', '.jsonl', '.jsonl.gz')):
+        parser.error("--stream needs a .csv, .jsonl or .jsonl.gz file")
+    try:
+        fetcher = fetcher_from_args(args.record, args.replay, args.archive)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.logout:
+        SessionStore().clear()
+        print("🧹 Saved session removed")
+        return
+    
+    exporter = start_metrics(args.metrics_port, args.metrics_file, args.metrics_interval)
+    try:
+        with profiling_from_args(args):
+            run(args, fields, fetcher)
+    finally:
+        if exporter:
+            exporter.close()
+
+def run(args, fields: List[str], fetcher: Fetcher):
+    """Scrape with the options main() parsed"""
     print("🚀 Enhanced GitHub Repository Scraper")
     print("="*50)
     print("This tool will:")
@@ -792,17 +1154,82 @@ def main():
     print("• Export everything to a CSV file")
     print("• Provide a detailed summary of your repositories")
     print("="*50)
-    scraper = EnhancedGitHubScraper()
-
-    if scraper.login_to_github():
-        repos = scraper.scrape_my_repositories()
-        if repos:
-            scraper.print_summary(repos)
-            scraper.export_to_csv(repos)
-    else:
-        print("❌ Unable to login to GitHub. Please check your credentials or complete 2FA.")
+    
+    if args.api:
+        try:
+            source = GitHubApiSource(endpoint=args.api_url)
+        except GitHubApiError as e:
+            print(f"❌ {e}")
+            return
+        scraper = EnhancedGitHubScraper(data_source=source)
+        try:
+            stream = StreamingExport(scraper.events, args.stream, fieldnames=fields) if args.stream else None
+            state = RepoStateDB(args.state)
+            try:
+                repos = scraper.scrape_my_repositories(state=state, fields=fields)
+            except (GitHubApiError, requests.RequestException) as e:
+                print(f"❌ API request failed: {e}")
+                repos = []
+            finally:
+                state.close()
+                if stream:
+                    stream.close()
+            if repos:
+                scraper.print_summary(repos)
+                scraper.export_to_csv(repos, fields=fields)
+        finally:
+            # Ends events.stream() consumers, as on the browser path
+            scraper.close()
+        return
+    
+    if fetcher.replaying:
+        scraper = EnhancedGitHubScraper(fetcher=fetcher)
+        scraper.username = args.user or recorded_login(fetcher.store)
+        if not scraper.username:
+            print("❌ No repository list in the recording; pass --user")
+            return
+        print(f"⏯️  Replaying {scraper.username}'s repositories from {args.replay}")
+        try:
+            stream = StreamingExport(scraper.events, args.stream, fieldnames=fields) if args.stream else None
+            try:
+                repos = scraper.scrape_my_repositories(fields=fields)
+            finally:
+                if stream:
+                    stream.close()
+            if repos:
+                scraper.print_summary(repos)
+                scraper.print_selector_stats()
+                scraper.export_to_csv(repos, fields=fields)
+        finally:
+            scraper.close()
+        return
+    
+    scraper = EnhancedGitHubScraper(fetcher=fetcher)
 
-    scraper.close()
+    try:
+        if scraper.login_to_github():
+            workers = args.workers
+            if workers is None:
+                try:
+                    workers = int(input("⚡ Parallel browser workers for repository details (default: 1): ") or "1")
+                except ValueError:
+                    workers = 1
+            stream = StreamingExport(scraper.events, args.stream, fieldnames=fields) if args.stream else None
+            state = RepoStateDB(args.state)
+            try:
+                repos = scraper.scrape_my_repositories(workers=workers, state=state, full=args.full, fields=fields)
+            finally:
+                state.close()
+                if stream:
+                    stream.close()
+            if repos:
+                scraper.print_summary(repos)
+                scraper.print_selector_stats()
+                scraper.export_to_csv(repos, fields=fields)
+        else:
+            print("❌ Unable to login to GitHub. Please check your credentials or complete 2FA.")
+    finally:
+        scraper.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,548 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from exporters import open_row_writer
+from scrape_metrics import REGISTRY, add_metrics_arguments, start_metrics
+
+# Durable queue of scrape jobs shared by any number of worker processes.
+# A worker leases a job for a visibility timeout and keeps extending the
+# lease while it works; if the worker dies the lease runs out and another
+# worker picks the job up. Failed jobs are retried with exponential backoff
+# and end up in the dead-letter state after max_attempts.
+#
+#   python job_queue.py enqueue flipkart laptop --pages 5
+#   python job_queue.py enqueue recipe recipe.json urls.txt
+#   python job_queue.py enqueue github https://github.com/octo-org/hello-scraper
+#   python job_queue.py work --processes 4 -o "results_{worker}.jsonl"
+#   python job_queue.py stats
+#
+# Queues are opened by URL. SQLite is built in: a plain path, sqlite:///jobs.sqlite
+# (relative) or sqlite:////var/queue/jobs.sqlite (absolute), as in SQLAlchemy.
+# Other backends register a factory for their scheme with register_backend().
+
+DEFAULT_QUEUE = "jobs.sqlite"
+DEFAULT_VISIBILITY_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+JOB_COLUMNS = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    dedupe_key TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+"""
+
+class Job:
+    """One leased job: what to do, and the lease that proves this worker holds it"""
+    def __init__(self, id, kind, payload, attempts=0, max_attempts=DEFAULT_MAX_ATTEMPTS, lease_token=None,
+                 last_error=None):
+        self.id = id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.lease_token = lease_token
+        self.last_error = last_error
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.kind!r}, attempt {self.attempts}/{self.max_attempts})"
+
+class LeaseLost(Exception):
+    """The job's lease expired and it was handed to another worker"""
+
+def backoff_delay(attempts, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """Seconds before retry number `attempts`: exponential with full jitter"""
+    return random.uniform(0, min(maximum, base * 2 ** max(0, attempts - 1)))
+
+class QueueBackend:
+    """
+    What a queue backend provides. Leases are identified by lease_token so a
+    worker whose lease ran out cannot complete or fail a job that has since
+    been handed to someone else.
+    """
+    def enqueue(self, kind, payload, priority=0, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS, dedupe_key=None):
+        """Add a job; returns its id, or None if a job with dedupe_key is queued or running"""
+        raise NotImplementedError
+
+    def lease(self, worker, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT, kinds=None):
+        """The next available job (or one whose lease expired), leased to worker; None if idle"""
+        raise NotImplementedError
+
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        """Push the lease deadline out; raises LeaseLost if the lease is gone"""
+        raise NotImplementedError
+
+    def complete(self, job):
+        raise NotImplementedError
+
+    def fail(self, job, error, retry_delay=None):
+        """Retry later with backoff, or dead-letter after max_attempts; returns the new state"""
+        raise NotImplementedError
+
+    def stats(self):
+        """{kind: {state: count}}"""
+        raise NotImplementedError
+
+    def dead_letters(self, limit=100):
+        raise NotImplementedError
+
+    def requeue_dead(self, kind=None):
+        """Give dead jobs a fresh set of attempts; returns how many"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class SqliteQueue(QueueBackend):
+    """Queue in one SQLite file; safe for many processes on one machine"""
+    def __init__(self, path=DEFAULT_QUEUE):
+        self.path = path
+        self.lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS jobs ({JOB_COLUMNS})")
+        self._transaction(self._drop_permanent_dedupe)
+        # Dedupe only covers live jobs: once a job is done or dead the same key can be queued again
+        self.conn.executescript(f"""
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, priority, available_at);
+            CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (state, lease_expires);
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key) WHERE state IN ('{QUEUED}', '{LEASED}');
+        """)
+
+    @staticmethod
+    def _drop_permanent_dedupe(conn):
+        """Queues from before jobs_dedupe made dedupe_key UNIQUE for good; rebuild their table without it"""
+        if not any(origin == 'u' for _, _, _, origin, _ in conn.execute("PRAGMA index_list(jobs)")):
+            return
+        conn.execute(f"CREATE TABLE jobs_rebuilt ({JOB_COLUMNS})")
+        conn.execute("INSERT INTO jobs_rebuilt SELECT * FROM jobs")
+        conn.execute("DROP TABLE jobs")
+        conn.execute("ALTER TABLE jobs_rebuilt RENAME TO jobs")
+
+    def _transaction(self, work):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, kind, payload, priority=0, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS, dedupe_key=None):
+        now = time.time()
+
+        def insert(conn):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (kind, payload, state, priority, max_attempts, available_at, dedupe_key, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), QUEUED, priority, max_attempts, now + delay, dedupe_key, now, now))
+            return cursor.lastrowid if cursor.rowcount else None
+        return self._transaction(insert)
+
+    def lease(self, worker, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT, kinds=None):
+        now = time.time()
+        token = uuid.uuid4().hex
+        kind_filter = ""
+        kinds = list(kinds or [])
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+
+        def take(conn):
+            # Expired leases that already used their last attempt go straight to the dead letters
+            conn.execute(
+                "UPDATE jobs SET state = ?, last_error = COALESCE(last_error, 'lease expired'), updated_at = ? "
+                "WHERE state = ? AND lease_expires <= ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now))
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE ((state = ? AND available_at <= ?) OR (state = ? AND lease_expires <= ?))"
+                f"{kind_filter} ORDER BY priority, available_at, id LIMIT 1",
+                (QUEUED, now, LEASED, now, *kinds)).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                (LEASED, worker, token, now + visibility_timeout, now, row[0]))
+            return conn.execute(
+                "SELECT id, kind, payload, attempts, max_attempts, lease_token, last_error FROM jobs WHERE id = ?",
+                (row[0],)).fetchone()
+
+        row = self._transaction(take)
+        if not row:
+            return None
+        job_id, kind, payload, attempts, max_attempts, lease_token, last_error = row
+        return Job(job_id, kind, json.loads(payload), attempts, max_attempts, lease_token, last_error)
+
+    def _update_leased(self, job, sql, params):
+        def update(conn):
+            cursor = conn.execute(f"{sql} WHERE id = ? AND state = ? AND lease_token = ?",
+                                  (*params, job.id, LEASED, job.lease_token))
+            if not cursor.rowcount:
+                raise LeaseLost(f"Job {job.id} is no longer leased by this worker")
+        self._transaction(update)
+
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        now = time.time()
+        self._update_leased(job, "UPDATE jobs SET lease_expires = ?, updated_at = ?", (now + visibility_timeout, now))
+
+    def complete(self, job):
+        self._update_leased(job, "UPDATE jobs SET state = ?, lease_token = NULL, lease_expires = NULL, updated_at = ?",
+                            (DONE, time.time()))
+
+    def fail(self, job, error, retry_delay=None):
+        now = time.time()
+        if job.attempts >= job.max_attempts:
+            state, available_at = DEAD, now
+        else:
+            state = QUEUED
+            available_at = now + (backoff_delay(job.attempts) if retry_delay is None else retry_delay)
+        self._update_leased(
+            job, "UPDATE jobs SET state = ?, available_at = ?, last_error = ?, lease_token = NULL, "
+                 "lease_expires = NULL, updated_at = ?",
+            (state, available_at, str(error)[:2000], now))
+        return state
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT kind, state, COUNT(*) FROM jobs GROUP BY kind, state").fetchall()
+        stats = {}
+        for kind, state, count in rows:
+            stats.setdefault(kind, {})[state] = count
+        return stats
+
+    def dead_letters(self, limit=100):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, attempts, max_attempts, last_error FROM jobs WHERE state = ? "
+                "ORDER BY updated_at DESC LIMIT ?", (DEAD, limit)).fetchall()
+        return [Job(job_id, kind, json.loads(payload), attempts, max_attempts, last_error=last_error)
+                for job_id, kind, payload, attempts, max_attempts, last_error in rows]
+
+    def requeue_dead(self, kind=None):
+        now = time.time()
+
+        def requeue(conn):
+            # OR IGNORE: a dead job whose dedupe_key has since been queued again stays dead
+            sql = "UPDATE OR IGNORE jobs SET state = ?, attempts = 0, available_at = ?, updated_at = ? WHERE state = ?"
+            params = [QUEUED, now, now, DEAD]
+            if kind:
+                sql += " AND kind = ?"
+                params.append(kind)
+            return conn.execute(sql, params).rowcount
+        return self._transaction(requeue)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def _open_sqlite(url):
+    if "://" not in url:
+        return SqliteQueue(url)
+    # The third slash ends the empty host, so sqlite:///jobs.sqlite is relative and sqlite:////jobs.sqlite absolute
+    path = url.split("://", 1)[1]
+    return SqliteQueue(path[1:] if path.startswith("/") else path)
+
+BACKENDS = {'sqlite': _open_sqlite, '': _open_sqlite}
+
+def register_backend(scheme, factory):
+    """Make open_queue('<scheme>://...') build the queue with factory(url)"""
+    BACKENDS[scheme] = factory
+
+def open_queue(url=DEFAULT_QUEUE):
+    """Queue for a URL such as sqlite:///jobs.sqlite (relative) or sqlite:////abs/jobs.sqlite, or a plain SQLite path"""
+    scheme = urlparse(url).scheme
+    # A Windows drive letter is not a scheme
+    if len(scheme) == 1:
+        scheme = ''
+    if scheme not in BACKENDS:
+        raise ValueError(f"No queue backend for {scheme}:// (known: {', '.join(sorted(s for s in BACKENDS if s))})")
+    return BACKENDS[scheme](url)
+
+# ---------------------------------------------------------------------------
+# Job handlers. Each takes the job payload and a sink for result rows; the
+# heavy modules are imported on first use so a worker only loads what its
+# jobs need, and each worker process keeps its own browser between jobs.
+
+_worker_state = {}
+
+def handle_flipkart(payload, sink):
+    """{'keyword': ..., 'page': N} -> the products on that search results page"""
+    from scrapp import scrape_flipkart_updated
+    products = scrape_flipkart_updated(payload['keyword'], max_pages=1, use_proxy=payload.get('use_proxy', False),
+                                       debug_mode=False, start_page=payload.get('page', 1), raise_errors=True)
+    sink([{'keyword': payload['keyword'], **product} for product in products])
+
+def handle_recipe(payload, sink):
+    """{'recipe': {...}, 'url': ...} -> the recipe's rows from that URL"""
+    from warc_archive import load_script
+    if 'scrapy_plus' not in _worker_state:
+        _worker_state['scrapy_plus'] = load_script("scrapy+.py", "scrapy_plus")
+    scrapy_plus = _worker_state['scrapy_plus']
+    recipe = payload['recipe']
+    settings = recipe.get('settings') or {}
+    if 'slot' not in _worker_state:
+        _worker_state['slot'] = scrapy_plus.DriverSlot(headless=settings.get('headless', True))
+    url = payload['url']
+
+    def recipe_sink(rows):
+        sink([{'source_url': url, **row} for row in rows])
+        scrapy_plus.run_metrics.increment('items_extracted', len(rows))
+
+    scrapy_plus.scrape_url(url, recipe['container_selector'], recipe['selected_fields'], _worker_state['slot'], recipe_sink,
+                           settings.get('max_items', 50), settings.get('delay', 3),
+                           max_pages=settings.get('max_pages', 1), infinite_scroll=settings.get('infinite_scroll', False))
+
+def handle_github(payload, sink):
+    """{'url': 'https://github.com/owner/repo', 'fields': [...]} -> one repository row"""
+    from blocking import RunMetrics
+    from crawl_scheduler import CrawlJob, GitHubCrawler, RetryJob, session_with_saved_cookies
+    from gitselenium import parse_repo_page
+    if 'github' not in _worker_state:
+        _worker_state['github'] = GitHubCrawler(session_with_saved_cookies(), workers=1,
+                                                metrics=RunMetrics('github_crawl'))
+    owner, repo = urlparse(payload['url']).path.strip('/').split('/')[:2]
+    try:
+        html = _worker_state['github'].fetch(CrawlJob(owner, repo))
+    except RetryJob as e:
+        raise RuntimeError(f"GitHub asked us to back off: {e}")
+    sink([parse_repo_page(html, payload['url'], payload.get('fields'))])
+    _worker_state['github'].metrics.increment('items_extracted')
+
+HANDLERS = {
+    'flipkart': handle_flipkart,
+    'recipe': handle_recipe,
+    'github': handle_github,
+}
+
+def close_worker_state():
+    slot = _worker_state.pop('slot', None)
+    if slot:
+        slot.quit()
+
+class LeaseKeeper:
+    """Extends a job's lease in the background while its handler runs"""
+    def __init__(self, queue, job, visibility_timeout):
+        self.queue = queue
+        self.job = job
+        self.visibility_timeout = visibility_timeout
+        self.stopped = threading.Event()
+        self.lost = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.visibility_timeout / 3):
+            try:
+                self.queue.extend(self.job, self.visibility_timeout)
+            except LeaseLost:
+                self.lost = True
+                return
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ Could not extend the lease of job {self.job.id}: {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+def run_worker(queue_url=DEFAULT_QUEUE, output="queue_results_{worker}.jsonl", worker=None, kinds=None,
+               visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT, poll_interval=2.0, idle_exit=None, max_jobs=None,
+               metrics_port=None, metrics_file=None, metrics_interval=15.0):
+    """
+    Lease and run jobs until the queue has been idle for idle_exit seconds
+    (forever when None) or max_jobs have been handled. Rows go to output,
+    where {worker} is replaced by the worker name so processes never share
+    a file; the same goes for metrics_file. Returns (jobs done, jobs failed).
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    queue = open_queue(queue_url)
+    writer = open_row_writer(output.format(worker=worker), append=True)
+    exporter = start_metrics(metrics_port, metrics_file and metrics_file.format(worker=worker), metrics_interval)
+    done = failed = 0
+    idle_since = time.monotonic()
+    logging.info(f"👷 Worker {worker} pulling from {queue_url}")
+    try:
+        while max_jobs is None or done + failed < max_jobs:
+            job = queue.lease(worker, visibility_timeout, kinds)
+            if job is None:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            handler = HANDLERS.get(job.kind)
+            rows = []
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for job kind {job.kind!r}")
+                with LeaseKeeper(queue, job, visibility_timeout) as keeper:
+                    handler(job.payload, rows.extend)
+                if keeper.lost:
+                    raise LeaseLost(f"Job {job.id} lease expired while it ran")
+                # Rows are written only once the job succeeded, and only after renewing the lease, so a
+                # job another worker has taken over is not written twice. A crash between the write and
+                # complete() still re-runs the job: delivery is at-least-once.
+                queue.extend(job, visibility_timeout)
+                writer.write_many(rows)
+                writer.flush()
+                queue.complete(job)
+                done += 1
+                REGISTRY.inc("scrape_jobs_total", kind=job.kind, outcome="done")
+                logging.info(f"✅ {job} done: {len(rows)} rows")
+            except LeaseLost as e:
+                failed += 1
+                REGISTRY.inc("scrape_jobs_total", kind=job.kind, outcome="lease_lost")
+                logging.warning(f"⏰ {e}; another worker will retry it")
+            except Exception as e:
+                failed += 1
+                REGISTRY.inc("scrape_jobs_total", kind=job.kind, outcome="failed")
+                try:
+                    state = queue.fail(job, e)
+                except LeaseLost:
+                    state = "handed to another worker"
+                logging.error(f"❌ {job} failed ({state}): {e}")
+            idle_since = time.monotonic()
+    finally:
+        writer.close()
+        queue.close()
+        close_worker_state()
+        if exporter:
+            exporter.close()
+    logging.info(f"🏁 Worker {worker}: {done} done, {failed} failed")
+    return done, failed
+
+def _worker_process(index, kwargs):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if kwargs.get('metrics_port') is not None:
+        # One metrics port per process: --metrics-port 9108 -p 3 serves 9108, 9109 and 9110
+        kwargs = {**kwargs, 'metrics_port': kwargs['metrics_port'] + index}
+    run_worker(worker=f"{socket.gethostname()}-{os.getpid()}-{index}", **kwargs)
+
+def run_workers(processes, **kwargs):
+    """Run several worker processes against the same queue and wait for them"""
+    workers = [multiprocessing.Process(target=_worker_process, args=(index, kwargs)) for index in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+def _enqueue(queue, args):
+    if args.kind == "flipkart":
+        keyword = args.target
+        ids = [queue.enqueue("flipkart", {'keyword': keyword, 'page': page}, max_attempts=args.max_attempts,
+                             dedupe_key=f"flipkart:{keyword}:{page}" if args.dedupe else None)
+               for page in range(1, args.pages + 1)]
+    elif args.kind == "recipe":
+        from warc_archive import load_script
+        scrapy_plus = load_script("scrapy+.py", "scrapy_plus")
+        recipe = scrapy_plus.load_recipe(args.target)
+        recipe = {key: recipe[key] for key in ('container_selector', 'selected_fields', 'settings')}
+        ids = [queue.enqueue("recipe", {'recipe': recipe, 'url': url}, max_attempts=args.max_attempts,
+                             dedupe_key=f"recipe:{args.target}:{url}" if args.dedupe else None)
+               for url in scrapy_plus.read_url_list(args.urls)]
+    else:
+        urls = [args.target]
+        if args.urls:
+            with open(args.urls, encoding="utf-8") as f:
+                urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        fields = [field.strip() for field in args.fields.split(",")] if args.fields else None
+        ids = [queue.enqueue("github", {'url': url, 'fields': fields}, max_attempts=args.max_attempts,
+                             dedupe_key=f"github:{url}" if args.dedupe else None)
+               for url in urls]
+    added = [job_id for job_id in ids if job_id is not None]
+    print(f"📥 Queued {len(added)} {args.kind} jobs ({len(ids) - len(added)} already queued or running)")
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Durable scrape job queue")
+    parser.add_argument("-q", "--queue", default=DEFAULT_QUEUE, help="queue URL or SQLite file (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="add jobs")
+    enqueue.add_argument("kind", choices=sorted(HANDLERS))
+    enqueue.add_argument("target", help="flipkart: keyword; recipe: recipe JSON; github: repository URL")
+    enqueue.add_argument("urls", nargs="?", help="recipe: file of URLs; github: file of more repository URLs")
+    enqueue.add_argument("--pages", type=int, default=1, help="flipkart: result pages, one job each")
+    enqueue.add_argument("--fields", help="github: comma-separated columns to extract")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    enqueue.add_argument("--no-dedupe", dest="dedupe", action="store_false",
+                         help="queue jobs even if the same one is already queued or running")
+
+    work = subparsers.add_parser("work", help="run workers until stopped")
+    work.add_argument("-p", "--processes", type=int, default=1)
+    work.add_argument("-o", "--output", default="queue_results_{worker}.jsonl",
+                      help="rows per worker; {worker} becomes the worker name (default: %(default)s)")
+    work.add_argument("--kinds", help="comma-separated job kinds this worker takes")
+    work.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT)
+    work.add_argument("--exit-when-idle", type=float, metavar="SECONDS",
+                      help="stop once no job has been available for this long")
+    add_metrics_arguments(work)
+
+    subparsers.add_parser("stats", help="job counts by kind and state")
+    dead = subparsers.add_parser("dead", help="list dead-lettered jobs")
+    dead.add_argument("--requeue", action="store_true", help="give them a fresh set of attempts")
+    dead.add_argument("--kind")
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        kwargs = dict(queue_url=args.queue, output=args.output, visibility_timeout=args.visibility_timeout,
+                      idle_exit=args.exit_when_idle, metrics_port=args.metrics_port,
+                      metrics_file=args.metrics_file, metrics_interval=args.metrics_interval,
+                      kinds=[kind.strip() for kind in args.kinds.split(",")] if args.kinds else None)
+        if args.processes > 1:
+            run_workers(args.processes, **kwargs)
+        else:
+            run_worker(**kwargs)
+        return
+
+    queue = open_queue(args.queue)
+    try:
+        if args.command == "enqueue":
+            _enqueue(queue, args)
+        elif args.command == "stats":
+            for kind, states in sorted(queue.stats().items()):
+                counts = ", ".join(f"{state}: {count}" for state, count in sorted(states.items()))
+                print(f"📊 {kind}: {counts}")
+        elif args.requeue:
+            print(f"♻️ Requeued {queue.requeue_dead(args.kind)} dead jobs")
+        else:
+            for job in queue.dead_letters():
+                print(f"💀 {job.id} {job.kind} {json.dumps(job.payload)[:80]} after {job.attempts} attempts: {job.last_error}")
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+import scrapp
+from blocking import detect_block, detect_driver_block
+from mock_marketplace import add_marketplace_arguments
+
+# Load test for the Flipkart pipeline against mock_marketplace.py: the same
+# pages are scraped at each concurrency level in turn, and every step reports
+# throughput, page latency percentiles, errors, blocks and peak memory. The
+# saturation point is the last level that still raised throughput by more
+# than --saturation.
+#
+#   python load_test.py --concurrency 1,2,4,8,16,32 --step-pages 1000 --latency 0.05 --jitter 0.1
+#   python load_test.py --pipeline browser --concurrency 1,2,4 --step-pages 100 --popup
+#   python load_test.py --url http://10.0.0.5:8766 --output load_test.json
+#
+# The marketplace runs in its own process unless --url is given, so page
+# generation does not compete with the scrapers for the GIL. The pipelines do
+# what scrape_flipkart_updated does for each page (load, popups, block check,
+# extract_products) without its politeness sleeps.
+
+DEFAULT_CONCURRENCY = "1,2,4,8,16,32"
+DEFAULT_QUERIES = "laptop,mobile,headphones,smart watch,camera,tablet,monitor,keyboard"
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_marketplace.py")
+TITLE_PATTERN = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def start_server_process(args):
+    """Run mock_marketplace.py on a free port; returns (process, base_url)"""
+    command = [sys.executable, SERVER_SCRIPT, "--port", "0", "--quiet",
+               "--products", str(args.products), "--pages", str(args.pages),
+               "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--error-rate", str(args.error_rate), "--block-rate", str(args.block_rate),
+               "--seed", str(args.seed)]
+    if args.popup:
+        command.append("--popup")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = process.stdout.readline().strip()
+    if not url.startswith("http"):
+        process.kill()
+        raise RuntimeError("mock_marketplace.py did not start")
+    return process, url
+
+def current_rss():
+    """Resident memory of this process in bytes, 0 when it cannot be measured"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        # Windows without psutil
+        return 0
+    # Peak so far is the best there is (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class MemorySampler:
+    """Peak RSS while a step runs, sampled from a background thread"""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, current_rss())
+
+class HttpPipeline:
+    """requests + extract_products, one session per worker thread"""
+    name = "http"
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+            with self.lock:
+                self.sessions.append(self.local.session)
+        return self.local.session
+
+    def scrape(self, url, page):
+        """(outcome, products); outcome is 'ok', 'blocked' or 'error'"""
+        response = self._session().get(url, timeout=self.timeout)
+        title = TITLE_PATTERN.search(response.text)
+        if detect_block(response.status_code, title.group(1) if title else "", response.text):
+            return 'blocked', 0
+        if response.status_code != 200:
+            return 'error', 0
+        return 'ok', len(scrapp.extract_products(response.text, page))
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+        self.sessions.clear()
+        self.local = threading.local()
+
+class BrowserPipeline:
+    """Headless Chrome per worker thread, as scrape_flipkart_updated loads pages"""
+    name = "browser"
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.local = threading.local()
+        self.drivers = []
+        self.lock = threading.Lock()
+
+    def _driver(self):
+        if not hasattr(self.local, 'driver'):
+            self.local.driver = scrapp.setup_driver(headless=True)
+            self.local.driver.set_page_load_timeout(self.timeout)
+            with self.lock:
+                self.drivers.append(self.local.driver)
+        return self.local.driver
+
+    def scrape(self, url, page):
+        driver = self._driver()
+        driver.get(url)
+        scrapp.close_popups(driver)
+        if detect_driver_block(driver):
+            return 'blocked', 0
+        if "Server Error" in driver.title:
+            return 'error', 0
+        return 'ok', len(scrapp.extract_products(driver.page_source, page))
+
+    def close(self):
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logging.debug(f"Driver quit failed: {e}")
+        self.drivers.clear()
+        self.local = threading.local()
+
+PIPELINES = {'http': HttpPipeline, 'browser': BrowserPipeline}
+
+def page_urls(base_url, queries, pages, count):
+    """count (url, page) pairs, walking every query's result pages in turn"""
+    urls = []
+    page = 1
+    while len(urls) < count:
+        for query in queries:
+            urls.append((scrapp.search_url(query, page, base_url), page))
+        page = page % pages + 1
+    return urls[:count]
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+def server_stats(base_url):
+    try:
+        return requests.get(f"{base_url}/stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+def run_step(pipeline, urls, concurrency):
+    """Scrape urls with concurrency workers; returns the step's numbers"""
+    latencies = []
+    outcomes = {'ok': 0, 'blocked': 0, 'error': 0}
+    products = 0
+    lock = threading.Lock()
+
+    def work(item):
+        nonlocal products
+        url, page = item
+        started = time.perf_counter()
+        try:
+            outcome, count = pipeline.scrape(url, page)
+        except Exception as e:
+            logging.debug(f"{url}: {e}")
+            outcome, count = 'error', 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            outcomes[outcome] += 1
+            products += count
+            if outcome == 'ok':
+                latencies.append(elapsed)
+
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(work, urls))
+        wall = time.perf_counter() - started
+    pipeline.close()
+
+    return {
+        'concurrency': concurrency,
+        'pages': len(urls),
+        'ok': outcomes['ok'],
+        'blocked': outcomes['blocked'],
+        'errors': outcomes['error'],
+        'products': products,
+        'seconds': round(wall, 3),
+        'pages_per_second': round(outcomes['ok'] / wall, 2),
+        'products_per_second': round(products / wall, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p90_ms': round(percentile(latencies, 90) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'peak_rss_mb': round(memory.peak / 2**20, 1),
+    }
+
+def saturation_point(steps, threshold):
+    """Concurrency after which throughput grew by less than threshold, or None if it never stopped growing"""
+    for previous, step in zip(steps, steps[1:]):
+        if step['pages_per_second'] < previous['pages_per_second'] * (1 + threshold):
+            return previous['concurrency']
+    return None
+
+def print_step(step):
+    def ms(value):
+        return f"{value:8.1f}" if value is not None else "       -"
+
+    marker = "✅" if not step['errors'] and not step['blocked'] else "⚠️"
+    print(f"{marker} {step['concurrency']:5d} {step['pages_per_second']:9.2f} {step['products_per_second']:10.1f} "
+          f"{ms(step['p50_ms'])} {ms(step['p90_ms'])} {ms(step['p99_ms'])} "
+          f"{step['errors']:6d} {step['blocked']:7d} {step['peak_rss_mb']:9.1f}", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Flipkart pipeline against the mock marketplace")
+    parser.add_argument("--pipeline", choices=sorted(PIPELINES), default="http",
+                        help="http: requests + extract_products; browser: headless Chrome (default: %(default)s)")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="comma-separated worker counts, one step each (default: %(default)s)")
+    parser.add_argument("--step-pages", type=int, default=500,
+                        help="pages scraped at every step (default: %(default)s)")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="comma-separated search terms")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a page load fails")
+    parser.add_argument("--saturation", type=float, default=0.1,
+                        help="throughput gain below which a step counts as saturated (default: %(default)s)")
+    parser.add_argument("--url", help="use a marketplace already running here instead of starting one")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    server_options = parser.add_argument_group("marketplace (ignored with --url)")
+    add_marketplace_arguments(server_options)
+    args = parser.parse_args(argv)
+
+    # extract_products logs every page, which would swamp the table
+    logging.getLogger().setLevel(logging.WARNING)
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    queries = [query.strip() for query in args.queries.split(",") if query.strip()]
+    process = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        process, base_url = start_server_process(args)
+    print(f"🧪 Marketplace at {base_url}, {args.pipeline} pipeline, {args.step_pages} pages per step")
+
+    urls = page_urls(base_url, queries, args.pages, args.step_pages)
+    pipeline = PIPELINES[args.pipeline](args.timeout)
+    steps = []
+    stats_before = server_stats(base_url)
+    try:
+        print("   workers   pages/s  products/s   p50 ms   p90 ms   p99 ms errors blocked   peak MB")
+        for concurrency in levels:
+            step = run_step(pipeline, urls, concurrency)
+            steps.append(step)
+            print_step(step)
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted")
+    finally:
+        pipeline.close()
+        stats_after = server_stats(base_url)
+        if process:
+            process.terminate()
+            process.wait()
+
+    if not steps:
+        return
+    saturated = saturation_point(steps, args.saturation)
+    best = max(steps, key=lambda step: step['pages_per_second'])
+    print(f"\n🏁 Peak {best['pages_per_second']:.2f} pages/s at {best['concurrency']} workers")
+    if saturated is not None:
+        print(f"📉 Saturated at {saturated} workers: more workers added less than {args.saturation:.0%} throughput")
+    else:
+        print(f"📈 Not saturated: throughput still grew at {steps[-1]['concurrency']} workers")
+
+    if args.output:
+        report = {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'pipeline': args.pipeline,
+            'url': base_url,
+            'queries': queries,
+            'pages_per_step': args.step_pages,
+            'marketplace': None if args.url else {
+                'products': args.products, 'pages': args.pages, 'latency': args.latency, 'jitter': args.jitter,
+                'error_rate': args.error_rate, 'block_rate': args.block_rate, 'popup': args.popup, 'seed': args.seed,
+            },
+            'server_stats': {key: stats_after[key] - stats_before.get(key, 0) for key in stats_after}
+                            if stats_before and stats_after else None,
+            'steps': steps,
+            'saturation_concurrency': saturated,
+            'peak': {'concurrency': best['concurrency'], 'pages_per_second': best['pages_per_second']},
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
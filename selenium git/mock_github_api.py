@@ -0,0 +1,161 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for GitHub's GraphQL endpoint, serving a deterministic set of
+# repositories with the shape github_api.REPOSITORIES_QUERY asks for.
+#
+#   python mock_github_api.py --repos 250 --port 8765
+#   GITHUB_TOKEN=test GITHUB_GRAPHQL_URL=http://127.0.0.1:8765/graphql python gitselenium.py --api
+
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "Go", "Rust", "Shell", "HTML", "Jupyter Notebook"]
+TOPICS = ["web-scraping", "selenium", "cli", "data", "automation", "api", "machine-learning", "tools"]
+LICENSES = ["MIT License", "Apache License 2.0", "GNU General Public License v3.0", None]
+RATE_LIMIT = 5000
+
+def make_repositories(count, login="octo-user", seed=0):
+    rng = random.Random(seed)
+    start = datetime(2019, 1, 1)
+    repositories = []
+    for index in range(count):
+        name = f"project-{index:04d}"
+        created = start + timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86399))
+        pushed = created + timedelta(days=rng.randint(0, 400))
+        languages = rng.sample(LANGUAGES, rng.randint(0, 3))
+        files = ["README.md"] if rng.random() < 0.8 else []
+        files += [f"file_{n}.py" for n in range(rng.randint(1, 30))]
+        repositories.append({
+            "name": name,
+            "nameWithOwner": f"{login}/{name}",
+            "owner": {"login": login},
+            "description": f"Synthetic repository {index}" if rng.random() < 0.7 else None,
+            "url": f"https://github.com/{login}/{name}",
+            "isFork": rng.random() < 0.2,
+            "isPrivate": rng.random() < 0.3,
+            "isArchived": rng.random() < 0.05,
+            "createdAt": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updatedAt": pushed.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "pushedAt": pushed.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "diskUsage": rng.randint(10, 250_000),
+            "stargazerCount": int(rng.paretovariate(1.2)) - 1,
+            "forkCount": int(rng.paretovariate(1.5)) - 1,
+            "watchers": {"totalCount": rng.randint(0, 40)},
+            "issues": {"totalCount": rng.randint(0, 60)},
+            "pullRequests": {"totalCount": rng.randint(0, 10)},
+            "primaryLanguage": {"name": languages[0]} if languages else None,
+            "languages": {"nodes": [{"name": language} for language in languages]},
+            "repositoryTopics": {"nodes": [{"topic": {"name": topic}} for topic in rng.sample(TOPICS, rng.randint(0, 4))]},
+            "licenseInfo": ({"name": license} if (license := rng.choice(LICENSES)) else None),
+            "refs": {"totalCount": rng.randint(1, 12)},
+            "releases": {"totalCount": rng.randint(0, 20)},
+            "defaultBranchRef": {"target": {"history": {"totalCount": rng.randint(1, 3000)}}},
+            "object": {"entries": [{"name": file_name} for file_name in files]},
+        })
+    # The API returns the most recently updated first
+    repositories.sort(key=lambda repo: repo["updatedAt"], reverse=True)
+    return repositories
+
+def encode_cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode().split(":")[1])
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    server_version = "MockGitHub/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, etag=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", etag)
+        self._send_rate_limit_headers()
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_rate_limit_headers(self):
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(max(0, RATE_LIMIT - self.server.request_count)))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.request_count += 1
+        if self.path.rstrip("/") != "/graphql":
+            return self._send_json(404, {"message": "Not Found"})
+        if not self.headers.get("Authorization", "").lower().startswith(("bearer ", "token ")):
+            return self._send_json(401, {"message": "Bad credentials"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            variables = json.loads(self.rfile.read(length) or b"{}").get("variables") or {}
+            first = min(int(variables.get("first") or 100), 100)
+            offset = decode_cursor(variables.get("after"))
+        except (ValueError, IndexError):
+            return self._send_json(200, {"errors": [{"message": "Invalid query variables"}]})
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        repositories = self.server.repositories
+        nodes = repositories[offset:offset + first]
+        end = offset + len(nodes)
+        body = {"data": {"viewer": {"login": self.server.login, "repositories": {
+            "totalCount": len(repositories),
+            "pageInfo": {"hasNextPage": end < len(repositories), "endCursor": encode_cursor(end)},
+            "nodes": nodes,
+        }}}}
+
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self._send_rate_limit_headers()
+            self.end_headers()
+            return
+        self._send_json(200, body, etag)
+
+def start_mock_server(port=0, repos=250, login="octo-user", latency=0.0, verbose=False):
+    """Serve the mock API from a background thread; returns (server, graphql_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockGitHubHandler)
+    server.repositories = make_repositories(repos, login)
+    server.login = login
+    server.latency = latency
+    server.verbose = verbose
+    server.request_count = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/graphql"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock GitHub GraphQL API for gitselenium.py")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repos", type=int, default=250, help="number of synthetic repositories")
+    parser.add_argument("--login", default="octo-user")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args(argv)
+
+    server, url = start_mock_server(args.port, args.repos, args.login, args.latency, verbose=True)
+    print(f"🧪 Mock GitHub API with {args.repos} repositories at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+# Local stand-in for Flipkart search, serving deterministic result pages with
+# the markup of flipkart_page_source.html (data-id cards, KzDlHZ names,
+# Nx9bqj prices, WSL9JP pagination). The same query and page number always
+# give the same products. Latency, 5xx errors, block pages and the login
+# popup are switched on from the command line.
+#
+#   python mock_marketplace.py --port 8766 --pages 200 --latency 0.05 --error-rate 0.01 --block-rate 0.01 --popup
+#   FLIPKART_BASE_URL=http://127.0.0.1:8766 python scrapp.py
+#
+# GET /stats returns the request, error and block counts as JSON.
+
+BRANDS = ["ASUS", "HP", "Lenovo", "DELL", "Acer", "MSI", "APPLE", "SAMSUNG", "Infinix", "realme", "GIGABYTE"]
+SERIES = ["TUF Gaming A15", "Victus", "IdeaPad Slim 3", "Inspiron 3520", "Aspire Lite", "Thin GF63", "MacBook Air M2",
+          "Galaxy Book4", "InBook Y2 Plus", "Book (2024)", "G6 (2024)", "Vivobook 15", "Chromebook"]
+PROCESSORS = ["Intel Core i3 12th Gen 1215U", "Intel Core i5 13th Gen 13420H", "Intel Core i7 13th Gen 13620H",
+              "AMD Ryzen 5 Hexa Core 7535HS", "AMD Ryzen 7 Octa Core 7735HS", "Intel Celeron Dual Core N4500"]
+MEMORY = ["8 GB/512 GB SSD", "16 GB/512 GB SSD", "16 GB/1 TB SSD", "4 GB/128 GB EMMC Storage"]
+SYSTEMS = ["Windows 11 Home", "Windows 11 Pro", "Chrome OS", "Mac OS Sonoma"]
+FILTERS = ["Price", "Brand", "Customer Ratings", "RAM Capacity", "Processor", "SSD Capacity", "Operating System",
+           "Screen Size", "Discount", "Offers", "Availability", "GST Invoice Available"]
+BLOCK_STATUS = 429
+
+def make_products(query, page, count, seed=0):
+    """The products on one results page; the same arguments always give the same products"""
+    rng = random.Random(f"{seed}:{query}:{page}")
+    products = []
+    for index in range(count):
+        processor = rng.choice(PROCESSORS)
+        memory = rng.choice(MEMORY)
+        name = f"{rng.choice(BRANDS)} {rng.choice(SERIES)} {processor} - ({memory}/{rng.choice(SYSTEMS)}) Laptop"
+        price = rng.randrange(13990, 189990, 100)
+        products.append({
+            'id': f"COM{rng.getrandbits(48):012X}",
+            # Flipkart cuts long names on the results page
+            'name': name if len(name) <= 80 else name[:77] + "...",
+            'price': price,
+            'mrp': int(price * rng.uniform(1.05, 1.6)) // 10 * 10,
+            'rating': round(rng.uniform(3.5, 4.8), 1),
+            'ratings': rng.randint(3, 25_000),
+            'reviews': rng.randint(0, 2_500),
+            'specs': [f"{processor.split(' ', 3)[-1] if 'Gen' in processor else processor} Processor",
+                      f"{memory.split('/')[0]} DDR5 RAM", f"{memory.split('/')[1]}",
+                      f"{rng.choice(['35.56 cm (14 Inch)', '39.62 cm (15.6 Inch)', '40.64 cm (16 Inch)'])} Display",
+                      "1 Year Onsite Warranty"],
+        })
+    return products
+
+def _product_card(product, query, position):
+    name = html.escape(product['name'])
+    link = f"/laptop/p/itm{product['id'][-10:].lower()}?pid={product['id']}&amp;q={quote(query)}&amp;srno=s_1_{position}"
+    specs = "".join(f'<li class="J+igdf">{html.escape(spec)}</li>' for spec in product['specs'])
+    discount = round((1 - product['price'] / product['mrp']) * 100)
+    return (
+        f'<div data-id="{product["id"]}" style="width: 100%;"><div class="tUxRFH">'
+        f'<a class="CGtC98" target="_blank" rel="noopener noreferrer" href="{link}">'
+        f'<div class="Otbq5D"><div class="yPq5Io"><div><div class="_4WELSP" style="height: 200px; width: 200px;">'
+        f'<img loading="eager" class="DByuf4" alt="{name}" src="/image/{product["id"]}.jpeg"></div></div></div>'
+        f'<div class="qaR90o"><div class="A8uQAd"><span class="Lni97G"><label class="tJjCVx">'
+        f'<input type="checkbox" class="vn9L2C" readonly><div class="XqNaEv"></div></label></span>'
+        f'<label class="uu79Xy"><span>Add to Compare</span></label></div></div></div>'
+        f'<div class="yKfJKb row"><div class="col col-7-12"><div class="KzDlHZ">{name}</div>'
+        f'<div class="_5OesEi"><span class="Y1HWO0"><div class="XQDdHH">{product["rating"]}</div></span>'
+        f'<span class="Wphh3N"><span><span>{product["ratings"]:,} Ratings</span><span class="hG7V+4">&amp;</span>'
+        f'<span>{product["reviews"]:,} Reviews</span></span></span></div>'
+        f'<div class="_6NESgJ"><ul class="G4BRas">{specs}</ul></div></div>'
+        f'<div class="col col-5-12 BfVC2z"><div class="cN1yYO"><div class="hl05eU">'
+        f'<div class="Nx9bqj _4b5DiR">₹{product["price"]:,}</div><div class="yRaY8j ZYYwLA">₹{product["mrp"]:,}</div>'
+        f'<div class="UkUFwK WW8yVX"><span>{discount}% off</span></div></div></div>'
+        f'<div class="yiggsN O5Fpg8">Bank Offer</div></div></div></a></div></div>'
+    )
+
+def _pagination(query, page, pages):
+    first = max(1, min(page - 4, pages - 9))
+    links = "".join(
+        f'<a class="cn++Ap{" A1msZJ" if number == page else ""}" href="/search?q={quote(query)}&amp;page={number}">{number}</a>'
+        for number in range(first, min(pages, first + 9) + 1)
+    )
+    if page < pages:
+        links += f'<a class="_9QVEpD" href="/search?q={quote(query)}&amp;page={page + 1}"><span>Next</span></a>'
+    return (f'<div class="_1G0WLw mpIySA"><span>Page {page} of {pages}</span>'
+            f'<nav class="WSL9JP">{links}</nav></div>')
+
+LOGIN_POPUP = (
+    '<div class="_2Sn47c" id="login-popup"><div class="_3Njdz7"><div class="JFPqaw">'
+    '<span class="Pke_EE">Login</span><p>Get access to your Orders, Wishlist and Recommendations</p>'
+    '<button class="_2KpZ6l _2doB4z" onclick="document.getElementById(\'login-popup\').remove()">✕</button>'
+    '</div></div></div>'
+)
+
+def search_page(query, page, products_per_page=24, pages=50, seed=0, popup=False):
+    """HTML of one results page; pages past the last one have no results"""
+    title = f"{html.escape(query.capitalize())}- Buy Products Online at Best Price in India - All Categories | Flipkart.com"
+    products = make_products(query, page, products_per_page, seed) if 1 <= page <= pages else []
+    filters = "".join(
+        f'<section class="-5Qqnc"><div class="rgHxCQ"><div class="fxf7w6">{name}</div></div>'
+        + "".join(f'<div class="ewzVkT _3DvUAf" title="{name} {option}"><label class="tJjCVx">'
+                  f'<input type="checkbox" class="vn9L2C"><div class="XqNaEv"></div>'
+                  f'<div class="_6i1qKy">{name} {option}</div></label></div>' for option in range(1, 7))
+        + '</section>'
+        for name in FILTERS
+    )
+    if products:
+        first = (page - 1) * products_per_page + 1
+        summary = (f'<span class="BUOuZu">Showing {first} – {first + len(products) - 1} of '
+                   f'{pages * products_per_page:,} results for "<span class="zAjW3c">{html.escape(query)}</span>"</span>')
+        results = "".join(_product_card(product, query, position)
+                          for position, product in enumerate(products, first))
+        results = f'<div class="DOjaWF gdgoEp">{summary}{results}{_pagination(query, page, pages)}</div>'
+    else:
+        results = '<div class="DOjaWF gdgoEp"><div class="BHPsUQ">Sorry, no results found!</div></div>'
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{title}</title></head><body><div id="container">'
+        '<header class="_3ybBIU"><a href="/"><img class="_2xm1JU" src="/logo.svg" alt="Flipkart"></a>'
+        f'<form class="header-form-search" action="/search"><input class="Pke_EE" name="q" value="{html.escape(query)}">'
+        '<button type="submit">Search</button></form><a class="_1_3w1N" href="/account/login">Login</a></header>'
+        f'<div class="_1YokD2 _2GoDe3"><div class="_1YokD2 _3Mn1Gg col-2-12"><section>Filters</section>{filters}</div>'
+        f'<div class="_1YokD2 _3Mn1Gg col-10-12">{results}</div></div>'
+        '<footer class="_3ARrMx"><a href="/pages/aboutus">About Us</a><a href="/pages/contact">Contact Us</a></footer>'
+        f'</div>{LOGIN_POPUP if popup else ""}</body></html>'
+    )
+
+BLOCK_PAGE = (
+    '<!DOCTYPE html><html><head><title>Are you a robot? | Flipkart.com</title></head><body>'
+    '<div class="captcha-container"><h1>Please verify you are a human</h1>'
+    '<div class="g-recaptcha" data-sitekey="synthetic"></div></div></body></html>'
+)
+ERROR_PAGE = '<!DOCTYPE html><html><head><title>Server Error</title></head><body><h1>500</h1></body></html>'
+
+class MarketplaceHandler(BaseHTTPRequestHandler):
+    server_version = "MockMarketplace/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.stats['bytes'] += len(data)
+
+    def _count(self, name):
+        with self.server.lock:
+            self.server.stats[name] += 1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with self.server.lock:
+                stats = dict(self.server.stats)
+            return self._send(200, json.dumps(stats), "application/json")
+        if url.path != "/search":
+            self._count('not_found')
+            return self._send(404, "<html><head><title>Not Found</title></head><body>404</body></html>")
+
+        self._count('requests')
+        server = self.server
+        with server.lock:
+            # One shared generator keeps a run's error and block sequence reproducible
+            roll = server.rng.random()
+            delay = server.latency + server.rng.uniform(0, server.jitter) if server.latency or server.jitter else 0
+        if delay:
+            time.sleep(delay)
+
+        if roll < server.error_rate:
+            self._count('errors')
+            return self._send(500, ERROR_PAGE)
+        if roll < server.error_rate + server.block_rate:
+            self._count('blocks')
+            return self._send(BLOCK_STATUS, BLOCK_PAGE)
+
+        query = parse_qs(url.query)
+        try:
+            page = int(query.get('page', ['1'])[0])
+        except ValueError:
+            page = 1
+        key = (query.get('q', [''])[0], page)
+        body = server.cache.get(key)
+        if body is None:
+            body = search_page(key[0], page, server.products, server.pages, server.seed, server.popup)
+            server.cache[key] = body
+        self._count('pages')
+        self._send(200, body)
+
+def start_marketplace(port=0, products=24, pages=50, latency=0.0, jitter=0.0, error_rate=0.0, block_rate=0.0,
+                      popup=False, seed=0, verbose=False):
+    """Serve the mock marketplace from a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MarketplaceHandler)
+    server.daemon_threads = True
+    server.products = products
+    server.pages = pages
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.block_rate = block_rate
+    server.popup = popup
+    server.seed = seed
+    server.verbose = verbose
+    server.rng = random.Random(seed)
+    server.cache = {}
+    server.stats = {'requests': 0, 'pages': 0, 'errors': 0, 'blocks': 0, 'not_found': 0, 'bytes': 0}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def add_marketplace_arguments(parser):
+    """Page shape and fault options, shared with load_test.py"""
+    parser.add_argument("--products", type=int, default=24, help="products per results page (default: %(default)s)")
+    parser.add_argument("--pages", type=int, default=50, help="result pages per query (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--block-rate", type=float, default=0.0,
+                        help=f"fraction of requests answered with an HTTP {BLOCK_STATUS} CAPTCHA page")
+    parser.add_argument("--popup", action="store_true", help="add the login popup to every results page")
+    parser.add_argument("--seed", type=int, default=0)
+
+def marketplace_options(args):
+    """start_marketplace() keyword arguments for add_marketplace_arguments() options"""
+    return dict(products=args.products, pages=args.pages, latency=args.latency, jitter=args.jitter,
+                error_rate=args.error_rate, block_rate=args.block_rate, popup=args.popup, seed=args.seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Flipkart search results for offline scraper runs")
+    parser.add_argument("--port", type=int, default=8766, help="0 picks a free port")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    add_marketplace_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server, url = start_marketplace(args.port, verbose=not args.quiet, **marketplace_options(args))
+    # First line of output is the URL, so a parent process can read the port
+    print(url, flush=True)
+    print(f"🧪 Mock marketplace: {args.pages} pages of {args.products} products per query, "
+          f"search at {url}/search?q=laptop", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
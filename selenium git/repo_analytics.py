@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+# Repository analytics over gitselenium.py exports (CSV / JSONL / Parquet),
+# its incremental state database or in-memory rows. Several exports of the same account form a history:
+# each file is one snapshot, dated by the timestamp in its name.
+#
+#   python repo_analytics.py github_repositories_*.csv --json
+
+BOOL_COLUMNS = ['is_fork', 'is_private', 'is_archived', 'has_readme']
+INT_COLUMNS = ['stars', 'forks', 'watchers', 'commits_count', 'branches_count', 'releases_count',
+               'files_count', 'open_issues', 'open_pull_requests']
+DATE_COLUMNS = ['created_at', 'updated_at']
+CATEGORY_COLUMNS = ['owner', 'primary_language', 'license']
+TRUE_VALUES = {'yes', 'true', '1'}
+
+EXPORT_TIMESTAMP_PATTERN = re.compile(r'(\d{8}_\d{6})')
+
+def _read_state_db(path: str) -> pd.DataFrame:
+    """Rows stored by RepoStateDB (the data column holds each row as JSON), the latest fetch of each repository"""
+    conn = sqlite3.connect(path)
+    try:
+        # A repository synced by several logins or from both sources is stored once per sync
+        stored = conn.execute(
+            "SELECT data FROM repos r WHERE fetched_at = "
+            "(SELECT MAX(fetched_at) FROM repos WHERE full_name = r.full_name) GROUP BY full_name").fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame([json.loads(data) for (data,) in stored])
+
+def _read_file(path: str) -> pd.DataFrame:
+    lowered = path.lower()
+    if lowered.endswith(('.sqlite', '.db')):
+        return _read_state_db(path)
+    if lowered.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if lowered.endswith(('.jsonl', '.jsonl.gz')):
+        return pd.read_json(path, lines=True, dtype=False)
+    # Let the C parser type the numeric and Yes/No columns instead of converting strings later
+    return pd.read_csv(path, true_values=['Yes'], false_values=['No'], dtype={'primary_language': str, 'license': str})
+
+def snapshot_time(path: str) -> pd.Timestamp:
+    """Export timestamp from a github_repositories_<user>_<YYYYmmdd_HHMMSS> name, else the file's mtime"""
+    match = EXPORT_TIMESTAMP_PATTERN.search(os.path.basename(path))
+    if match:
+        return pd.Timestamp(datetime.strptime(match.group(1), '%Y%m%d_%H%M%S'))
+    return pd.Timestamp(datetime.fromtimestamp(os.path.getmtime(path)))
+
+def to_frame(rows: Union[pd.DataFrame, Iterable[Dict]], snapshot=None) -> pd.DataFrame:
+    """Typed columnar frame from exported or freshly scraped repository rows"""
+    df = rows.copy() if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    if df.empty:
+        return df
+
+    for column in BOOL_COLUMNS:
+        if column in df:
+            values = df[column]
+            if values.dtype != bool:
+                values = values.astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+            df[column] = values.astype(bool)
+    for column in INT_COLUMNS:
+        if column in df and df[column].dtype != np.int64:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(np.int64)
+    for column in DATE_COLUMNS:
+        if column in df:
+            df[column] = pd.to_datetime(df[column], errors='coerce', utc=True)
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].fillna('').astype(str).str.strip().astype('category')
+    if snapshot is not None:
+        df['snapshot'] = pd.Timestamp(snapshot)
+    return df
+
+def load_repositories(paths: List[str]) -> pd.DataFrame:
+    """One frame with every export; a 'snapshot' column tells the files apart"""
+    frames = [to_frame(_read_file(path), snapshot_time(path)) for path in paths]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    # concat turns categories with different levels back into objects
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df.sort_values('snapshot', kind='stable', ignore_index=True)
+
+def latest_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of the most recent snapshot (the whole frame if there is no history)"""
+    if 'snapshot' not in df or df.empty:
+        return df
+    return df[df['snapshot'] == df['snapshot'].max()]
+
+def counts(df: pd.DataFrame) -> Dict:
+    """Repository counts; a count is left out when the column it needs was not scraped"""
+    result = {'total': int(len(df))}
+    if 'is_private' in df:
+        result['public'] = int((~df['is_private']).sum())
+        result['private'] = int(df['is_private'].sum())
+    if 'is_fork' in df:
+        result['forks'] = int(df['is_fork'].sum())
+    if 'is_archived' in df:
+        result['archived'] = int(df['is_archived'].sum())
+    return result
+
+def totals(df: pd.DataFrame) -> Dict:
+    """Star, fork and watcher sums over the columns that were scraped"""
+    return {column: int(df[column].sum()) for column in ('stars', 'forks', 'watchers') if column in df}
+
+def language_share(df: pd.DataFrame, top: int = None) -> pd.DataFrame:
+    """Repositories per primary language and their share of the repositories that have one"""
+    if 'primary_language' not in df:
+        return pd.DataFrame(columns=['language', 'repositories', 'share'])
+    languages = df['primary_language'].astype(str)
+    languages = languages[(languages != '') & (languages.str.lower() != 'none')]
+    counted = languages.value_counts()
+    share = pd.DataFrame({
+        'language': counted.index,
+        'repositories': counted.to_numpy(),
+        'share': (counted / max(1, counted.sum())).round(4).to_numpy(),
+    })
+    return share.head(top) if top else share
+
+def top_repositories(df: pd.DataFrame, n: int = 10, by: str = 'stars') -> pd.DataFrame:
+    if by not in df or df.empty:
+        return pd.DataFrame()
+    columns = [column for column in ('full_name', 'repository_name', by) if column in df]
+    return df.nlargest(n, by)[columns].reset_index(drop=True)
+
+def growth(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-snapshot totals and their change since the previous snapshot"""
+    if 'snapshot' not in df or df.empty:
+        return pd.DataFrame()
+    metrics = {column: (column, 'sum') for column in ('stars', 'forks', 'watchers') if column in df}
+    key = 'full_name' if 'full_name' in df else 'url'
+    per_snapshot = df.groupby('snapshot').agg(repositories=(key, 'nunique'), **metrics)
+    changes = per_snapshot.diff().fillna(0).astype(np.int64).add_suffix('_change')
+    return per_snapshot.join(changes).reset_index()
+
+def star_growth(df: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """Repositories that gained the most stars between their first and last snapshot"""
+    if 'snapshot' not in df or 'stars' not in df or df['snapshot'].nunique() < 2:
+        return pd.DataFrame()
+    key = 'full_name' if 'full_name' in df else 'url'
+    ordered = df.sort_values('snapshot', kind='stable')
+    grouped = ordered.groupby(key, observed=True)['stars']
+    gained = (grouped.last() - grouped.first()).rename('stars_gained')
+    return gained.nlargest(n).reset_index()
+
+def summarize(df: pd.DataFrame, top: int = 10) -> Dict:
+    """Every aggregate print_summary shows, plus history, as plain data"""
+    current = latest_snapshot(df)
+    top_starred = top_repositories(current, top)
+    summary = {
+        'counts': counts(current),
+        'totals': totals(current),
+        'languages': language_share(current).to_dict('records'),
+        'top_starred': top_starred.to_dict('records'),
+        'most_starred': top_starred.iloc[0].to_dict() if not top_starred.empty else None,
+    }
+    if 'snapshot' in df and df['snapshot'].nunique() > 1:
+        history = growth(df)
+        history['snapshot'] = history['snapshot'].astype(str)
+        summary['growth'] = history.to_dict('records')
+        summary['star_growth'] = star_growth(df, top).to_dict('records')
+    return summary
+
+def summary_json(df: pd.DataFrame, top: int = 10) -> str:
+    return json.dumps(summarize(df, top), indent=2, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze exported GitHub repository data")
+    parser.add_argument("files", nargs="+", help="gitselenium.py exports or state databases; several files form a history")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    df = load_repositories(args.files)
+    if df.empty:
+        print("❌ No repository rows found")
+        return
+    if args.json:
+        print(summary_json(df, args.top))
+        return
+
+    summary = summarize(df, args.top)
+    print(f"📦 {summary['counts']['total']} repositories in the latest snapshot")
+    labels = {'stars': "⭐ {:,} stars", 'forks': "🍴 {:,} forks", 'watchers': "👀 {:,} watchers"}
+    scraped_totals = [labels[column].format(total) for column, total in summary['totals'].items()]
+    if scraped_totals:
+        print(", ".join(scraped_totals))
+    for row in summary['languages'][:args.top]:
+        print(f"   {row['language']}: {row['repositories']} ({row['share']:.1%})")
+    for row in summary.get('growth', []):
+        if 'stars' in row:
+            print(f"📈 {row['snapshot']}: {row['stars']:,} stars ({row['stars_change']:+,})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List
+
+# Local record of every repository seen by gitselenium.py: the updated_at
+# shown on the repository list and the fields extracted last time, so a sync
+# only opens repositories that are new or changed.
+#
+# Rows are kept per login and per source: the browser lists the repositories
+# a user owns, the API also those they collaborate on, and several accounts
+# may share one state file. A sync only compares against and prunes its own
+# login's rows from its own source.
+
+DEFAULT_STATE_FILE = "github_repos_state.sqlite"
+
+SOURCE_BROWSER = "browser"
+SOURCE_API = "api"
+
+class RepoStateDB:
+    """SQLite table of extracted repositories keyed by (login, source, full_name)"""
+    def __init__(self, path: str = DEFAULT_STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(repos)")]
+        unscoped = columns and 'login' not in columns
+        if unscoped:
+            self.conn.execute("ALTER TABLE repos RENAME TO repos_unscoped")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS repos (
+                login TEXT NOT NULL,
+                source TEXT NOT NULL,
+                full_name TEXT NOT NULL,
+                listed_updated_at TEXT,
+                data TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (login, source, full_name)
+            )
+        """)
+        if unscoped:
+            # State files from before scoping held browser syncs, which only list the login's own repositories
+            self.conn.execute(
+                "INSERT INTO repos SELECT lower(substr(full_name, 1, instr(full_name, '/') - 1)), ?, full_name, "
+                "listed_updated_at, data, fetched_at FROM repos_unscoped", (SOURCE_BROWSER,))
+            self.conn.execute("DROP TABLE repos_unscoped")
+        self.conn.commit()
+
+    def get_many(self, login: str, source: str, full_names: List[str]) -> Dict[str, Dict]:
+        """full_name -> {'listed_updated_at', 'data'} for the names already stored for login from source"""
+        rows = {}
+        names = list(full_names)
+        with self.lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = self.conn.execute(
+                    "SELECT full_name, listed_updated_at, data FROM repos "
+                    f"WHERE login = ? AND source = ? AND full_name IN ({placeholders})",
+                    (login.lower(), source, *chunk))
+                for full_name, listed_updated_at, data in cursor:
+                    rows[full_name] = {'listed_updated_at': listed_updated_at, 'data': json.loads(data)}
+        return rows
+
+    def stale(self, login: str, source: str, listing: List[Dict], fields: List[str] = None) -> List[Dict]:
+        """
+        Listing entries that are new, changed, have no updated_at to compare,
+        or were stored by an earlier run without some of the requested fields
+        """
+        known = self.get_many(login, source, (entry['full_name'] for entry in listing))
+        return [
+            entry for entry in listing
+            if not entry.get('updated_at')
+            or entry['full_name'] not in known
+            or known[entry['full_name']]['listed_updated_at'] != entry['updated_at']
+            or (fields and not set(fields).issubset(known[entry['full_name']]['data']))
+        ]
+
+    def save_many(self, login: str, source: str, entries: List[Dict]):
+        """Store freshly extracted rows; each entry has full_name, updated_at and data"""
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO repos (login, source, full_name, listed_updated_at, data, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(login.lower(), source, entry['full_name'], entry.get('updated_at'), json.dumps(entry['data']),
+                  fetched_at)
+                 for entry in entries])
+            self.conn.commit()
+
+    def prune(self, login: str, source: str, keep_full_names: List[str]) -> int:
+        """Forget login's repositories from source that are no longer listed; returns how many were removed"""
+        keep = set(keep_full_names)
+        login = login.lower()
+        with self.lock:
+            stored = [row[0] for row in self.conn.execute(
+                "SELECT full_name FROM repos WHERE login = ? AND source = ?", (login, source))]
+            gone = [(login, source, full_name) for full_name in stored if full_name not in keep]
+            self.conn.executemany("DELETE FROM repos WHERE login = ? AND source = ? AND full_name = ?", gone)
+            self.conn.commit()
+        return len(gone)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from exporters import open_row_writer
+
+# Progress events published by EnhancedGitHubScraper. Subscribe with a callback:
+#
+#   scraper.events.subscribe(lambda event: print(event.kind, event.data))
+#
+# or consume them from asyncio while the scrape runs in a thread:
+#
+#   async for event in scraper.events.stream():
+#       ...
+
+REPO_DISCOVERED = "repo_discovered"
+REPO_FETCHED = "repo_fetched"
+REPO_FAILED = "repo_failed"
+EXPORT_FLUSHED = "export_flushed"
+SCRAPE_FINISHED = "scrape_finished"
+# Sent by close() to end every stream()
+STREAM_CLOSED = "stream_closed"
+
+class ScrapeEvent:
+    """One progress event: its kind, when it happened and its payload"""
+    def __init__(self, kind: str, data: Dict):
+        self.kind = kind
+        self.data = data
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        return f"ScrapeEvent({self.kind!r}, {self.data!r})"
+
+class EventBus:
+    """Thread-safe publish/subscribe for ScrapeEvents"""
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[ScrapeEvent], None], kinds: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Call callback for every event (or only the given kinds); returns an unsubscribe function"""
+        entry = (callback, frozenset(kinds) if kinds else None)
+        with self.lock:
+            self.subscribers.append(entry)
+
+        def unsubscribe():
+            with self.lock:
+                if entry in self.subscribers:
+                    self.subscribers.remove(entry)
+        return unsubscribe
+
+    def emit(self, kind: str, **data) -> ScrapeEvent:
+        event = ScrapeEvent(kind, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback, kinds in subscribers:
+            if kinds is not None and kind not in kinds:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                # A broken subscriber must not stop the scrape
+                logging.warning(f"⚠️ Event subscriber failed on {kind}: {e}")
+        return event
+
+    def close(self):
+        """End every open stream()"""
+        self.emit(STREAM_CLOSED)
+
+    async def stream(self, kinds: Optional[Iterable[str]] = None):
+        """Async iterator over events until close() is called"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        if kinds:
+            kinds = set(kinds) | {STREAM_CLOSED}
+        unsubscribe = self.subscribe(lambda event: loop.call_soon_threadsafe(queue.put_nowait, event), kinds)
+        try:
+            while True:
+                event = await queue.get()
+                if event.kind == STREAM_CLOSED:
+                    return
+                yield event
+        finally:
+            unsubscribe()
+
+class StreamingExport:
+    """
+    Subscriber that appends every fetched repository to a CSV or JSONL file
+    and flushes it, so partial results survive a crash.
+    """
+    def __init__(self, bus: EventBus, filename: str, fieldnames=None, append: bool = False):
+        self.bus = bus
+        self.filename = filename
+        self.writer = open_row_writer(filename, fieldnames=fieldnames, append=append)
+        self.lock = threading.Lock()
+        self.unsubscribe = bus.subscribe(self._on_fetched, [REPO_FETCHED])
+
+    def _on_fetched(self, event: ScrapeEvent):
+        row = event.data['data']
+        if self.filename.lower().endswith('.csv'):
+            # Same readable booleans as export_to_csv
+            row = {field: ('Yes' if value else 'No') if isinstance(value, bool) else value
+                   for field, value in row.items()}
+        with self.lock:
+            self.writer.write(row)
+            self.writer.flush()
+            rows = self.writer.stats.rows
+        self.bus.emit(EXPORT_FLUSHED, filename=self.filename, rows=rows)
+
+    def close(self):
+        self.unsubscribe()
+        with self.lock:
+            self.writer.close()
@@ -0,0 +1,283 @@
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Live metrics for long-running scrapes: counters, gauges and latency
+# histograms that every scraper reports into, served in Prometheus text
+# format and written as periodic JSON snapshots.
+#
+#   metrics = start_metrics(port=9108, snapshot_file="metrics.json")
+#   ...
+#   metrics.close()
+#
+#   curl localhost:9108/metrics
+#
+# RunMetrics (blocking.py) forwards its counters here, so blocks, browser
+# restarts and proxy failures show up without extra calls.
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+METRIC_NAME_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def metric_name(name):
+    """Prometheus-safe metric name"""
+    return METRIC_NAME_PATTERN.sub("_", name).lower()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound
+        return float("inf")
+
+class MetricsRegistry:
+    """Thread-safe named metrics, each with any number of label sets"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.help = {}
+        self.started = time.time()
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def describe(self, name, text):
+        self.help[metric_name(name)] = text
+
+    def inc(self, name, amount=1, **labels):
+        name = metric_name(name)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges.setdefault(metric_name(name), {})[self._key(labels)] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        name = metric_name(name)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            key = self._key(labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def time(self, name, **labels):
+        """Context manager observing how long its block took"""
+        return _Timer(self, name, labels)
+
+    def prometheus(self):
+        """Everything in Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            gauges = {**self.gauges, "scrape_uptime_seconds": {(): round(time.time() - self.started, 3)}}
+            for kind, metrics in (("counter", self.counters), ("gauge", gauges)):
+                for name in sorted(metrics):
+                    if name in self.help:
+                        lines.append(f"# HELP {name} {self.help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in sorted(metrics[name].items()):
+                        lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+            for name in sorted(self.histograms):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else _number(float(bound))
+                        lines.append(f"{name}_bucket{_label_text(labels + (('le', le),))} {total}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {_number(round(histogram.sum, 6))}")
+                    lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain-data view: counters, gauges and histogram count/sum/p50/p95"""
+        def series_name(name, labels):
+            return name + _label_text(labels)
+
+        with self.lock:
+            return {
+                'timestamp': time.time(),
+                'uptime_seconds': round(time.time() - self.started, 3),
+                'counters': {series_name(name, labels): value
+                             for name, series in self.counters.items() for labels, value in series.items()},
+                'gauges': {series_name(name, labels): value
+                           for name, series in self.gauges.items() for labels, value in series.items()},
+                'histograms': {
+                    series_name(name, labels): {
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 6),
+                        'p50': histogram.quantile(0.5),
+                        'p95': histogram.quantile(0.95),
+                    }
+                    for name, series in self.histograms.items() for labels, histogram in series.items()
+                },
+            }
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+# Process-wide registry the scrapers report into
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("scrape_pages_fetched_total", "Pages loaded over HTTP or in a browser")
+REGISTRY.describe("scrape_fetch_seconds", "Time to load one page")
+REGISTRY.describe("scrape_items_extracted_total", "Rows extracted from pages")
+REGISTRY.describe("scrape_selector_hits_total", "Lookups answered by each fallback selector")
+REGISTRY.describe("scrape_selector_misses_total", "Lookups no selector could answer")
+REGISTRY.describe("scrape_blocks_total", "Block, CAPTCHA or rate-limit pages seen")
+REGISTRY.describe("scrape_driver_restarts_total", "Browsers replaced after a block")
+REGISTRY.describe("scrape_proxy_failures_total", "Proxies that failed their health check")
+REGISTRY.describe("scrape_jobs_total", "Queue jobs handled, by kind and outcome")
+
+def _snapshot_with_rates(registry, previous):
+    snapshot = registry.snapshot()
+    if previous:
+        elapsed = max(1e-9, snapshot['timestamp'] - previous['timestamp'])
+        # Per-second rates since the last snapshot, for throughput alerts without Prometheus
+        snapshot['rates'] = {name: round((value - previous['counters'].get(name, 0)) / elapsed, 4)
+                             for name, value in snapshot['counters'].items()}
+    return snapshot
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body, content_type = self.registry.prometheus().encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+        elif self.path.split("?")[0] == "/metrics.json":
+            body, content_type = json.dumps(self.registry.snapshot(), indent=2).encode("utf-8"), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"metrics: {format % args}")
+
+class MetricsExporter:
+    """
+    Serves a registry on http://host:port/metrics (and /metrics.json) and/or
+    rewrites snapshot_file every interval seconds, until close()
+    """
+    def __init__(self, registry=REGISTRY, port=None, host="127.0.0.1", snapshot_file=None, interval=15.0):
+        self.registry = registry
+        self.snapshot_file = snapshot_file
+        self.interval = interval
+        self.server = None
+        self.stopped = threading.Event()
+        self.previous = None
+        self.threads = []
+
+        if port is not None:
+            handler = type("MetricsHandler", (_MetricsHandler,), {'registry': registry})
+            self.server = ThreadingHTTPServer((host, port), handler)
+            self.server.daemon_threads = True
+            self.threads.append(threading.Thread(target=self.server.serve_forever, daemon=True))
+            logging.info(f"📈 Metrics on http://{host}:{self.server.server_address[1]}/metrics")
+        if snapshot_file:
+            self.threads.append(threading.Thread(target=self._write_snapshots, daemon=True))
+            logging.info(f"📈 Metrics snapshots every {interval:g}s to {snapshot_file}")
+        for thread in self.threads:
+            thread.start()
+
+    @property
+    def url(self):
+        if not self.server:
+            return None
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def write_snapshot(self):
+        self.previous = _snapshot_with_rates(self.registry, self.previous)
+        tmp_path = self.snapshot_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.previous, f, indent=2)
+        os.replace(tmp_path, self.snapshot_file)
+
+    def _write_snapshots(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logging.warning(f"⚠️ Could not write metrics snapshot: {e}")
+
+    def close(self):
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        if self.snapshot_file:
+            # Final numbers for the finished run
+            self.write_snapshot()
+
+def start_metrics(port=None, snapshot_file=None, interval=15.0, registry=REGISTRY):
+    """MetricsExporter for --metrics-port / --metrics-file style options, or None if neither is set"""
+    if port is None and not snapshot_file:
+        return None
+    return MetricsExporter(registry, port, snapshot_file=snapshot_file, interval=interval)
+
+def add_metrics_arguments(parser):
+    """The --metrics-port / --metrics-file / --metrics-interval options shared by the scrapers"""
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port")
+    parser.add_argument("--metrics-file", help="write a JSON metrics snapshot to this file periodically")
+    parser.add_argument("--metrics-interval", type=float, default=15.0,
+                        help="seconds between JSON snapshots (default: %(default)s)")
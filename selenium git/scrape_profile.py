@@ -0,0 +1,270 @@
+import builtins
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# Sampling profiler for scraper runs. Every few milliseconds the stack of each
+# busy thread is recorded and put into a stage by the code it is in:
+# WebDriver round trips, HTML parsing, plain HTTP, export, sleeps or waiting
+# for the user. Every WebDriver command is also timed and counted under the
+# function that sent it.
+#
+#   with profiling("gitselenium_profile"):
+#       ...
+#
+# writes gitselenium_profile.collapsed, which flamegraph.pl, speedscope or
+# inferno read directly (one flame per stage), and gitselenium_profile_report.txt
+# with the hottest call sites and the WebDriver command table.
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 20
+
+# First matching frame from the root decides the stage of a sample
+STAGE_RULES = (
+    ("webdriver", ("/selenium/",)),
+    ("parse", ("/bs4/", "/lxml/", "/cssselect/", "/html/parser.py", "selector_registry.py")),
+    ("http", ("/requests/", "/urllib3/", "/http/client.py")),
+    ("export", ("/pandas/", "/pyarrow/", "/csv.py", "exporters.py")),
+)
+OTHER_STAGE = "python"
+
+# Leaf frames of threads that are parked, not working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socketserver.py", "serve_forever"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_real_sleep = time.sleep
+_real_input = builtins.input
+_real_execute = WebDriver.execute
+
+def _sleep(seconds):
+    return _real_sleep(seconds)
+
+def _input(prompt=""):
+    return _real_input(prompt)
+
+# Stand-in frames for blocking calls that have no Python frame of their own
+MARKER_STAGES = {_sleep.__code__: "sleep", _input.__code__: "user_input"}
+MARKER_LABELS = {_sleep.__code__: "time.sleep", _input.__code__: "input"}
+
+def _normalized(path):
+    return path.replace(os.sep, "/")
+
+def frame_label(code):
+    """'function (file.py:first line)', stable across samples of the same function"""
+    if code in MARKER_LABELS:
+        return MARKER_LABELS[code]
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def stage_of(codes):
+    """Stage of a root-to-leaf stack of code objects"""
+    for code in codes:
+        if code in MARKER_STAGES:
+            return MARKER_STAGES[code]
+        path = _normalized(code.co_filename)
+        for stage, markers in STAGE_RULES:
+            if any(marker in path for marker in markers):
+                return stage
+    return OTHER_STAGE
+
+def _caller_outside_selenium(frame):
+    this_file = _normalized(__file__)
+    while frame is not None:
+        path = _normalized(frame.f_code.co_filename)
+        if "/selenium/" not in path and path != this_file:
+            return f"{frame.f_code.co_name} ({os.path.basename(path)}:{frame.f_lineno})"
+        frame = frame.f_back
+    return "?"
+
+class Profiler:
+    """
+    Wall-clock stack sampler plus WebDriver command accounting. Only one
+    profiler can run at a time: start() patches time.sleep, input and
+    WebDriver.execute until stop().
+    """
+    active = None
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.commands = defaultdict(lambda: [0, 0.0])
+        self.commands_lock = threading.Lock()
+        self.ticks = 0
+        self.elapsed = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if Profiler.active is not None:
+            raise RuntimeError("A profiler is already running")
+        Profiler.active = self
+        profiler = self
+
+        def execute(driver, driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return _real_execute(driver, driver_command, params)
+            finally:
+                command = driver_command if isinstance(driver_command, str) else "bidi"
+                profiler._count_command(command, _caller_outside_selenium(sys._getframe(1)),
+                                        time.perf_counter() - start)
+
+        self._execute_code = execute.__code__
+        time.sleep = _sleep
+        builtins.input = _input
+        WebDriver.execute = execute
+        self.thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self.started = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        time.sleep = _real_sleep
+        builtins.input = _real_input
+        WebDriver.execute = _real_execute
+        Profiler.active = None
+        return self
+
+    def _count_command(self, command, caller, seconds):
+        with self.commands_lock:
+            entry = self.commands[(command, caller)]
+            entry[0] += 1
+            entry[1] += seconds
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self.stopped.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(frame)
+            self.ticks += 1
+            _real_sleep(self.interval)
+
+    def _sample(self, frame):
+        leaf = frame
+        if (os.path.basename(leaf.f_code.co_filename), leaf.f_code.co_name) in IDLE_FRAMES:
+            return
+        codes = []
+        while frame is not None:
+            # The WebDriver.execute wrapper is bookkeeping, not part of the program
+            if frame.f_code is not self._execute_code:
+                codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        self.samples[(tuple(codes), leaf.f_code, leaf.f_lineno)] += 1
+
+    @property
+    def seconds_per_sample(self):
+        # Sampling slips under load, so scale by the measured tick rate rather than the nominal interval
+        return self.elapsed / self.ticks if self.ticks else self.interval
+
+    def collapsed_stacks(self):
+        """Brendan Gregg's collapsed format: 'stage;root;...;leaf count', one line per distinct stack"""
+        stacks = Counter()
+        for (codes, _leaf, _line), count in self.samples.items():
+            stacks[";".join([stage_of(codes)] + [frame_label(code) for code in codes])] += count
+        return [f"{stack} {count}" for stack, count in sorted(stacks.items())]
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+
+    def stage_totals(self):
+        totals = Counter()
+        for (codes, _leaf, _line), count in self.samples.items():
+            totals[stage_of(codes)] += count
+        return totals
+
+    def hottest_lines(self, top=DEFAULT_TOP):
+        """(samples, 'function (file:line)', stage) for the lines the samples were executing"""
+        lines = Counter()
+        for (codes, leaf, line), count in self.samples.items():
+            label = MARKER_LABELS.get(leaf) or f"{leaf.co_name} ({os.path.basename(leaf.co_filename)}:{line})"
+            lines[(label, stage_of(codes))] += count
+        return [(count, label, stage) for (label, stage), count in lines.most_common(top)]
+
+    def hottest_functions(self, top=DEFAULT_TOP):
+        """(samples, function) by time spent in a function and everything it called"""
+        inclusive = Counter()
+        for (codes, _leaf, _line), count in self.samples.items():
+            for code in set(codes):
+                inclusive[code] += count
+        return [(count, frame_label(code)) for code, count in inclusive.most_common(top)]
+
+    def command_table(self, top=DEFAULT_TOP):
+        """(count, total seconds, command, caller) for the WebDriver commands that took longest"""
+        with self.commands_lock:
+            rows = [(count, seconds, command, caller) for (command, caller), (count, seconds) in self.commands.items()]
+        return sorted(rows, key=lambda row: -row[1])[:top]
+
+    def report(self, top=DEFAULT_TOP):
+        per_sample = self.seconds_per_sample
+        total = sum(self.samples.values()) or 1
+        lines = [f"🔬 Profile: {self.elapsed:.1f}s wall, {self.ticks} ticks of {per_sample * 1000:.1f} ms, "
+                 f"{total} busy-thread samples", "", "Time by stage:"]
+        for stage, count in self.stage_totals().most_common():
+            lines.append(f"  {stage:<12} {count / total:6.1%}  {count * per_sample:8.2f}s")
+
+        lines += ["", f"Hottest call sites (top {top}, time on the line itself):"]
+        for count, label, stage in self.hottest_lines(top):
+            lines.append(f"  {count / total:6.1%}  {count * per_sample:8.2f}s  {label}  [{stage}]")
+
+        lines += ["", f"Hottest functions (top {top}, including callees):"]
+        for count, label in self.hottest_functions(top):
+            lines.append(f"  {count / total:6.1%}  {count * per_sample:8.2f}s  {label}")
+
+        commands = self.command_table(top)
+        if commands:
+            lines += ["", "WebDriver commands by caller:", "   count   total s   mean ms  command  <-  caller"]
+            for count, seconds, command, caller in commands:
+                lines.append(f"  {count:6d}  {seconds:8.2f}  {seconds / count * 1000:8.1f}  {command}  <-  {caller}")
+        return "\n".join(lines)
+
+@contextmanager
+def profiling(prefix=None, interval=DEFAULT_INTERVAL, top=DEFAULT_TOP):
+    """
+    Profile the block when prefix is set: writes <prefix>.collapsed and
+    <prefix>_report.txt and prints the report. Without a prefix it does nothing.
+    """
+    if not prefix:
+        yield None
+        return
+
+    profiler = Profiler(interval).start()
+    logging.info(f"🔬 Profiling every {interval * 1000:g} ms")
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        report = profiler.report(top)
+        profiler.write_collapsed(f"{prefix}.collapsed")
+        with open(f"{prefix}_report.txt", "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print("\n" + report)
+        logging.info(f"🔬 Flamegraph stacks in {prefix}.collapsed, report in {prefix}_report.txt")
+
+def add_profile_arguments(parser, prefix):
+    """The --profile / --profile-interval / --profile-top options shared by the scrapers"""
+    parser.add_argument("--profile", nargs="?", const=prefix, metavar="PREFIX",
+                        help=f"profile the run and write PREFIX.collapsed and PREFIX_report.txt (default: {prefix})")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL * 1000, metavar="MS",
+                        help="milliseconds between stack samples (default: %(default)s)")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP, help="rows per report table (default: %(default)s)")
+
+def profiling_from_args(args):
+    """profiling() for the options add_profile_arguments added"""
+    return profiling(args.profile, args.profile_interval / 1000, args.profile_top)
@@ -10,12 +10,30 @@ import requests
 from bs4 import BeautifulSoup
 import random
 import logging
+import lxml.html
+from lxml.cssselect import CSSSelector
+from functools import lru_cache
 from urllib.parse import quote
 import os
+from blocking import BlockedError, ProxyPool, RunMetrics, detect_driver_block
+from fetch_store import Fetcher, fetcher_from_args
+from scrape_metrics import REGISTRY, start_metrics
+from scrape_profile import profiling
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# How many times a blocked page is retried with a fresh proxy and browser
+MAX_BLOCK_RETRIES = 3
+
+# FLIPKART_BASE_URL points the scraper at another host, e.g. mock_marketplace.py
+FLIPKART_URL = os.environ.get("FLIPKART_BASE_URL", "https://www.flipkart.com").rstrip("/")
+
+def search_url(keyword, page=1, base_url=None):
+    """Search results URL for one page"""
+    url = f"{(base_url or FLIPKART_URL).rstrip('/')}/search?q={quote(keyword)}"
+    return url if page == 1 else f"{url}&page={page}"
+
 def get_free_proxies():
     """Fetch free proxies from free-proxy-list.net"""
     try:
@@ -172,163 +190,202 @@ def debug_page_structure(driver, debug_mode=True):
     except Exception as e:
         logging.error(f"Debug error: {e}")
 
-def scrape_flipkart_updated(keyword, max_pages=1, use_proxy=False, debug_mode=True):
-    """Updated scraping function with better selectors"""
+# Product containers, tried in order; the first one that yields products wins
+CONTAINER_SELECTORS = [
+    "._1AtVbE",  # Old selector
+    "._2kHMtA",  # Another container
+    "._13oc-S",  # Product row
+    ".s1Q9rs",   # Product name direct
+    "._3pLy-c",  # Grid container
+    "[data-id]"  # Data attribute
+]
+NAME_SELECTORS = [
+    ".s1Q9rs",
+    "._4rR01T",
+    ".IRpwTa",
+    "a[title]",
+    ".KzDlHZ",
+    "._2WkVRV .IRpwTa",
+    ".col-7-12 ._4rR01T"
+]
+PRICE_SELECTORS = [
+    "._30jeq3",
+    "._1_WHN1",
+    ".Nx9bqj",
+    "._3I9_wc",
+    ".CEmiEU"
+]
+RATING_SELECTOR = "._3LWZlK, ._2d4LTz"
+MAX_PRODUCTS_PER_CONTAINER = 20
+
+@lru_cache(maxsize=64)
+def compile_css(selector):
+    """Compile a CSS selector once for lxml"""
+    return CSSSelector(selector)
+
+def element_text(element):
+    """Text of an lxml element with whitespace collapsed"""
+    return " ".join(element.text_content().split())
+
+def _first_match(container, selectors, accept, field, title=False):
+    """First value from the selectors that passes accept, or None"""
+    for selector in selectors:
+        for element in compile_css(selector)(container)[:1]:
+            value = (title and element.get("title")) or element_text(element)
+            if accept(value):
+                REGISTRY.inc("scrape_selector_hits_total", field=field, selector=selector)
+                return value
+    REGISTRY.inc("scrape_selector_misses_total", field=field)
+    return None
+
+def extract_products(html, page, debug_mode=False):
+    """
+    Products on one search results page. Works on page_source, so the same
+    code runs on live pages and on recorded ones.
+    """
+    tree = lxml.html.fromstring(html)
+    for container_selector in CONTAINER_SELECTORS:
+        containers = compile_css(container_selector)(tree)
+        if not containers:
+            continue
+        logging.info(f"Found {len(containers)} containers with: {container_selector}")
+        REGISTRY.inc("scrape_selector_hits_total", field="container", selector=container_selector)
+        
+        product_data = []
+        for i, container in enumerate(containers[:MAX_PRODUCTS_PER_CONTAINER]):
+            product_name = _first_match(container, NAME_SELECTORS, lambda value: value and len(value) > 5, 'name', title=True)
+            product_price = _first_match(container, PRICE_SELECTORS, lambda value: value and '₹' in value, 'price')
+            ratings = compile_css(RATING_SELECTOR)(container)
+            rating = element_text(ratings[0]) if ratings else None
+            
+            if product_name and product_price:
+                product_data.append({
+                    'Product': product_name,
+                    'Price': product_price,
+                    'Rating': rating or 'N/A',
+                    'Page': page,
+                    'Container': container_selector
+                })
+                if debug_mode and i < 3:  # Log first 3 products for debugging
+                    logging.info(f"Product {i+1}: {product_name[:50]} - {product_price}")
+        
+        if product_data:
+            return product_data  # Use first working selector
+    
+    REGISTRY.inc("scrape_selector_misses_total", field="container")
+    if debug_mode:
+        # Try to find any links that might be products
+        product_links = [href for href in tree.xpath("//a/@href") if 'p[' in href]
+        logging.info(f"Found {len(product_links)} potential product links")
+    return []
+
+def load_search_page(driver, url, metrics, proxy_pool, proxy, fetcher):
+    """
+    Open a results page, retrying blocks with a fresh proxy and browser.
+    Returns (driver, proxy, html); html is None when the page stayed blocked.
+    """
+    for attempt in range(MAX_BLOCK_RETRIES + 1):
+        logging.info(f"Navigating to: {url}")
+        started = time.perf_counter()
+        driver.get(url)
+        metrics.increment('pages_fetched', mode='browser')
+        metrics.observe('fetch', time.perf_counter() - started, mode='browser')
+        
+        # Wait for page to load
+        time.sleep(random.uniform(3, 6))
+        
+        # Close popups
+        close_popups(driver)
+        
+        block_reason = detect_driver_block(driver)
+        if not block_reason:
+            return driver, proxy, fetcher.page_source(url, driver)
+        
+        # Blocked: drop this identity and retry the page with a fresh one
+        metrics.increment('blocks')
+        logging.warning(f"🚧 {url} blocked ({block_reason}), attempt {attempt + 1}/{MAX_BLOCK_RETRIES + 1}")
+        if attempt == MAX_BLOCK_RETRIES:
+            break
+        
+        if proxy_pool:
+            proxy_pool.retire(proxy)
+            proxy = proxy_pool.current()
+        driver.quit()
+        driver = setup_driver(proxy)
+        metrics.increment('driver_restarts')
+        time.sleep(random.uniform(5, 10))
+    
+    logging.error(f"Giving up on {url}: still blocked after {MAX_BLOCK_RETRIES} retries")
+    return driver, proxy, None
+
+def scrape_flipkart_updated(keyword, max_pages=1, use_proxy=False, debug_mode=True, fetcher=None, start_page=1,
+                            raise_errors=False, base_url=None):
+    """Updated scraping function with better selectors
+    
+    With a replaying fetcher the pages come from a recording and no browser
+    is started; a recording fetcher saves every page it reads. max_pages
+    pages are scraped from start_page on. With raise_errors a blocked page
+    or any other error is raised instead of logged (for queue workers).
+    base_url overrides FLIPKART_URL.
+    """
     logging.info(f"Starting scrape for keyword: {keyword}")
     
+    metrics = RunMetrics('flipkart')
+    fetcher = fetcher or Fetcher()
+    
     # Get proxies if needed
-    proxy = None
-    if use_proxy:
-        proxies = get_free_proxies()
-        if proxies:
-            proxy = get_working_proxy(proxies)
+    proxy_pool = ProxyPool(get_free_proxies, test_proxy, metrics=metrics) if use_proxy and not fetcher.replaying else None
+    proxy = proxy_pool.current() if proxy_pool else None
     
     # Setup driver
-    driver = setup_driver(proxy)
+    driver = None if fetcher.replaying else setup_driver(proxy)
     
     all_product_data = []
     
     try:
-        for page in range(1, max_pages + 1):
-            logging.info(f"Scraping page {page}/{max_pages}")
-            
-            # Construct URL
-            if page == 1:
-                url = f"https://www.flipkart.com/search?q={quote(keyword)}"
-            else:
-                url = f"https://www.flipkart.com/search?q={quote(keyword)}&page={page}"
-            
-            logging.info(f"Navigating to: {url}")
-            driver.get(url)
-            
-            # Wait for page to load
-            time.sleep(random.uniform(3, 6))
+        last_page = start_page + max_pages - 1
+        for page in range(start_page, last_page + 1):
+            logging.info(f"Scraping page {page}/{last_page}")
             
-            # Close popups
-            close_popups(driver)
+            url = search_url(keyword, page, base_url)
             
-            # Debug page structure
-            if debug_mode:
-                debug_page_structure(driver, debug_mode)
-            
-            # Try multiple approaches to find products
-            product_data = []
-            
-            # Approach 1: Look for main product containers
-            container_selectors = [
-                "._1AtVbE",  # Old selector
-                "._2kHMtA",  # Another container
-                "._13oc-S",  # Product row
-                ".s1Q9rs",   # Product name direct
-                "._3pLy-c",  # Grid container
-                "[data-id]"  # Data attribute
-            ]
-            
-            products_found = False
-            for container_selector in container_selectors:
-                try:
-                    containers = driver.find_elements(By.CSS_SELECTOR, container_selector)
-                    if containers:
-                        logging.info(f"Found {len(containers)} containers with: {container_selector}")
-                        
-                        for i, container in enumerate(containers[:20]):  # Limit to first 20
-                            try:
-                                # Extract product name
-                                name_selectors = [
-                                    ".s1Q9rs",
-                                    "._4rR01T", 
-                                    ".IRpwTa",
-                                    "a[title]",
-                                    ".KzDlHZ",
-                                    "._2WkVRV .IRpwTa",
-                                    ".col-7-12 ._4rR01T"
-                                ]
-                                
-                                product_name = None
-                                for name_sel in name_selectors:
-                                    try:
-                                        name_elem = container.find_element(By.CSS_SELECTOR, name_sel)
-                                        product_name = name_elem.get_attribute("title") or name_elem.text.strip()
-                                        if product_name and len(product_name) > 5:
-                                            break
-                                    except:
-                                        continue
-                                
-                                # Extract price
-                                price_selectors = [
-                                    "._30jeq3",
-                                    "._1_WHN1", 
-                                    ".Nx9bqj",
-                                    "._3I9_wc",
-                                    ".CEmiEU"
-                                ]
-                                
-                                product_price = None
-                                for price_sel in price_selectors:
-                                    try:
-                                        price_elem = container.find_element(By.CSS_SELECTOR, price_sel)
-                                        product_price = price_elem.text.strip()
-                                        if product_price and '₹' in product_price:
-                                            break
-                                    except:
-                                        continue
-                                
-                                # Extract rating
-                                rating = None
-                                try:
-                                    rating_elem = container.find_element(By.CSS_SELECTOR, "._3LWZlK, ._2d4LTz")
-                                    rating = rating_elem.text.strip()
-                                except:
-                                    pass
-                                
-                                if product_name and product_price:
-                                    product_data.append({
-                                        'Product': product_name,
-                                        'Price': product_price,
-                                        'Rating': rating or 'N/A',
-                                        'Page': page,
-                                        'Container': container_selector
-                                    })
-                                    products_found = True
-                                    
-                                    if debug_mode and i < 3:  # Log first 3 products for debugging
-                                        logging.info(f"Product {i+1}: {product_name[:50]} - {product_price}")
-                            
-                            except Exception as e:
-                                if debug_mode:
-                                    logging.debug(f"Error extracting from container {i}: {e}")
-                                continue
-                        
-                        if products_found:
-                            break  # Use first working selector
-                            
-                except Exception as e:
-                    logging.debug(f"Error with container selector {container_selector}: {e}")
+            if fetcher.replaying:
+                html = fetcher.page_source(url)
+            else:
+                driver, proxy, html = load_search_page(driver, url, metrics, proxy_pool, proxy, fetcher)
+                if html is None:
+                    if raise_errors:
+                        raise BlockedError("still blocked after retries", url)
                     continue
+                
+                # Debug page structure
+                if debug_mode:
+                    debug_page_structure(driver, debug_mode)
             
-            if not products_found:
+            product_data = extract_products(html, page, debug_mode)
+            if not product_data:
                 logging.warning(f"No products found on page {page}")
-                if debug_mode:
-                    # Try to find any clickable elements that might be products
-                    all_links = driver.find_elements(By.TAG_NAME, "a")
-                    product_links = [link for link in all_links if 'p[' in link.get_attribute('href') or '']
-                    logging.info(f"Found {len(product_links)} potential product links")
             
             logging.info(f"Extracted {len(product_data)} products from page {page}")
+            metrics.increment('items_extracted', len(product_data))
             all_product_data.extend(product_data)
             
             # Random delay between pages
-            if page < max_pages:
+            if page < last_page and not fetcher.replaying:
                 time.sleep(random.uniform(3, 7))
     
     except Exception as e:
+        if raise_errors:
+            raise
         logging.error(f"Error during scraping: {e}")
         import traceback
         logging.error(traceback.format_exc())
     
     finally:
-        driver.quit()
-        logging.info("Driver closed")
+        if driver:
+            driver.quit()
+            logging.info("Driver closed")
+        metrics.log_summary()
     
     return all_product_data
 
@@ -364,14 +421,26 @@ if __name__ == "__main__":
     MAX_PAGES = 1          # 📄 Start with 1 page for debugging
     USE_PROXY = False      # 🔒 Disable proxy for debugging
     DEBUG_MODE = True      # 🐛 Enable debug mode
+    RECORD_DIR = None      # ⏺️ Save every page read here for offline re-runs
+    REPLAY_DIR = None      # ⏯️ Re-run extraction on a recording or WARC archive, no browser or network
+    ARCHIVE_DIR = None     # 🗄️ Keep every page read in WARC files (warc_archive.py extract re-runs them)
+    METRICS_PORT = None    # 📈 Serve live metrics on http://127.0.0.1:<port>/metrics
+    METRICS_FILE = None    # 📈 Write a JSON metrics snapshot here every 15 seconds
+    PROFILE = None         # 🔬 e.g. "scrapp_profile": write scrapp_profile.collapsed (flamegraph) and a hotspot report
     
     # Start scraping
+    exporter = start_metrics(METRICS_PORT, METRICS_FILE)
     try:
-        products = scrape_flipkart_updated(KEYWORD, MAX_PAGES, USE_PROXY, DEBUG_MODE)
-        save_to_csv(products, f'flipkart_{KEYWORD.replace(" ", "_")}.csv')
+        fetcher = fetcher_from_args(RECORD_DIR, REPLAY_DIR, ARCHIVE_DIR)
+        with profiling(PROFILE):
+            products = scrape_flipkart_updated(KEYWORD, MAX_PAGES, USE_PROXY, DEBUG_MODE, fetcher)
+            save_to_csv(products, f'flipkart_{KEYWORD.replace(" ", "_")}.csv')
     except KeyboardInterrupt:
         logging.info("Scraping interrupted by user")
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
         import traceback
-        logging.error(traceback.format_exc())
\ No newline at end of file
+        logging.error(traceback.format_exc())
+    finally:
+        if exporter:
+            exporter.close()
\ No newline at end of file
@@ -1,6 +1,10 @@
+import argparse
+import json
+import threading
 import time
 import random
 import logging
+import numpy as np
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -8,11 +12,23 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from collections import Counter
+import os
 import re
 import requests
+import lxml.html
+from lxml.cssselect import CSSSelector
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from urllib.parse import quote
+from functools import lru_cache
+from urllib.parse import quote, urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from blocking import BlockedError, ProxyPool, RunMetrics, detect_block, detect_driver_block
+from exporters import ListRowWriter, is_supported_export, open_row_writer
+from fetch_store import Fetcher, ReplayMiss, fetcher_from_args
+from scrape_metrics import add_metrics_arguments, start_metrics
+from scrape_profile import add_profile_arguments, profiling_from_args
 
 # Logging setup
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -21,6 +37,23 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 CHROME_DRIVER_PATH = r"C:\Users\nihal\OneDrive\Desktop\web scrapping\137.0.7151.68 chromedriver-win64\chromedriver-win64\chromedriver.exe"
 BROWSER_BINARY_PATH = r"C:\Users\nihal\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe"
 
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Remembers per domain whether plain HTTP is enough or a browser is needed
+RENDER_MODES_FILE = "render_modes.json"
+
+# How many times a blocked page is retried with a fresh proxy and browser
+MAX_BLOCK_RETRIES = 3
+
+# Blocks, proxy retirements and browser restarts across the current run
+run_metrics = RunMetrics('generic')
+
+# Live by default; batch --record / --replay / --archive switch it over
+fetcher = Fetcher()
+
 def get_free_proxies():
     """Fetch free proxies from free-proxy-list.net"""
     try:
@@ -116,28 +149,24 @@ def setup_driver(headless=False, use_proxy=False, proxy=None):
     if headless:
         options.add_argument("--headless")
         
-    options.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
+    options.add_argument(f"--user-agent={USER_AGENT}")
     
     service = Service(executable_path=CHROME_DRIVER_PATH)
     driver = webdriver.Chrome(service=service, options=options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     return driver
 
-def analyze_website_structure(url, wait_time=10, use_proxy=False):
+def analyze_website_structure(url, wait_time=10, use_proxy=False, headless=False, proxy=None):
     """
     Analyze website structure and detect potential scrapeable elements
     """
     # Setup proxy if requested
-    proxy = None
-    if use_proxy:
+    if use_proxy and not proxy:
         proxies = get_free_proxies()
         if proxies:
             proxy = get_working_proxy(proxies)
     
-    driver = setup_driver(headless=False, use_proxy=use_proxy, proxy=proxy)
+    driver = setup_driver(headless=headless, use_proxy=use_proxy, proxy=proxy)
     detected_patterns = {}
     
     try:
@@ -313,6 +342,13 @@ def identify_data_types(sample_data):
     
     return summary
 
+# Text classification patterns, compiled once
+PRICE_PATTERN = re.compile(r'[\$€£¥₹]\s*\d+|^\d+[\.\,]\d+\s*[\$€£¥₹]?$')
+RATING_PATTERN = re.compile(r'\d+[\.\,]\d*\s*[/★⭐]|\d+\s*star|rating')
+DATE_PATTERN = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}')
+
+
+@lru_cache(maxsize=65536)
 def classify_text(text):
     """
     Classify text into categories
@@ -320,15 +356,15 @@ def classify_text(text):
     text = text.lower().strip()
     
     # Price patterns
-    if re.search(r'[\$€£¥₹]\s*\d+|^\d+[\.\,]\d+\s*[\$€£¥₹]?$', text):
+    if PRICE_PATTERN.search(text):
         return 'price'
     
     # Rating patterns
-    if re.search(r'\d+[\.\,]\d*\s*[/★⭐]|\d+\s*star|rating', text):
+    if RATING_PATTERN.search(text):
         return 'rating'
     
     # Date patterns
-    if re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}', text):
+    if DATE_PATTERN.search(text):
         return 'date'
     
     # Title/Name (longer text, likely headings)
@@ -345,6 +381,29 @@ def classify_text(text):
     
     return 'text'
 
+def classify_series(series):
+    """
+    Classify a whole pandas column at once, same rules as classify_text
+    """
+    text = series.fillna('').astype(str).str.lower().str.strip()
+    lengths = text.str.len()
+    conditions = [
+        text.str.contains(PRICE_PATTERN),
+        text.str.contains(RATING_PATTERN),
+        text.str.contains(DATE_PATTERN),
+        (lengths > 10) & (lengths < 100),
+        lengths > 50,
+        lengths < 20,
+    ]
+    choices = ['price', 'rating', 'date', 'title/name', 'description', 'label/tag']
+    return pd.Series(np.select(conditions, choices, default='text'), index=series.index)
+
+def classify_values(values):
+    """
+    Types of a batch of values via classify_series, for ColumnStats
+    """
+    return classify_series(pd.Series(values, dtype=object))
+
 def display_detected_patterns(patterns):
     """
     Display detected patterns to user for selection
@@ -422,6 +481,21 @@ def get_user_selection(patterns):
                         'preview': field_preview
                     }
                     field_counter += 1
+                    
+                    # Links and images also offer their URL, read in the same pass
+                    attr = {'links': 'href', 'images': 'src'}.get(field_type)
+                    if attr:
+                        print(f"[{field_counter}] {field_key}_{attr}")
+                        print(f"    Preview: <{attr} of the element above>")
+                        print(f"    Selector: {elem_info['selector']}@{attr}")
+                        
+                        available_fields[field_counter] = {
+                            'name': f"{field_key}_{attr}",
+                            'selector': elem_info['selector'],
+                            'attr': attr,
+                            'preview': f"<{attr}>"
+                        }
+                        field_counter += 1
     
     # Let user select which fields to scrape
     print(f"\nSelect fields to scrape (comma-separated, e.g., 1,3,5) or 'all': ")
@@ -442,67 +516,745 @@ def get_user_selection(patterns):
     
     return pattern_info, selected_fields
 
-def scrape_selected_data(url, container_selector, selected_fields, max_items=50, use_proxy=False, proxy=None):
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
     """
-    Scrape data based on user's selection with proxy support
+    Shared requests session with a connection pool sized for batch workers
     """
-    # Setup proxy if needed
-    if use_proxy and not proxy:
-        proxies = get_free_proxies()
-        if proxies:
-            proxy = get_working_proxy(proxies)
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _http_session = session
+    return _http_session
+
+class RenderModeCache:
+    """
+    Per-domain 'static' / 'browser' decisions, persisted between runs
+    """
+    def __init__(self, filename=RENDER_MODES_FILE):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.modes = {}
+        if filename and os.path.exists(filename):
+            try:
+                with open(filename, encoding='utf-8') as f:
+                    self.modes = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ Ignoring unreadable {filename}: {e}")
+    
+    def get(self, url):
+        return self.modes.get(urlparse(url).netloc)
+    
+    def remember(self, url, mode):
+        domain = urlparse(url).netloc
+        with self.lock:
+            if self.modes.get(domain) == mode:
+                return
+            self.modes[domain] = mode
+            if self.filename:
+                with open(self.filename, 'w', encoding='utf-8') as f:
+                    json.dump(self.modes, f, indent=2)
+        logging.info(f"🧭 {domain} marked as {mode}")
+
+render_modes = RenderModeCache()
+
+@lru_cache(maxsize=256)
+def compile_css(selector):
+    """
+    Compile a CSS selector once for lxml
+    """
+    return CSSSelector(selector)
+
+def element_text(element):
+    """
+    Visible-ish text of an lxml element with whitespace collapsed
+    """
+    return " ".join(element.text_content().split())
+
+FIELD_ATTR_PATTERN = re.compile(r'^(.*\S)@([A-Za-z_][\w:-]*)$')
+URL_ATTRIBUTES = {'href', 'src'}
+
+def field_specs(selected_fields):
+    """
+    Normalise selected fields to (name, css selector, attribute or None).
+    An attribute comes from field_info['attr'] or a trailing '@attr' on the
+    selector, e.g. 'a.title@href'.
+    """
+    specs = []
+    for field_info in selected_fields.values():
+        selector = field_info['selector']
+        attr = field_info.get('attr')
+        match = FIELD_ATTR_PATTERN.match(selector)
+        if not attr and match and selector.rfind('@') > selector.rfind(']'):
+            selector, attr = match.groups()
+        specs.append((field_info['name'], selector, attr))
+    return specs
+
+def extract_rows_from_tree(tree, container_selector, selected_fields, max_items=50):
+    """
+    Extract rows from a parsed lxml tree, or None if no containers are present
+    """
+    containers = compile_css(container_selector)(tree)
+    if not containers:
+        return None
     
-    driver = setup_driver(headless=False, use_proxy=use_proxy, proxy=proxy)
-    scraped_data = []
+    base_url = tree.getroottree().docinfo.URL
+    fields = [(name, compile_css(selector), attr) for name, selector, attr in field_specs(selected_fields)]
+    rows = []
+    for container in containers[:max_items]:
+        item_data = {}
+        for field_name, selector, attr in fields:
+            matches = selector(container)
+            if not matches:
+                value = None
+            elif attr:
+                value = matches[0].get(attr)
+                if value and base_url and attr in URL_ATTRIBUTES:
+                    value = urljoin(base_url, value)
+            else:
+                value = element_text(matches[0])
+            item_data[field_name] = "N/A" if value is None else value
+        rows.append(item_data)
+    return rows
+
+def extract_rows_from_html(html, container_selector, selected_fields, max_items=50):
+    """
+    Extract rows from raw HTML with lxml, or None if no containers are present
+    """
+    return extract_rows_from_tree(lxml.html.fromstring(html), container_selector, selected_fields, max_items)
+
+def fetch_static_tree(url, proxy=None):
+    """
+    Fetch a page over plain HTTP and parse it, or None if that did not work
+    """
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+    started = time.perf_counter()
+    try:
+        response = fetcher.fetch(url, get_http_session(), timeout=15, proxies=proxies)
+    except requests.RequestException as e:
+        logging.info(f"🌐 HTTP fetch failed for {url}: {e}")
+        return None
+    run_metrics.increment('pages_fetched', mode=fetcher.source('http'))
+    run_metrics.observe('fetch', time.perf_counter() - started, mode=fetcher.source('http'))
+    
+    block_reason = detect_block(status=response.status)
+    if response.status != 200 or 'html' not in response.content_type:
+        logging.info(f"🌐 HTTP {response.status} for {url}, needs a browser")
+        if block_reason:
+            run_metrics.increment('blocks')
+        return None
     
     try:
+        tree = lxml.html.fromstring(response.html, base_url=response.final_url)
+    except (ValueError, lxml.etree.ParserError) as e:
+        # A str with an <?xml encoding=...?> declaration, or an empty body
+        logging.info(f"🌐 Could not parse HTML from {url} ({e}), needs a browser")
+        return None
+    block_reason = detect_block(title=tree.findtext('.//title'), html=response.html)
+    if block_reason:
+        # A plain client getting challenged is exactly when a real browser is needed
+        logging.info(f"🚧 HTTP client blocked on {url} ({block_reason}), needs a browser")
+        run_metrics.increment('blocks')
+        return None
+    return tree
+
+def _static_page(url, container_selector, selected_fields, max_items=50, proxy=None, limiter=None):
+    """
+    Fetch and extract one page over HTTP, returning (tree, rows) or (None, None)
+    """
+    if limiter:
+        limiter.wait()
+    tree = fetch_static_tree(url, proxy)
+    if tree is None:
+        return None, None
+    
+    rows = extract_rows_from_tree(tree, container_selector, selected_fields, max_items)
+    if not rows:
+        return tree, None
+    
+    # Containers in the raw HTML but every field empty means the content is filled in by JS
+    if all(value == "N/A" for row in rows for value in row.values()):
+        return tree, None
+    return tree, rows
+
+def scrape_page_static(url, container_selector, selected_fields, max_items=50, proxy=None, limiter=None):
+    """
+    Try a page over plain HTTP; returns None when a browser is needed
+    """
+    return _static_page(url, container_selector, selected_fields, max_items, proxy, limiter)[1]
+
+NEXT_LINK_SELECTORS = [
+    "a[rel~='next']",
+    "link[rel~='next']",
+    "a[aria-label*='Next']",
+    "a[aria-label*='next']",
+]
+NEXT_LINK_TEXTS = {'next', 'next page', 'next ›', 'next »', 'next >', '›', '»', '>'}
+PAGE_PARAM_PATTERN = re.compile(r'([?&](?:page|pg|p)=)(\d+)', re.IGNORECASE)
+
+def find_next_page_url(tree, base_url):
+    """
+    Find the "next page" link in a parsed page, as an absolute URL
+    """
+    for selector in NEXT_LINK_SELECTORS:
+        for link in compile_css(selector)(tree):
+            href = link.get('href')
+            if href and not href.startswith(('#', 'javascript:')):
+                return urljoin(base_url, href)
+    
+    for link in tree.iterfind('.//a[@href]'):
+        if " ".join(link.text_content().split()).lower() in NEXT_LINK_TEXTS:
+            href = link.get('href')
+            if not href.startswith(('#', 'javascript:')):
+                return urljoin(base_url, href)
+    return None
+
+def page_url_builder(url, next_url=None):
+    """
+    Return a function mapping a page number to its URL when the listing uses
+    a page=N style parameter, or None if it does not
+    """
+    for template in (url, next_url):
+        if template and PAGE_PARAM_PATTERN.search(template):
+            return lambda page, template=template: PAGE_PARAM_PATTERN.sub(
+                lambda m: f"{m.group(1)}{page}", template, count=1)
+    return None
+
+def scrape_pages_static(url, container_selector, selected_fields, sink, max_items=50, max_pages=1, proxy=None,
+                        prefetch=4, limiter=None):
+    """
+    Scrape a listing over HTTP, following pagination, and pass each page's
+    rows to sink. Numbered pages are fetched `prefetch` at a time; plain
+    next links are followed in order. Every fetch, prefetched or not, waits
+    for the RateLimiter. Returns the number of rows, or None when the first
+    page needs a browser. Only a page that loaded but lacked the containers
+    marks its domain as 'browser'; errors and blocks may pass.
+    """
+    tree, rows = _static_page(url, container_selector, selected_fields, max_items, proxy, limiter)
+    if rows is None:
+        if tree is not None:
+            render_modes.remember(url, 'browser')
+        return None
+    sink(rows)
+    count = len(rows)
+    if max_pages <= 1:
+        return count
+    
+    next_url = find_next_page_url(tree, url)
+    build_page_url = page_url_builder(url, next_url)
+    
+    if build_page_url:
+        first_page = int(PAGE_PARAM_PATTERN.search(url).group(2)) if PAGE_PARAM_PATTERN.search(url) else 1
+        page = first_page + 1
+        last_page = first_page + max_pages - 1
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            while page <= last_page and count < max_items:
+                batch = range(page, min(page + prefetch, last_page + 1))
+                results = executor.map(
+                    lambda n: scrape_page_static(build_page_url(n), container_selector, selected_fields,
+                                                 max_items, proxy, limiter),
+                    batch)
+                exhausted = False
+                for page_rows in results:
+                    if not page_rows or count >= max_items:
+                        exhausted = True
+                        break
+                    page_rows = page_rows[:max_items - count]
+                    sink(page_rows)
+                    count += len(page_rows)
+                logging.info(f"📄 Pages up to {batch[-1]}: {count} items")
+                if exhausted:
+                    break
+                page += len(batch)
+    else:
+        pages = 1
+        while next_url and pages < max_pages and count < max_items:
+            tree, page_rows = _static_page(next_url, container_selector, selected_fields,
+                                           max_items - count, proxy, limiter)
+            if not page_rows:
+                break
+            sink(page_rows)
+            count += len(page_rows)
+            pages += 1
+            logging.info(f"📄 Page {pages}: {count} items")
+            next_url = find_next_page_url(tree, next_url)
+    
+    return count
+
+# Reads every selected field of every container in one WebDriver round trip.
+# Attributes use the DOM property when it is a string, so href/src come back
+# absolute just like WebElement.get_attribute().
+BULK_EXTRACT_SCRIPT = """
+const [containerSelector, fields, limit, seenMarker] = arguments;
+let containers = Array.from(document.querySelectorAll(containerSelector));
+if (seenMarker) {
+    containers = containers.filter(c => !c.hasAttribute(seenMarker));
+}
+return containers.slice(0, limit).map(container => {
+    if (seenMarker) {
+        container.setAttribute(seenMarker, '1');
+    }
+    const row = {};
+    for (const [name, selector, attr] of fields) {
+        let element = null;
+        try {
+            element = container.querySelector(selector);
+        } catch (e) {
+            element = null;
+        }
+        let value = null;
+        if (element) {
+            if (attr) {
+                value = typeof element[attr] === 'string' ? element[attr] : element.getAttribute(attr);
+            } else {
+                value = (element.innerText || element.textContent || '').trim();
+            }
+        }
+        row[name] = value === null || value === undefined ? 'N/A' : value;
+    }
+    return row;
+});
+"""
+
+def extract_rows_js(driver, container_selector, selected_fields, max_items=50, seen_marker=None):
+    """
+    Extract all rows with a single execute_script call. With seen_marker set,
+    containers already read are skipped and newly read ones get marked.
+    """
+    fields = [list(spec) for spec in field_specs(selected_fields)]
+    return driver.execute_script(BULK_EXTRACT_SCRIPT, container_selector, fields, max_items, seen_marker)
+
+class DriverSlot:
+    """
+    One worker's browser, started on first use and replaced after a block
+    """
+    def __init__(self, headless=False, proxy_pool=None):
+        self.headless = headless
+        self.proxy_pool = proxy_pool
+        self.driver = None
+        self.proxy = None
+    
+    def current_proxy(self):
+        return self.proxy_pool.current() if self.proxy_pool else None
+    
+    def get(self):
+        if self.driver is None:
+            self.proxy = self.current_proxy()
+            self.driver = setup_driver(headless=self.headless, use_proxy=bool(self.proxy), proxy=self.proxy)
+        return self.driver
+    
+    def replace(self):
+        """Retire the blocked proxy and browser; the next get() starts fresh ones"""
+        if self.proxy_pool and self.proxy:
+            self.proxy_pool.retire(self.proxy)
+        self.quit()
+        run_metrics.increment('driver_restarts')
+    
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+def load_page(slot, url, container_selector, delay=3, limiter=None):
+    """
+    Open a page and wait for the containers to appear, switching to a fresh
+    proxy and browser when the page turns out to be a block. Returns the driver.
+    """
+    for attempt in range(MAX_BLOCK_RETRIES + 1):
+        driver = slot.get()
+        if limiter:
+            limiter.wait()
         logging.info(f"🚀 Starting scraping: {url}")
+        started = time.perf_counter()
         driver.get(url)
-        time.sleep(random.uniform(3, 6))
+        run_metrics.increment('pages_fetched', mode='browser')
+        run_metrics.observe('fetch', time.perf_counter() - started, mode='browser')
+        time.sleep(random.uniform(delay, delay * 2))
         
         # Close any popups
         close_popups(driver)
         
         # Wait for containers to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, container_selector))
-        )
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, container_selector))
+            )
+            if fetcher.keeping:
+                fetcher.page_source(url, driver)
+            return driver
+        except TimeoutException:
+            block_reason = detect_driver_block(driver)
+            if not block_reason:
+                raise
         
-        containers = driver.find_elements(By.CSS_SELECTOR, container_selector)
-        logging.info(f"📦 Found {len(containers)} items to scrape")
+        run_metrics.increment('blocks')
+        logging.warning(f"🚧 {url} blocked ({block_reason}), attempt {attempt + 1}/{MAX_BLOCK_RETRIES + 1}")
+        if attempt < MAX_BLOCK_RETRIES:
+            slot.replace()
+    
+    raise BlockedError(block_reason, url)
+
+def scrape_page(slot, url, container_selector, selected_fields, max_items=50, delay=3, limiter=None):
+    """
+    Scrape one page in the slot's browser
+    """
+    driver = load_page(slot, url, container_selector, delay, limiter)
+    
+    scraped_data = extract_rows_js(driver, container_selector, selected_fields, max_items)
+    logging.info(f"📦 Extracted {len(scraped_data)} items")
+    return scraped_data
+
+def scrape_pages_browser(slot, url, container_selector, selected_fields, sink, max_items=50, max_pages=1, delay=3,
+                         limiter=None):
+    """
+    Scrape a listing in the browser, following next links or page=N URLs,
+    passing each page's rows to sink. Returns the number of rows.
+    """
+    rows = scrape_page(slot, url, container_selector, selected_fields, max_items, delay, limiter)
+    sink(rows)
+    count = len(rows)
+    build_page_url = page_url_builder(url)
+    page_url = url
+    
+    for page in range(2, max_pages + 1):
+        if count >= max_items:
+            break
+        driver = slot.get()
+        tree = lxml.html.fromstring(driver.page_source)
+        next_url = find_next_page_url(tree, driver.current_url)
+        if build_page_url is None:
+            build_page_url = page_url_builder(page_url, next_url)
+        if next_url is None and build_page_url is not None:
+            next_url = build_page_url(page)
+        if not next_url or next_url == page_url:
+            break
         
-        for i, container in enumerate(containers[:max_items]):
-            item_data = {}
-            
-            for field_id, field_info in selected_fields.items():
-                field_name = field_info['name']
-                field_selector = field_info['selector']
-                
-                try:
-                    # Try to find element within container
-                    element = container.find_element(By.CSS_SELECTOR, field_selector)
-                    item_data[field_name] = element.text.strip()
-                except:
-                    item_data[field_name] = "N/A"
-            
-            scraped_data.append(item_data)
-            
-            # Show progress
-            if (i + 1) % 10 == 0:
-                print(f"✅ Scraped {i + 1} items...")
-            
-            # Random delay to avoid being blocked
-            if i > 0 and i % 20 == 0:
-                time.sleep(random.uniform(2, 4))
+        try:
+            page_rows = scrape_page(slot, next_url, container_selector, selected_fields,
+                                    max_items - count, delay, limiter)
+        except TimeoutException:
+            break
+        if not page_rows:
+            break
+        sink(page_rows)
+        count += len(page_rows)
+        page_url = next_url
+        logging.info(f"📄 Page {page}: {count} items")
+    
+    return count
+
+SEEN_MARKER = 'data-scrape-seen'
+
+def scrape_infinite_scroll(slot, url, container_selector, selected_fields, sink, max_items=50, delay=3,
+                           max_idle_scrolls=3, limiter=None):
+    """
+    Scroll an infinite listing one screen at a time, reading only containers
+    that were not seen before (they are marked in the DOM once read).
+    Returns the number of rows passed to sink.
+    """
+    driver = load_page(slot, url, container_selector, delay, limiter)
+    
+    count = 0
+    idle_scrolls = 0
+    
+    while count < max_items and idle_scrolls < max_idle_scrolls:
+        new_rows = extract_rows_js(driver, container_selector, selected_fields,
+                                   max_items - count, seen_marker=SEEN_MARKER)
         
-        logging.info(f"✅ Successfully scraped {len(scraped_data)} items")
+        if new_rows:
+            sink(new_rows)
+            count += len(new_rows)
+            idle_scrolls = 0
+            logging.info(f"🖱️ {count} items after scrolling")
+        else:
+            idle_scrolls += 1
+        
+        if count >= max_items:
+            break
+        
+        # Containers in the DOM now, which is not the rows read: listings may drop items as they scroll
+        dom_count = driver.execute_script("return document.querySelectorAll(arguments[0]).length;",
+                                          container_selector)
+        driver.execute_script("window.scrollBy(0, window.innerHeight);")
+        try:
+            WebDriverWait(driver, max(delay, 2)).until(
+                lambda d: d.execute_script("return document.querySelectorAll(arguments[0]).length;",
+                                           container_selector) != dom_count
+            )
+        except TimeoutException:
+            # Nothing new yet; nudge to the very bottom in case loading is triggered there
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    
+    if fetcher.keeping:
+        # The final DOM holds every container that was loaded while scrolling
+        fetcher.page_source(url, driver)
+    return count
+
+def scrape_pages_replay(url, container_selector, selected_fields, sink, max_items=50, max_pages=1):
+    """
+    Replay a listing from the recording, following the same next links and
+    page=N URLs a live run would have. Returns the number of rows.
+    """
+    count = 0
+    page_url = url
+    build_page_url = page_url_builder(url)
+    for page in range(1, max_pages + 1):
+        try:
+            record = fetcher.fetch(page_url)
+        except ReplayMiss:
+            if page == 1:
+                raise
+            break
+        tree = lxml.html.fromstring(record.html, base_url=record.final_url)
+        rows = extract_rows_from_tree(tree, container_selector, selected_fields, max_items - count)
+        if not rows:
+            break
+        sink(rows)
+        count += len(rows)
+        if count >= max_items:
+            break
+        
+        next_url = find_next_page_url(tree, record.final_url)
+        if build_page_url is None:
+            build_page_url = page_url_builder(page_url, next_url)
+        if next_url is None and build_page_url is not None:
+            next_url = build_page_url(page + 1)
+        if not next_url or next_url == page_url:
+            break
+        page_url = next_url
+    return count
+
+def scrape_url(url, container_selector, selected_fields, slot, sink, max_items=50, delay=3,
+               max_pages=1, infinite_scroll=False, limiter=None):
+    """
+    Scrape one URL over HTTP when the domain allows it, otherwise with the
+    browser in the given DriverSlot. Rows go to sink a page at a time; the
+    number of rows is returned. Every page load waits for limiter when one
+    is given. When replaying, every page is read from the recording with
+    lxml, however it was fetched when it was recorded.
+    """
+    if fetcher.replaying:
+        return scrape_pages_replay(url, container_selector, selected_fields, sink, max_items,
+                                   1 if infinite_scroll else max_pages)
+    
+    if not infinite_scroll and render_modes.get(url) != 'browser':
+        count = scrape_pages_static(url, container_selector, selected_fields, sink, max_items, max_pages,
+                                    slot.current_proxy(), limiter=limiter)
+        if count is not None:
+            render_modes.remember(url, 'static')
+            logging.info(f"⚡ {count} items from {url} over HTTP")
+            return count
+    
+    if infinite_scroll:
+        return scrape_infinite_scroll(slot, url, container_selector, selected_fields, sink, max_items, delay,
+                                      limiter=limiter)
+    return scrape_pages_browser(slot, url, container_selector, selected_fields, sink, max_items, max_pages, delay,
+                                limiter)
+
+def stream_selected_data(url, container_selector, selected_fields, writer, max_items=50, use_proxy=False,
+                         proxy=None, headless=False, delay=3, max_pages=1, infinite_scroll=False, proxy_pool=None):
+    """
+    Scrape data based on user's selection, writing rows to writer as each
+    page is read. Returns the number of rows written.
+    """
+    # Setup proxy if needed; blocked proxies are swapped out from the pool
+    if use_proxy and proxy_pool is None:
+        proxy_pool = ProxyPool(get_free_proxies, test_proxy, initial=proxy, metrics=run_metrics)
+    
+    slot = DriverSlot(headless=headless, proxy_pool=proxy_pool if use_proxy else None)
+    
+    def sink(rows):
+        writer.write_many(rows)
+        writer.flush()
+        run_metrics.increment('items_extracted', len(rows))
+    
+    count = 0
+    try:
+        count = scrape_url(url, container_selector, selected_fields, slot, sink, max_items, delay,
+                           max_pages=max_pages, infinite_scroll=infinite_scroll)
+        logging.info(f"✅ Successfully scraped {count} items")
     
     except Exception as e:
         logging.error(f"❌ Scraping failed: {e}")
+        count = writer.stats.rows
     finally:
-        driver.quit()
+        slot.quit()
     
-    return scraped_data
+    return count
+
+def scrape_selected_data(url, container_selector, selected_fields, max_items=50, use_proxy=False, proxy=None,
+                         headless=False, delay=3, max_pages=1, infinite_scroll=False, proxy_pool=None):
+    """
+    Scrape data based on user's selection with proxy support
+    """
+    writer = ListRowWriter()
+    stream_selected_data(url, container_selector, selected_fields, writer, max_items, use_proxy, proxy,
+                         headless, delay, max_pages, infinite_scroll, proxy_pool)
+    return writer.rows
+
+def save_recipe(filename, url, container_selector, selected_fields, settings):
+    """
+    Save a pattern/field selection so it can be replayed in batch mode
+    """
+    recipe = {
+        'url': url,
+        'container_selector': container_selector,
+        'fields': [
+            {key: field_info[key] for key in ('name', 'selector', 'attr') if field_info.get(key)}
+            for field_info in selected_fields.values()
+        ],
+        'settings': settings,
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(recipe, f, indent=2, ensure_ascii=False)
+    logging.info(f"💾 Recipe saved to {filename}")
+    return filename
+
+def load_recipe(filename):
+    """
+    Load a saved recipe, returning selected_fields in the interactive format
+    """
+    with open(filename, encoding='utf-8') as f:
+        recipe = json.load(f)
+    
+    if not recipe.get('container_selector') or not recipe.get('fields'):
+        raise ValueError(f"Recipe {filename} needs 'container_selector' and 'fields'")
+    
+    recipe['selected_fields'] = {
+        i: {key: field[key] for key in ('name', 'selector', 'attr') if field.get(key)}
+        for i, field in enumerate(recipe['fields'], 1)
+    }
+    settings = {'use_proxy': False, 'headless': True, 'max_items': 50, 'delay': 3,
+                'max_pages': 1, 'infinite_scroll': False}
+    settings.update(recipe.get('settings') or {})
+    recipe['settings'] = settings
+    return recipe
+
+def read_url_list(filename):
+    """
+    Read URLs from a text file, one per line ('#' starts a comment)
+    """
+    urls = []
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            urls.append(url)
+    return urls
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing request starts across the whole worker pool
+    """
+    def __init__(self, max_rate=None):
+        self.interval = 1.0 / max_rate if max_rate else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def run_batch(recipe_file, urls_file, output_file, workers=4, max_rate=None, headless=None):
+    """
+    Run a saved recipe over a list of URLs with a pool of workers, streaming
+    rows to output_file (.csv, .jsonl, .jsonl.gz or .parquet) as each page
+    finishes. Browsers are only started for domains that need JavaScript
+    rendering.
+    """
+    recipe = load_recipe(recipe_file)
+    settings = recipe['settings']
+    if headless is not None:
+        settings['headless'] = headless
+    urls = read_url_list(urls_file)
+    selected_fields = recipe['selected_fields']
+    container_selector = recipe['container_selector']
+    
+    logging.info(f"📋 Batch: {len(urls)} URLs, {workers} workers, headless={settings['headless']}")
+    
+    proxy_pool = None
+    if settings['use_proxy'] and not fetcher.replaying:
+        proxy_pool = ProxyPool(get_free_proxies, test_proxy, metrics=run_metrics)
+    
+    limiter = RateLimiter(max_rate)
+    local = threading.local()
+    slots = []
+    slots_lock = threading.Lock()
+    
+    def get_worker_slot():
+        # One browser slot per worker thread; the browser starts on first use
+        if getattr(local, 'slot', None) is None:
+            local.slot = DriverSlot(headless=settings['headless'], proxy_pool=proxy_pool)
+            with slots_lock:
+                slots.append(local.slot)
+        return local.slot
+    
+    fieldnames = ['source_url'] + [field['name'] for field in selected_fields.values()]
+    writer_lock = threading.Lock()
+    total_rows = 0
+    failed_urls = []
+    
+    try:
+        with open_row_writer(output_file, fieldnames=fieldnames, classifier=classify_values) as writer, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            
+            def scrape_one(url):
+                def sink(rows):
+                    with writer_lock:
+                        writer.write_many({'source_url': url, **row} for row in rows)
+                        writer.flush()
+                    run_metrics.increment('items_extracted', len(rows))
+                
+                return scrape_url(url, container_selector, selected_fields, get_worker_slot(), sink,
+                                  settings['max_items'], settings['delay'],
+                                  max_pages=settings['max_pages'], infinite_scroll=settings['infinite_scroll'],
+                                  limiter=limiter)
+            
+            futures = {executor.submit(scrape_one, url): url for url in urls}
+            for done, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    count = future.result()
+                except Exception as e:
+                    logging.error(f"❌ {url}: {e}")
+                    failed_urls.append(url)
+                    continue
+                
+                total_rows += count
+                logging.info(f"✅ [{done}/{len(urls)}] {count} items from {url}")
+    finally:
+        for slot in slots:
+            slot.quit()
+        run_metrics.log_summary()
+    
+    logging.info(f"🎉 Batch finished: {total_rows} items from {len(urls) - len(failed_urls)}/{len(urls)} URLs "
+                 f"saved to {output_file}")
+    if failed_urls:
+        logging.warning(f"⚠️ {len(failed_urls)} URLs failed")
+    return total_rows, failed_urls
 
 def get_scraping_settings():
     """
@@ -531,11 +1283,24 @@ def get_scraping_settings():
     except ValueError:
         delay = 3
     
+    # Pagination
+    infinite_scroll = input("🖱️  Infinite-scroll listing? (y/n, default: n): ").strip().lower()
+    infinite_scroll = infinite_scroll == 'y'
+    
+    max_pages = 1
+    if not infinite_scroll:
+        try:
+            max_pages = int(input("📄 Max pages to follow (default: 1): ") or "1")
+        except ValueError:
+            max_pages = 1
+    
     return {
         'use_proxy': use_proxy,
         'headless': headless,
         'max_items': max_items,
-        'delay': delay
+        'delay': delay,
+        'max_pages': max_pages,
+        'infinite_scroll': infinite_scroll
     }
 
 def interactive_scraper():
@@ -545,8 +1310,8 @@ def interactive_scraper():
     print("🕷️  INTERACTIVE WEB SCRAPER WITH PROXY SUPPORT")
     print("="*60)
     
-    # Global proxy for session
-    session_proxy = None
+    # Proxy pool shared by the whole session; blocked proxies get replaced
+    proxy_pool = None
     
     while True:
         url = input("\n🌐 Enter website URL to analyze (or 'quit' to exit): ").strip()
@@ -562,23 +1327,22 @@ def interactive_scraper():
         settings = get_scraping_settings()
         
         # Setup proxy for this session if requested
-        if settings['use_proxy'] and not session_proxy:
-            print("\n🔄 Setting up proxy...")
-            proxies = get_free_proxies()
-            if proxies:
-                session_proxy = get_working_proxy(proxies)
-                if session_proxy:
-                    print(f"✅ Proxy ready: {session_proxy}")
-                else:
-                    print("⚠️ No working proxy found, continuing without proxy")
-                    settings['use_proxy'] = False
+        session_proxy = None
+        if settings['use_proxy']:
+            if proxy_pool is None:
+                print("\n🔄 Setting up proxy...")
+                proxy_pool = ProxyPool(get_free_proxies, test_proxy, metrics=run_metrics)
+            session_proxy = proxy_pool.current()
+            if session_proxy:
+                print(f"✅ Proxy ready: {session_proxy}")
             else:
-                print("❌ Failed to fetch proxies, continuing without proxy")
+                print("⚠️ No working proxy found, continuing without proxy")
                 settings['use_proxy'] = False
         
         # Analyze website structure
         print("\n🔄 Analyzing website structure...")
-        detected_patterns = analyze_website_structure(url, use_proxy=settings['use_proxy'])
+        detected_patterns = analyze_website_structure(url, use_proxy=settings['use_proxy'],
+                                                      headless=settings['headless'], proxy=session_proxy)
         
         # Display patterns to user
         patterns = display_detected_patterns(detected_patterns)
@@ -592,50 +1356,81 @@ def interactive_scraper():
         if not selected_pattern or not selected_fields:
             continue
         
+        # Offer to keep this selection for batch runs
+        save_choice = input("\n📝 Save this selection as a recipe for batch mode? (y/n): ").strip().lower()
+        if save_choice == 'y':
+            recipe_file = input("   Recipe filename (default: recipe.json): ").strip() or "recipe.json"
+            save_recipe(recipe_file, url, selected_pattern['selector'], selected_fields, settings)
+            print(f"   Run it later with: python scrapy+.py batch {recipe_file} urls.txt")
+        
+        # Rows are written while scraping, so pick the output file first
+        filename = input("\n💾 Enter filename to save (.csv, .jsonl, .jsonl.gz, .parquet; "
+                         "default: scraped_data.csv): ").strip() or "scraped_data.csv"
+        if not is_supported_export(filename):
+            filename += '.csv'
+        
         # Start scraping with settings
         print(f"\n🚀 Starting scrape with settings:")
         print(f"   📊 Max items: {settings['max_items']}")
         print(f"   🔒 Using proxy: {'Yes' if settings['use_proxy'] else 'No'}")
         print(f"   👻 Headless: {'Yes' if settings['headless'] else 'No'}")
         print(f"   ⏱️  Delay: {settings['delay']}s")
+        if settings['infinite_scroll']:
+            print(f"   🖱️  Infinite scroll: Yes")
+        else:
+            print(f"   📄 Max pages: {settings['max_pages']}")
         
-        scraped_data = scrape_selected_data(
-            url, 
-            selected_pattern['selector'], 
-            selected_fields, 
-            max_items=settings['max_items'],
-            use_proxy=settings['use_proxy'],
-            proxy=session_proxy
-        )
+        with open_row_writer(filename, classifier=classify_values) as writer:
+            scraped_count = stream_selected_data(
+                url, 
+                selected_pattern['selector'], 
+                selected_fields, 
+                writer,
+                max_items=settings['max_items'],
+                use_proxy=settings['use_proxy'],
+                proxy=session_proxy,
+                proxy_pool=proxy_pool,
+                headless=settings['headless'],
+                delay=settings['delay'],
+                max_pages=settings['max_pages'],
+                infinite_scroll=settings['infinite_scroll']
+            )
+        stats = writer.stats
         
-        if scraped_data:
-            # Save data
-            filename = input("\n💾 Enter filename to save (default: scraped_data.csv): ").strip() or "scraped_data.csv"
-            if not filename.endswith('.csv'):
-                filename += '.csv'
-            
-            df = pd.DataFrame(scraped_data)
-            df.to_csv(filename, index=False, encoding='utf-8')
-            
-            print(f"\n✅ SUCCESS! Scraped {len(scraped_data)} items")
+        if scraped_count:
+            print(f"\n✅ SUCCESS! Scraped {scraped_count} items")
             print(f"📁 Data saved to: {filename}")
-            print(f"📊 Columns: {list(df.columns)}")
+            print(f"📊 Columns: {stats.columns}")
             
             # Show preview
             print("\n👀 Preview (first 3 rows):")
-            print(df.head(3).to_string())
+            print(pd.DataFrame(stats.preview).to_string())
+            
+            # Show inferred column types
+            print(f"\n🔤 Column types:")
+            for column, data_type in stats.column_types().items():
+                print(f"   {column}: {data_type}")
             
             # Show statistics
             print(f"\n📈 STATISTICS:")
-            print(f"   Total items: {len(scraped_data)}")
-            print(f"   Columns: {len(df.columns)}")
+            print(f"   Total items: {stats.rows}")
+            print(f"   Columns: {len(stats.columns)}")
             print(f"   Proxy used: {'Yes' if settings['use_proxy'] else 'No'}")
+            metrics = run_metrics.snapshot()
+            if metrics.get('blocks'):
+                print(f"   Blocks hit: {metrics['blocks']} "
+                      f"(browser restarts: {metrics.get('driver_restarts', 0)}, "
+                      f"proxies retired: {metrics.get('proxies_retired', 0)})")
             
             # Check for common issues
-            null_counts = df.isnull().sum()
-            if null_counts.sum() > 0:
-                print(f"   Missing data: {null_counts.sum()} total nulls")
+            if stats.total_missing() > 0:
+                print(f"   Missing data: {stats.total_missing()} empty or N/A values")
+                for column, missing in stats.summary()['missing'].items():
+                    if missing:
+                        print(f"      {column}: {missing}")
         else:
+            if os.path.exists(filename):
+                os.remove(filename)
             print("\n❌ No data was scraped. Possible reasons:")
             print("   • Website blocking requests")
             print("   • Selectors changed")
@@ -648,5 +1443,48 @@ def interactive_scraper():
             print("👋 Happy scraping!")
             break
 
+def main(argv=None):
+    """
+    Entry point: interactive mode by default, 'batch' to replay a saved recipe
+    """
+    parser = argparse.ArgumentParser(description="Interactive web scraper with headless batch mode")
+    add_profile_arguments(parser, 'scrapy_profile')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    batch = subparsers.add_parser('batch', help="Run a saved recipe over a file of URLs")
+    batch.add_argument('recipe', help="Recipe JSON saved from interactive mode")
+    batch.add_argument('urls', help="Text file with one URL per line")
+    batch.add_argument('-o', '--output', default='batch_results.csv',
+                       help="Output file; .csv, .jsonl, .jsonl.gz or .parquet (default: batch_results.csv)")
+    batch.add_argument('-w', '--workers', type=int, default=4, help="Concurrent workers (default: 4)")
+    batch.add_argument('--max-rate', type=float, default=None,
+                       help="Maximum page loads per second across all workers")
+    batch.add_argument('--show-browser', action='store_true', help="Override the recipe and show browser windows")
+    batch.add_argument('--record', metavar='DIR', help="Save every page read to a recording in DIR")
+    batch.add_argument('--replay', metavar='DIR',
+                       help="Re-run the recipe on a recording or WARC archive instead of the live sites")
+    batch.add_argument('--archive', metavar='DIR', help="Also append every page read to WARC files in DIR")
+    add_metrics_arguments(batch)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'batch':
+        try:
+            recording = fetcher_from_args(args.record, args.replay, args.archive)
+        except ValueError as e:
+            parser.error(str(e))
+        fetcher.configure(recording.mode, recording.store, recording.archive)
+        exporter = start_metrics(args.metrics_port, args.metrics_file, args.metrics_interval)
+        try:
+            with profiling_from_args(args):
+                run_batch(args.recipe, args.urls, args.output, workers=args.workers, max_rate=args.max_rate,
+                          headless=False if args.show_browser else None)
+        finally:
+            if exporter:
+                exporter.close()
+    else:
+        with profiling_from_args(args):
+            interactive_scraper()
+
 if __name__ == "__main__":
-    interactive_scraper()
\ No newline at end of file
+    main()
\ No newline at end of file
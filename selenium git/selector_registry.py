@@ -0,0 +1,94 @@
+import logging
+import threading
+from collections import Counter
+
+from cssselect import HTMLTranslator, SelectorError
+from lxml import etree
+
+from scrape_metrics import REGISTRY
+
+# Fallback selector lists validated and compiled once, with the fallbacks
+# reordered by how often each one actually matches
+
+class CompiledSelector:
+    """One validated selector and its compiled lxml XPath"""
+    def __init__(self, css, xpath):
+        self.css = css
+        self.xpath = xpath
+        self.match = etree.XPath(xpath)
+
+    def __repr__(self):
+        return f"CompiledSelector({self.css!r})"
+
+def compile_selector(css):
+    """Compile a CSS selector, or return None if it is not valid"""
+    try:
+        return CompiledSelector(css, HTMLTranslator().css_to_xpath(css))
+    except (SelectorError, etree.XPathSyntaxError) as e:
+        logging.warning(f"⚠️ Dropping invalid selector {css!r}: {e}")
+        return None
+
+class SelectorRegistry:
+    """
+    Field name -> fallback selectors. Every selector is validated and compiled
+    when the registry is built; lookups try the selector with the most hits first.
+    """
+    def __init__(self, selectors):
+        self.order = {}
+        self.hits = {}
+        self.lookups = Counter()
+        self.misses = Counter()
+        self.lock = threading.Lock()
+
+        for field, css_list in selectors.items():
+            compiled = [selector for selector in map(compile_selector, css_list) if selector]
+            if not compiled:
+                logging.warning(f"⚠️ No valid selectors left for field '{field}'")
+            self.order[field] = compiled
+            self.hits[field] = Counter()
+
+    def _record(self, field, selector):
+        with self.lock:
+            self.lookups[field] += 1
+            if selector is None:
+                self.misses[field] += 1
+                REGISTRY.inc("scrape_selector_misses_total", field=field)
+                return
+            hits = self.hits[field]
+            hits[selector.css] += 1
+            REGISTRY.inc("scrape_selector_hits_total", field=field, selector=selector.css)
+            # Position in the current order: other threads may have reordered it since the lookup
+            order = self.order[field]
+            position = order.index(selector)
+            # Only a fallback overtaking the one ahead of it changes the order
+            if position and hits[selector.css] > hits[order[position - 1].css]:
+                self.order[field] = sorted(order, key=lambda compiled: -hits[compiled.css])
+
+    def all(self, tree, field, predicate=None):
+        """Every element matched by the first selector that matches anything"""
+        for selector in self.order[field]:
+            matches = selector.match(tree)
+            if predicate:
+                matches = [element for element in matches if predicate(element)]
+            if matches:
+                self._record(field, selector)
+                return matches
+        self._record(field, None)
+        return []
+
+    def first(self, tree, field, predicate=None):
+        """First matching element for a field, or None"""
+        matches = self.all(tree, field, predicate)
+        return matches[0] if matches else None
+
+    def stats(self):
+        """Lookups, misses and per-selector hits for every field that was used"""
+        with self.lock:
+            return {
+                field: {
+                    'lookups': self.lookups[field],
+                    'misses': self.misses[field],
+                    'hits': {selector.css: self.hits[field][selector.css] for selector in self.order[field]},
+                }
+                for field in self.order if self.lookups[field]
+            }
@@ -0,0 +1,73 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Encrypted on-disk store for a logged-in browser's cookie jar.
+# The Fernet key comes from GITSELENIUM_SESSION_KEY, or from a keyfile that is
+# created next to the session file with owner-only permissions.
+
+SESSION_KEY_ENV = "GITSELENIUM_SESSION_KEY"
+DEFAULT_SESSION_FILE = os.path.join(os.path.expanduser("~"), ".gitselenium", "github_session.enc")
+
+def _write_private(path: str, data: bytes):
+    """Write a file readable by the owner only, replacing it atomically"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class SessionStore:
+    """Save, load and forget one account's cookies, encrypted with Fernet"""
+    def __init__(self, path: str = None, key_file: str = None):
+        self.path = path or os.environ.get("GITSELENIUM_SESSION_FILE") or DEFAULT_SESSION_FILE
+        self.key_file = key_file or os.path.splitext(self.path)[0] + ".key"
+        self._fernet = None
+
+    def _cipher(self):
+        if self._fernet is None:
+            try:
+                from cryptography.fernet import Fernet
+            except ImportError:
+                raise ImportError("Saved sessions need cryptography: pip install cryptography")
+
+            key = os.environ.get(SESSION_KEY_ENV)
+            if not key:
+                if not os.path.exists(self.key_file):
+                    _write_private(self.key_file, Fernet.generate_key())
+                with open(self.key_file, "rb") as f:
+                    key = f.read().strip()
+            self._fernet = Fernet(key)
+        return self._fernet
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def save(self, username: str, cookies: List[Dict]):
+        payload = {
+            "username": username,
+            "cookies": cookies,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _write_private(self.path, self._cipher().encrypt(json.dumps(payload).encode("utf-8")))
+
+    def load(self) -> Optional[Dict]:
+        """The saved session, or None if there is none or it cannot be decrypted"""
+        if not self.exists():
+            return None
+        try:
+            from cryptography.fernet import InvalidToken
+            with open(self.path, "rb") as f:
+                return json.loads(self._cipher().decrypt(f.read()))
+        except ImportError:
+            raise
+        except (InvalidToken, ValueError, OSError):
+            return None
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,429 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import mmap
+import os
+import re
+import sys
+import threading
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+from urllib.parse import parse_qs, urldefrag, urlparse
+
+import lxml.html
+
+from exporters import is_supported_export, open_row_writer
+from fetch_store import FetchRecord
+
+# Crawl archive in standard WARC files (one gzip member per record, so each
+# record can be decompressed on its own). Every WARC file has a sidecar
+# index of JSON lines, one per response record:
+#
+#   {"url": ..., "timestamp": "2026-10-19T09:20:58Z", "offset": 1234, "length": 5678, "status": 200}
+#
+# Records are read back through mmap by offset, so any page of any past
+# crawl is one slice and one gzip member away.
+#
+#   python warc_archive.py list crawls/
+#   python warc_archive.py extract crawls/ --extractor github -o repos.csv --workers 8
+#   python warc_archive.py extract crawls/ --extractor recipe --recipe recipe.json -o rows.jsonl
+
+WARC_VERSION = "WARC/1.1"
+WARC_SUFFIX = ".warc.gz"
+INDEX_SUFFIX = ".idx"
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024 * 1024
+SCAN_CHUNK_SIZE = 64 * 1024
+# Hop-by-hop and encoding headers no longer describe the decoded body we store
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection'}
+CHARSET_PATTERN = re.compile(r';\s*charset=[^;]*', re.IGNORECASE)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _warc_date(moment=None):
+    return (moment or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _http_block(status, headers, body):
+    """HTTP response bytes for a WARC response record; the body is always UTF-8"""
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}".rstrip()]
+    content_type = "text/html; charset=utf-8"
+    for name, value in (headers or {}).items():
+        if name.lower() == 'content-type':
+            content_type = CHARSET_PATTERN.sub('', value) + "; charset=utf-8"
+        elif name.lower() not in DROPPED_HEADERS:
+            lines.append(f"{name}: {value}")
+    lines += [f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + body
+
+def _warc_record(warc_type, headers, block):
+    lines = [WARC_VERSION, f"WARC-Type: {warc_type}", f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(block)}")
+    record = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+    return gzip.compress(record, mtime=0)
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+def parse_warc_record(data):
+    """FetchRecord from one gzipped WARC response record"""
+    raw = gzip.decompress(data)
+    warc_head, _, rest = raw.partition(b"\r\n\r\n")
+    warc_headers = _parse_headers(warc_head.decode("utf-8").split("\r\n")[1:])
+    block = rest[:int(warc_headers['Content-Length'])]
+    http_head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = http_head.decode("iso-8859-1").split("\r\n")
+    url = warc_headers['WARC-Target-URI']
+    return FetchRecord(url, body.decode("utf-8", errors="replace"), int(status_line.split()[1]),
+                       _parse_headers(header_lines), warc_headers.get('WARC-X-Final-URL', url),
+                       warc_headers['WARC-Date'], warc_headers.get('WARC-Payload-Digest', '').partition(':')[2])
+
+class WarcReader:
+    """Random access to WARC records by (file, offset, length) through mmap"""
+    def __init__(self, directory):
+        self.directory = directory
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def _map(self, path):
+        with self.lock:
+            if path not in self.maps:
+                with open(path, "rb") as f:
+                    self.maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self.maps[path]
+
+    def forget(self, name):
+        """Drop the mapping of a file that has grown since it was mapped"""
+        with self.lock:
+            mapped = self.maps.pop(os.path.join(self.directory, name), None)
+        if mapped:
+            mapped.close()
+
+    def read(self, entry):
+        """FetchRecord for one index entry"""
+        mapped = self._map(os.path.join(self.directory, entry['file']))
+        return parse_warc_record(mapped[entry['offset']:entry['offset'] + entry['length']])
+
+    def close(self):
+        with self.lock:
+            for mapped in self.maps.values():
+                mapped.close()
+            self.maps = {}
+
+class WarcArchive:
+    """
+    Directory of WARC files plus their offset indexes. save() appends a
+    response record (rotating files past max_file_size); get() reads the
+    newest capture of a URL, or the newest at or before a timestamp.
+    Usable anywhere a FetchStore is.
+    """
+    def __init__(self, directory, prefix="crawl", max_file_size=DEFAULT_MAX_FILE_SIZE):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_file_size = max_file_size
+        self.lock = threading.Lock()
+        self.writer = None
+        self.index_writer = None
+        self.current_path = None
+        self.reader = WarcReader(directory)
+        os.makedirs(directory, exist_ok=True)
+        # url -> captures sorted by timestamp
+        self.index = {}
+        for path in self.warc_files():
+            for entry in read_index(path):
+                self._remember(entry)
+
+    def warc_files(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"*{WARC_SUFFIX}")))
+
+    def _remember(self, entry):
+        captures = self.index.setdefault(entry['url'], [])
+        captures.append(entry)
+        captures.sort(key=lambda capture: capture['timestamp'])
+
+    def _open_next_file(self):
+        self.close_writer()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        sequence = len(self.warc_files())
+        self.current_path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{sequence:05d}{WARC_SUFFIX}")
+        self.writer = open(self.current_path, "ab")
+        self.index_writer = open(self.current_path + INDEX_SUFFIX, "a", encoding="utf-8")
+        info = "software: gitselenium web-scrapping\r\nformat: WARC File Format 1.1\r\n".encode("utf-8")
+        self.writer.write(_warc_record("warcinfo", {
+            'WARC-Date': _warc_date(),
+            'WARC-Filename': os.path.basename(self.current_path),
+            'Content-Type': "application/warc-fields",
+        }, info))
+        logging.info(f"🗄️ Writing crawl archive {self.current_path}")
+
+    def save(self, url, html, status=200, headers=None, final_url=None):
+        """Append one page as a WARC response record and index it"""
+        url = urldefrag(url)[0]
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        timestamp = _warc_date()
+        warc_headers = {
+            'WARC-Date': timestamp,
+            'WARC-Target-URI': url,
+            'WARC-Payload-Digest': f"sha256:{digest}",
+            'Content-Type': "application/http; msgtype=response",
+        }
+        if final_url and final_url != url:
+            warc_headers['WARC-X-Final-URL'] = final_url
+        data = _warc_record("response", warc_headers, _http_block(status, headers, body))
+
+        with self.lock:
+            if self.writer is None or self.writer.tell() >= self.max_file_size:
+                self._open_next_file()
+            entry = {'url': url, 'timestamp': timestamp, 'offset': self.writer.tell(), 'length': len(data),
+                     'status': status, 'file': os.path.basename(self.current_path)}
+            self.writer.write(data)
+            self.writer.flush()
+            self.index_writer.write(json.dumps({key: entry[key] for key in entry if key != 'file'}) + "\n")
+            self.index_writer.flush()
+            self._remember(entry)
+        self.reader.forget(entry['file'])
+        return FetchRecord(url, html, status, headers, final_url, timestamp, digest)
+
+    def read(self, entry):
+        return self.reader.read(entry)
+
+    def captures(self, url):
+        """Index entries for every capture of url, oldest first"""
+        return list(self.index.get(urldefrag(url)[0], []))
+
+    def get(self, url, at=None):
+        """Newest capture of url (at or before the ISO timestamp `at`), or None"""
+        captures = self.captures(url)
+        if at:
+            captures = [entry for entry in captures if entry['timestamp'] <= at]
+        return self.read(captures[-1]) if captures else None
+
+    def __contains__(self, url):
+        return urldefrag(url)[0] in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def entries(self, latest_only=True):
+        """Index entries in URL order: the newest capture per URL, or all of them"""
+        for url in sorted(self.index):
+            captures = self.index[url]
+            yield from (captures[-1:] if latest_only else captures)
+
+    def records(self):
+        return [self.read(entry) for entry in self.entries()]
+
+    def urls(self):
+        return sorted(self.index)
+
+    def close_writer(self):
+        if self.writer:
+            self.writer.close()
+            self.index_writer.close()
+            self.writer = self.index_writer = None
+
+    def close(self):
+        self.close_writer()
+        self.reader.close()
+
+def read_index(warc_path):
+    """Index entries of one WARC file, rebuilding the sidecar if it is missing"""
+    index_path = warc_path + INDEX_SUFFIX
+    name = os.path.basename(warc_path)
+    if not os.path.exists(index_path):
+        rebuild_index(warc_path)
+    entries = []
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entries.append({**json.loads(line), 'file': name})
+    return entries
+
+def rebuild_index(warc_path):
+    """Scan a WARC file member by member and write its sidecar index"""
+    entries = []
+    with open(warc_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        offset = 0
+        while offset < len(mapped):
+            # Each record is its own gzip member: inflate until this one ends
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            position = offset
+            head = b""
+            while not decompressor.eof and position < len(mapped):
+                chunk = mapped[position:position + SCAN_CHUNK_SIZE]
+                position += len(chunk)
+                output = decompressor.decompress(chunk)
+                if len(head) < SCAN_CHUNK_SIZE:
+                    head += output
+            length = position - offset - len(decompressor.unused_data)
+            warc_headers = _parse_headers(head.partition(b"\r\n\r\n")[0].decode("utf-8").split("\r\n")[1:])
+            if warc_headers.get('WARC-Type') == "response":
+                status = parse_warc_record(mapped[offset:offset + length]).status
+                entries.append({'url': warc_headers['WARC-Target-URI'], 'timestamp': warc_headers['WARC-Date'],
+                                'offset': offset, 'length': length, 'status': status})
+            offset += length
+    with open(warc_path + INDEX_SUFFIX, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+    logging.info(f"🗂️ Rebuilt index for {warc_path}: {len(entries)} records")
+
+# ---------------------------------------------------------------------------
+# Bulk re-extraction: run today's extractors over an archived crawl
+
+def load_script(filename, module_name):
+    """Import one of the flat scripts (scrapy+.py is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+GITHUB_REPO_PATTERN = re.compile(r"^https://github\.com/[^/?#]+/[^/?#]+/?$")
+
+def extract_github(record, options):
+    """Repository rows from archived github.com repository pages"""
+    from gitselenium import parse_repo_page
+    if record.status != 200 or not GITHUB_REPO_PATTERN.match(record.url):
+        return []
+    return [parse_repo_page(record.html, record.url, options.get('fields'))]
+
+def extract_flipkart(record, options):
+    """Product rows from archived Flipkart search pages"""
+    from scrapp import extract_products
+    if record.status != 200 or "/search" not in record.url:
+        return []
+    page = int(parse_qs(urlparse(record.url).query).get('page', ['1'])[0])
+    return extract_products(record.html, page)
+
+_recipe_module = None
+
+def extract_recipe(record, options):
+    """Rows from any archived page using a scrapy+.py recipe"""
+    global _recipe_module
+    if _recipe_module is None:
+        _recipe_module = load_script("scrapy+.py", "scrapy_plus")
+    recipe = options['recipe']
+    tree = lxml.html.fromstring(record.html, base_url=record.final_url)
+    rows = _recipe_module.extract_rows_from_tree(tree, recipe['container_selector'], recipe['selected_fields'],
+                                                 options.get('max_items', 10 ** 9))
+    return [{'source_url': record.url, **row} for row in rows or []]
+
+EXTRACTORS = {
+    'github': extract_github,
+    'flipkart': extract_flipkart,
+    'recipe': extract_recipe,
+}
+
+def _extract_batch(directory, extractor, options, entries):
+    """Worker process: read a batch of index entries and extract their rows"""
+    reader = WarcReader(directory)
+    extract = EXTRACTORS[extractor]
+    rows, failures = [], 0
+    try:
+        for entry in entries:
+            try:
+                rows.extend(extract(reader.read(entry), options))
+            except Exception as e:
+                logging.warning(f"⚠️ {entry['url']}: {e}")
+                failures += 1
+    finally:
+        reader.close()
+    return rows, failures
+
+def reextract(directory, extractor, output_file, workers=None, options=None, latest_only=True, batch_size=200):
+    """
+    Run an extractor over every archived page (the newest capture per URL by
+    default) in a pool of processes and write the rows to output_file.
+    Returns (rows written, pages that failed).
+    """
+    archive = WarcArchive(directory)
+    entries = list(archive.entries(latest_only))
+    archive.close()
+    batches = [entries[start:start + batch_size] for start in range(0, len(entries), batch_size)]
+    logging.info(f"🔁 Re-extracting {len(entries)} archived pages with '{extractor}' in {len(batches)} batches")
+
+    written = failed = 0
+    with open_row_writer(output_file) as writer, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_extract_batch, directory, extractor, options or {}, batch) for batch in batches]
+        # Batches are written in archive order so repeated runs give identical files
+        for future in futures:
+            rows, failures = future.result()
+            writer.write_many(rows)
+            written += len(rows)
+            failed += failures
+    logging.info(f"💾 {written} rows written to {output_file} ({failed} pages failed)")
+    return written, failed
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Inspect and re-extract WARC crawl archives")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list archived captures")
+    list_parser.add_argument("archive")
+    list_parser.add_argument("--all", action="store_true", help="every capture, not just the newest per URL")
+
+    show_parser = subparsers.add_parser("show", help="print the archived HTML of a URL")
+    show_parser.add_argument("archive")
+    show_parser.add_argument("url")
+    show_parser.add_argument("--at", help="newest capture at or before this ISO timestamp")
+
+    index_parser = subparsers.add_parser("reindex", help="rebuild the sidecar indexes from the WARC files")
+    index_parser.add_argument("archive")
+
+    extract_parser = subparsers.add_parser("extract", help="regenerate a dataset from an archive")
+    extract_parser.add_argument("archive")
+    extract_parser.add_argument("--extractor", choices=sorted(EXTRACTORS), required=True)
+    extract_parser.add_argument("--recipe", help="scrapy+.py recipe JSON (for --extractor recipe)")
+    extract_parser.add_argument("--fields", help="comma-separated repository fields (for --extractor github)")
+    extract_parser.add_argument("-o", "--output", required=True, help="output file (.csv, .jsonl, .jsonl.gz, .parquet)")
+    extract_parser.add_argument("-w", "--workers", type=int, default=None, help="processes (default: one per core)")
+    extract_parser.add_argument("--all-captures", action="store_true", help="extract every capture, not just the newest")
+    args = parser.parse_args(argv)
+
+    if args.command == "reindex":
+        for path in glob.glob(os.path.join(args.archive, f"*{WARC_SUFFIX}")):
+            rebuild_index(path)
+        return 0
+
+    if args.command == "extract":
+        if not is_supported_export(args.output):
+            parser.error(f"Unsupported output file {args.output}")
+        options = {}
+        if args.extractor == "recipe":
+            if not args.recipe:
+                parser.error("--extractor recipe needs --recipe")
+            options['recipe'] = load_script("scrapy+.py", "scrapy_plus").load_recipe(args.recipe)
+            options['recipe'].pop('settings', None)
+        if args.fields:
+            options['fields'] = [field.strip() for field in args.fields.split(",") if field.strip()]
+        reextract(args.archive, args.extractor, args.output, args.workers, options, not args.all_captures)
+        return 0
+
+    archive = WarcArchive(args.archive)
+    try:
+        if args.command == "list":
+            for entry in archive.entries(latest_only=not args.all):
+                print(f"{entry['status']}  {entry['timestamp']}  {entry['file']}@{entry['offset']}  {entry['url']}")
+            return 0
+
+        record = archive.get(args.url, args.at)
+        if record is None:
+            print(f"❌ {args.url} is not in {args.archive}", file=sys.stderr)
+            return 1
+        sys.stdout.write(record.html)
+        return 0
+    finally:
+        archive.close()
+
+if __name__ == "__main__":
+    sys.exit(main())